@@ -0,0 +1,371 @@
+import math
+import operator
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import reduce
+
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .availability import partner_index
+from .events import publish_assignments, publish_order_statuses
+from .geo import valid_position
+from .matching import STRATEGIES
+from .models import MAX_PARTNER_LOAD, DeliveryPartner, Order, Assignment
+from .telemetry import assignment_orders, phase_timer
+
+# Order statuses during which the order takes up one of its partner's slots.
+LOAD_HOLDING_STATUSES = ('assigned', 'picked')
+
+NO_PARTNER_REASON = 'No available partner matching criteria (active, under load, correct area)'
+
+# Rows per INSERT/UPDATE statement for the bulk writes.
+BULK_BATCH_SIZE = 1000
+
+
+class PartnerFull(Exception):
+    """A status or partner change would push these partners past ``MAX_PARTNER_LOAD``."""
+
+    def __init__(self, partner_ids):
+        self.partner_ids = sorted(partner_ids)
+        super().__init__(f'Partner {", ".join(map(str, self.partner_ids))} cannot take more orders.')
+
+
+@dataclass
+class BatchResult:
+    total_pending: int = 0
+    assigned_count: int = 0
+    failure_reasons: dict = field(default_factory=dict)
+    # Seconds from creation to assignment, summed over the assigned orders
+    assignment_time_total: float = 0.0
+    # Seconds of work per phase: orders, candidates, matching, writes, metrics
+    phase_seconds: dict = field(default_factory=dict)
+
+    def add_failure(self, reason, count=1):
+        self.failure_reasons[reason] = self.failure_reasons.get(reason, 0) + count
+
+    def add_phase(self, phase, seconds):
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0) + seconds
+
+    @property
+    def average_time(self):
+        return self.assignment_time_total / self.assigned_count if self.assigned_count else 0
+
+    @property
+    def success_rate(self):
+        return self.assigned_count / self.total_pending * 100 if self.total_pending else 0
+
+
+def eligible_partners(area):
+    return DeliveryPartner.objects.filter(
+        status='active',
+        current_load__lt=MAX_PARTNER_LOAD,
+        areas__contains=[area],
+    )
+
+
+def claim_partner(area, position=None):
+    """
+    Take one delivery slot on an eligible partner for ``area``, the closest
+    one to ``position`` when it is given.
+
+    Must run inside a transaction. Candidates come from the in-process
+    availability index, and the database is only asked to lock and confirm
+    the chosen one. If the index has nothing usable we fall back to the
+    indexed query, in the same order: rows locked by concurrent
+    assignments are skipped, and only when every candidate is locked do we
+    wait for one. The increment itself is conditional, so a partner can
+    never go past ``MAX_PARTNER_LOAD``. Returns the partner with its new
+    load, or None.
+    """
+    for partner_id in partner_index.candidates(area, position):
+        partner = _take_slot(eligible_partners(area).filter(pk=partner_id), skip_locked=True)
+        if partner:
+            return partner
+        # A partner another assignment has locked stays indexed; one that is
+        # full, inactive or out of the area is a stale entry, until the next
+        # rebuild or save signal brings it back
+        if not eligible_partners(area).filter(pk=partner_id).exists():
+            partner_index.remove_partner(partner_id)
+
+    for skip_locked in (True, False):
+        partner = _take_slot(_nearest_first(eligible_partners(area), position), skip_locked=skip_locked)
+        if partner:
+            return partner
+    return None
+
+
+def _nearest_first(partners, position):
+    """Order ``partners`` closest to ``position`` first, then least loaded, like the index."""
+    point = valid_position(position)
+    if point is None:
+        return partners.order_by('current_load', 'id')
+    lat, lon = point
+    # Equirectangular distance ranks partners within a city as the haversine does
+    dlat = F('position__0') - lat
+    dlon = (F('position__1') - lon) * math.cos(math.radians(lat))
+    return partners.alias(distance=dlat * dlat + dlon * dlon).order_by(
+        F('distance').asc(nulls_last=True), 'current_load', 'id'
+    )
+
+
+def _take_slot(candidates, skip_locked):
+    for partner in candidates.select_for_update(skip_locked=skip_locked)[:1]:
+        updated = DeliveryPartner.objects.filter(
+            pk=partner.pk, current_load__lt=MAX_PARTNER_LOAD
+        ).update(current_load=F('current_load') + 1, last_updated=timezone.now())
+        if updated:
+            partner.current_load += 1
+            transaction.on_commit(lambda: partner_index.update_partner(partner))
+            return partner
+    return None
+
+
+def _reserve_slots(counts):
+    """
+    Lock the partners taking ``counts[partner_id]`` more orders and raise
+    ``PartnerFull`` unless each has room for them. Like ``_take_slot``,
+    the check runs on locked rows, so the increment that follows cannot
+    overbook a partner.
+    """
+    loads = dict(
+        DeliveryPartner.objects.select_for_update()
+        .filter(pk__in=counts)
+        .order_by('pk')
+        .values_list('pk', 'current_load')
+    )
+    full = [pk for pk, count in counts.items() if pk in loads and loads[pk] + count > MAX_PARTNER_LOAD]
+    if full:
+        raise PartnerFull(full)
+
+
+def update_partner_counters(before, after):
+    """
+    Move partner counters for an order going from ``before`` to ``after``,
+    both ``(partner_id, status)`` pairs. See ``apply_transitions``.
+    """
+    return apply_transitions([(before, after)])
+
+
+def apply_transitions(transitions):
+    """
+    Move partner counters for orders changing partner or status, given as
+    ``(before, after)`` pairs of ``(partner_id, status)``.
+
+    An order holds a slot on its partner while assigned or picked, and
+    counts towards ``completed_orders`` once delivered. Every touched
+    partner is adjusted by one grouped UPDATE with ``F()`` expressions that
+    never drop below zero. Partners taking slots are checked for room
+    first; ``PartnerFull`` is raised when one has none, and the caller's
+    transaction should be rolled back. Must run in the transaction that
+    saves the orders. Returns the touched partners with their new counters.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for before, after in transitions:
+        for (partner_id, order_status), sign in ((before, -1), (after, 1)):
+            if partner_id:
+                deltas[partner_id][0] += sign * (order_status in LOAD_HOLDING_STATUSES)
+                deltas[partner_id][1] += sign * (order_status == 'delivered')
+    deltas = {pk: delta for pk, delta in deltas.items() if delta[0] or delta[1]}
+    if not deltas:
+        return []
+    gaining = {pk: delta[0] for pk, delta in deltas.items() if delta[0] > 0}
+    if gaining:
+        _reserve_slots(gaining)
+
+    pks = list(deltas)
+    now = timezone.now()
+    for start in range(0, len(pks), BULK_BATCH_SIZE):
+        chunk = pks[start:start + BULK_BATCH_SIZE]
+        load_delta, completed_delta = (
+            Case(
+                *[When(pk=pk, then=Value(deltas[pk][i])) for pk in chunk],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for i in (0, 1)
+        )
+        DeliveryPartner.objects.filter(pk__in=chunk).update(
+            current_load=Greatest(F('current_load') + load_delta, 0),
+            completed_orders=Greatest(F('completed_orders') + completed_delta, 0),
+            last_updated=now,
+        )
+
+    partners = list(
+        DeliveryPartner.objects.filter(pk__in=pks)
+        .only('id', 'status', 'areas', 'current_load', 'completed_orders', 'position')
+    )
+    for partner in partners:
+        transaction.on_commit(lambda partner=partner: partner_index.update_partner(partner))
+    return partners
+
+
+def set_order_statuses(order_ids, new_status):
+    """
+    Move the orders in ``order_ids`` to ``new_status`` with one UPDATE and
+    adjust their partners' counters with one more. Orders already in that
+    status are left alone. Returns ``(updated_count, touched_partners)``.
+    """
+    with transaction.atomic():
+        # Lock the rows so each transition is counted once
+        rows = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids)
+            .exclude(status=new_status)
+            .values_list('id', 'assigned_to_id', 'status')
+        )
+        if not rows:
+            return 0, []
+
+        changes = {'status': new_status, 'last_updated': timezone.now()}
+        if new_status == 'pending':
+            # Back in the queue: release the partner so the order can be matched again
+            changes['assigned_to'] = None
+        Order.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(**changes)
+        publish_order_statuses(
+            (pk, new_status, None if new_status == 'pending' else partner_id) for pk, partner_id, _ in rows
+        )
+
+        partners = apply_transitions([
+            ((partner_id, old_status), (None if new_status == 'pending' else partner_id, new_status))
+            for _, partner_id, old_status in rows
+        ])
+    return len(rows), partners
+
+
+def increment_loads(counts):
+    """Add ``counts[partner_id]`` to each partner's load with one UPDATE per batch."""
+    pks = list(counts)
+    now = timezone.now()
+    for start in range(0, len(pks), BULK_BATCH_SIZE):
+        chunk = pks[start:start + BULK_BATCH_SIZE]
+        delta = Case(
+            *[When(pk=pk, then=Value(counts[pk])) for pk in chunk],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        DeliveryPartner.objects.filter(pk__in=chunk).update(
+            current_load=F('current_load') + delta, last_updated=now
+        )
+
+
+def run_batch_assignment(strategy='greedy', order_ids=None, areas=None, skip_locked_partners=True,
+                         record_failures=True):
+    """
+    Assign every pending order in one pass, or only the pending orders in
+    ``order_ids`` and/or ``areas`` when they are given.
+
+    Pending orders and eligible partners are loaded once, matched in memory
+    with one of the ``matching.STRATEGIES`` and written back with a handful
+    of bulk statements. Both sets are locked
+    with SKIP LOCKED for the length of the run, so concurrent runs and
+    single-order assignments work on disjoint rows instead of overbooking
+    the same partner.
+
+    With ``order_ids`` or ``areas`` only the partners covering the loaded
+    orders' areas are locked. Pass ``skip_locked_partners=False`` to wait for
+    partners held by a concurrent run instead of skipping them; partners are
+    locked in id order, so runs waiting on each other cannot deadlock.
+    ``record_failures=False`` leaves no failed ``Assignment`` rows for the
+    orders that stay pending.
+    """
+    result = BatchResult()
+
+    with transaction.atomic():
+        with phase_timer('orders', strategy, result):
+            orders = Order.objects.select_for_update(skip_locked=True).filter(status='pending')
+            if order_ids is not None:
+                orders = orders.filter(pk__in=order_ids)
+            if areas is not None:
+                orders = orders.filter(delivery_area__in=areas)
+            orders = list(orders.only('id', 'delivery_area', 'created_at', 'position').order_by('id'))
+        result.total_pending = len(orders)
+        if not orders:
+            return result
+
+        partners = DeliveryPartner.objects.select_for_update(skip_locked=skip_locked_partners).filter(
+            status='active', current_load__lt=MAX_PARTNER_LOAD
+        )
+        if order_ids is not None or areas is not None:
+            order_areas = {order.delivery_area for order in orders}
+            partners = partners.filter(reduce(operator.or_, (Q(areas__contains=[area]) for area in order_areas)))
+
+        try:
+            with phase_timer('candidates', strategy, result), transaction.atomic():
+                partners = list(partners.only('id', 'areas', 'current_load', 'rating', 'position').order_by('id'))
+        except DatabaseError as e:
+            reason = f'Error during partner lookup: {str(e)}'
+            publish_assignments(Assignment.objects.bulk_create(
+                [Assignment(order=order, partner=None, status='failed', reason=reason) for order in orders],
+                batch_size=BULK_BATCH_SIZE,
+            ))
+            result.add_failure(reason, len(orders))
+            assignment_orders.inc(strategy, 'failed', amount=len(orders))
+            return result
+
+        with phase_timer('matching', strategy, result):
+            matches = STRATEGIES[strategy](orders, partners)
+        with phase_timer('writes', strategy, result):
+            _write_matches(matches, result, record_failures)
+        assignment_orders.inc(strategy, 'assigned', amount=result.assigned_count)
+        assignment_orders.inc(strategy, 'failed', amount=result.total_pending - result.assigned_count)
+    return result
+
+
+def _write_matches(matches, result, record_failures=True):
+    now = timezone.now()
+    assigned_orders = []
+    load_counts = defaultdict(int)
+    assignments = []
+
+    for order, partner in matches:
+        if partner is None:
+            if record_failures:
+                assignments.append(
+                    Assignment(order=order, partner=None, status='failed', reason=NO_PARTNER_REASON)
+                )
+            continue
+        order.status = 'assigned'
+        order.assigned_to = partner
+        # bulk_update() bypasses auto_now, so stamp the row explicitly.
+        order.last_updated = now
+        assigned_orders.append(order)
+        load_counts[partner.pk] += 1
+        assignments.append(Assignment(order=order, partner=partner, status='success'))
+
+    try:
+        with transaction.atomic():
+            Order.objects.bulk_update(
+                assigned_orders, ['status', 'assigned_to', 'last_updated'], batch_size=BULK_BATCH_SIZE
+            )
+            increment_loads(load_counts)
+            Assignment.objects.bulk_create(assignments, batch_size=BULK_BATCH_SIZE)
+            publish_order_statuses((order.pk, order.status, order.assigned_to_id) for order in assigned_orders)
+            publish_assignments(assignments)
+            # The load updates bypass the save signals
+            transaction.on_commit(partner_index.invalidate)
+    except DatabaseError as e:
+        # Nothing was written; record every order of the run as failed.
+        reason = f'Error during assignment update: {str(e)}'
+        failed = []
+        for order, partner in matches:
+            result.add_failure(reason if partner else NO_PARTNER_REASON)
+            if partner is None and not record_failures:
+                continue
+            failed.append(Assignment(
+                order=order,
+                partner=partner,
+                status='failed',
+                reason=reason if partner else NO_PARTNER_REASON,
+            ))
+        publish_assignments(Assignment.objects.bulk_create(failed, batch_size=BULK_BATCH_SIZE))
+        return
+
+    for order, partner in matches:
+        if partner is None:
+            result.add_failure(NO_PARTNER_REASON)
+        else:
+            result.assigned_count += 1
+            result.assignment_time_total += (now - order.created_at).total_seconds()
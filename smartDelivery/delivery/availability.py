@@ -0,0 +1,126 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .geo import GridIndex, valid_position
+from .models import MAX_PARTNER_LOAD, DeliveryPartner
+
+
+class PartnerAvailabilityIndex:
+    """
+    In-process view of the partners that can still take an order.
+
+    Partners are grouped by area and bucketed by current load, so the least
+    loaded candidate for an area is found without touching the database.
+    Partners with a known position are also kept in a per-area grid for
+    nearest-partner lookups.
+
+    The index is only a hint: callers confirm the chosen partner with a
+    locked, conditional update. It is patched from the ``DeliveryPartner``
+    signals and after every confirmed claim, and rebuilt once it is older
+    than ``PARTNER_INDEX_TTL`` seconds to pick up writes made by other
+    processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+        # area -> one insertion-ordered dict of partner ids per load level
+        self._buckets = {}
+        # area -> GridIndex of the partners with a known position
+        self._grids = {}
+        # partner id -> (areas, load, position) of every indexed partner
+        self._entries = {}
+
+    def _is_stale(self):
+        if self._built_at is None:
+            return True
+        ttl = getattr(settings, 'PARTNER_INDEX_TTL', 60)
+        return time.monotonic() - self._built_at > ttl
+
+    def rebuild(self):
+        rows = DeliveryPartner.objects.filter(
+            status='active', current_load__lt=MAX_PARTNER_LOAD
+        ).values_list('id', 'areas', 'current_load', 'position').order_by('id')
+        rows = list(rows)
+        with self._lock:
+            self._buckets = {}
+            self._grids = {}
+            self._entries = {}
+            for partner_id, areas, load, position in rows:
+                self._add(partner_id, areas, load, position)
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _add(self, partner_id, areas, load, position=None):
+        if not isinstance(areas, list) or not 0 <= load < MAX_PARTNER_LOAD:
+            return
+        areas = tuple(area for area in areas if isinstance(area, str))
+        position = valid_position(position)
+        self._entries[partner_id] = (areas, load, position)
+        for area in areas:
+            buckets = self._buckets.get(area)
+            if buckets is None:
+                buckets = self._buckets[area] = [{} for _ in range(MAX_PARTNER_LOAD)]
+            buckets[load][partner_id] = None
+            if position:
+                self._grids.setdefault(area, GridIndex()).insert(partner_id, *position)
+
+    def _discard(self, partner_id):
+        entry = self._entries.pop(partner_id, None)
+        if entry is None:
+            return
+        areas, load, position = entry
+        for area in areas:
+            self._buckets[area][load].pop(partner_id, None)
+            if position:
+                self._grids[area].remove(partner_id)
+
+    def update_partner(self, partner):
+        """Re-index ``partner`` from its current field values."""
+        with self._lock:
+            self._discard(partner.pk)
+            if partner.status == 'active':
+                self._add(partner.pk, partner.areas, partner.current_load, partner.position)
+
+    def move_partner(self, partner_id, position):
+        """Update the position of an indexed partner without re-reading it."""
+        with self._lock:
+            entry = self._entries.get(partner_id)
+            if entry is None:
+                return
+            areas, load, _ = entry
+            self._discard(partner_id)
+            self._add(partner_id, list(areas), load, position)
+
+    def remove_partner(self, partner_id):
+        with self._lock:
+            self._discard(partner_id)
+
+    def candidates(self, area, position=None, limit=5):
+        """
+        Return up to ``limit`` partner ids for ``area``. With a ``position``
+        the closest partners come first; the rest are least loaded first.
+        """
+        if self._is_stale():
+            self.rebuild()
+        found = []
+        with self._lock:
+            point = valid_position(position)
+            grid = self._grids.get(area)
+            if point and grid:
+                found = [partner_id for partner_id, _ in grid.nearest(*point, k=limit)]
+            for bucket in self._buckets.get(area, ()):
+                for partner_id in bucket:
+                    if len(found) == limit:
+                        return found
+                    if partner_id not in found:
+                        found.append(partner_id)
+        return found
+
+
+partner_index = PartnerAvailabilityIndex()
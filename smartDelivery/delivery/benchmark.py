@@ -0,0 +1,437 @@
+import datetime
+import http.client
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from .availability import partner_index
+from .geo import GridIndex
+from .jobs import claim_job, work_on
+from .matching import STRATEGIES
+from .models import MAX_PARTNER_LOAD, AssignmentJob, DeliveryPartner, Order
+from .telemetry import QueryTimer
+
+# Seconds to wait for a queued run to finish when benchmarking over HTTP
+RUN_TIMEOUT = 600
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # A path, or a function returning one
+    path: object
+    # URL name the server's /metrics reports the route under
+    route: str
+    # Changes data, so in-process runs are rolled back afterwards
+    mutates: bool = False
+
+    def url(self):
+        return self.path() if callable(self.path) else self.path
+
+
+def trends_path():
+    today = timezone.localdate()
+    start = today - datetime.timedelta(days=13)
+    return f'/api/orders/trends/?start_date={start}&end_date={today}&group_by=area'
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario('orders-list', 'GET', '/api/orders/?page_size=50', 'order-list'),
+        Scenario('orders-list-pending', 'GET', '/api/orders/?status=pending&page_size=50', 'order-list'),
+        Scenario('partners-list', 'GET', '/api/partners/?page_size=50', 'deliverypartner-list'),
+        Scenario('assignments-list', 'GET', '/api/assignments/?page_size=50', 'assignment-list'),
+        Scenario('orders-trends', 'GET', trends_path, 'order-trends'),
+        Scenario('assignment-metrics', 'GET', '/api/assignments-metrics/', 'assignment-metrics'),
+        Scenario('orders-assign', 'POST', '/api/orders/assign/', 'order-assign-order', mutates=True),
+        Scenario('assignment-run', 'POST', '/api/assignments-run/?strategy=greedy', 'assignment-run',
+                 mutates=True),
+    )
+}
+
+
+@dataclass
+class Sample:
+    seconds: float
+    status: int
+    queries: int = None
+    phase_seconds: dict = field(default_factory=dict)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(scenario, samples, wall_seconds, query_counts=None):
+    """Throughput, latency percentiles and query counts of one scenario as a JSON-ready dict."""
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    if query_counts is None:
+        query_counts = [sample.queries for sample in samples if sample.queries is not None]
+    report = {
+        'requests': len(samples),
+        'statuses': statuses,
+        'mutates': scenario.mutates,
+        'seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'p50_ms': _round(percentile(latencies, 0.5)),
+        'p99_ms': _round(percentile(latencies, 0.99)),
+        'max_ms': _round(latencies[-1] if latencies else None),
+        'queries_per_request': round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+        'max_queries': max(query_counts) if query_counts else None,
+    }
+    phases = [sample.phase_seconds for sample in samples if sample.phase_seconds]
+    if phases:
+        names = sorted({name for phase in phases for name in phase})
+        report['phase_ms'] = {
+            name: round(sum(phase.get(name, 0) for phase in phases) / len(phases) * 1000, 2) for name in names
+        }
+    return report
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def compare(report, baseline):
+    """Percentage change of each scenario's headline numbers against a baseline report."""
+    changes = {}
+    for name, current in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: round((current[key] - before[key]) / before[key] * 100, 1)
+            for key in ('throughput_rps', 'p50_ms', 'p99_ms', 'queries_per_request')
+            if current.get(key) is not None and before.get(key)
+        }
+    return changes
+
+
+class PendingOrders:
+    """Hands out pending order ids, oldest first, to the orders-assign scenario."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = iter(Order.objects.filter(status='pending').order_by('id').values_list('id', flat=True))
+
+    def next(self):
+        with self._lock:
+            return next(self._ids, None)
+
+
+class ClientRunner:
+    """
+    Drives the views in-process with Django's test client, one request at a
+    time. Queries are counted per request. Scenarios that change data run
+    in a transaction that is rolled back, so a dataset can be reused.
+    """
+
+    mode = 'client'
+
+    def __init__(self):
+        self.client = Client()
+
+    def run(self, scenario, requests, warmup):
+        # The test client sends Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            if not scenario.mutates:
+                samples, elapsed = self._run(scenario, requests, warmup)
+            else:
+                try:
+                    with transaction.atomic():
+                        samples, elapsed = self._run(scenario, requests, warmup)
+                        transaction.set_rollback(True)
+                finally:
+                    # Claims made during the run were rolled back
+                    partner_index.invalidate()
+        return samples, elapsed, None
+
+    def _run(self, scenario, requests, warmup):
+        pending = PendingOrders() if scenario.name == 'orders-assign' else None
+        samples = []
+        started = None
+        for index in range(warmup + requests):
+            if index == warmup:
+                started = time.perf_counter()
+            sample = self._request(scenario, pending)
+            if sample is None:
+                break
+            if index >= warmup:
+                samples.append(sample)
+        return samples, (time.perf_counter() - started) if started else 0
+
+    def _request(self, scenario, pending):
+        timer = QueryTimer()
+        body = None
+        if pending is not None:
+            order_id = pending.next()
+            if order_id is None:
+                return None
+            body = {'order_id': order_id}
+        path = scenario.url()
+        phase_seconds = {}
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            if scenario.method == 'GET':
+                response = self.client.get(path)
+            elif scenario.name == 'assignment-run':
+                # Every run starts from the same pending orders
+                with transaction.atomic():
+                    response = self.client.post(path)
+                    if response.status_code == 202:
+                        # The endpoint only queues the run; carry it out here as a worker would
+                        job = work_on(claim_job(job_id=response.json()['id']))
+                        phase_seconds = job.phase_seconds
+                    transaction.set_rollback(True)
+                # Reported like HttpRunner: the outcome of the run, not of the enqueue
+                if response.status_code == 202:
+                    return Sample(time.perf_counter() - start, 200 if job.status == 'completed' else 500,
+                                  timer.count, phase_seconds)
+            else:
+                response = self.client.post(path, body, content_type='application/json')
+        return Sample(time.perf_counter() - start, response.status_code, timer.count, phase_seconds)
+
+
+class HttpRunner:
+    """
+    Drives a running server over HTTP with ``concurrency`` keep-alive
+    connections. Query counts come from the server's ``/metrics`` before
+    and after each scenario, so they are exact with a single server process.
+    ``assignment-run`` needs a ``run_assignment_worker`` serving the same
+    database. Scenarios that change data really change it.
+    """
+
+    mode = 'http'
+
+    def __init__(self, base_url, concurrency=1):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.concurrency = concurrency
+
+    def _connection(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=RUN_TIMEOUT)
+
+    def _send(self, conn, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+    def query_totals(self, route):
+        """``(sum, count)`` of the server's per-request query histogram for ``route``."""
+        conn = self._connection()
+        try:
+            status, body = self._send(conn, 'GET', '/metrics')
+        except OSError:
+            return None
+        finally:
+            conn.close()
+        if status != 200:
+            return None
+        totals = [0.0, 0]
+        pattern = re.compile(r'^http_request_db_queries_(sum|count)\{route="%s",[^}]*\} (\S+)$' % re.escape(route))
+        for line in body.decode().splitlines():
+            match = pattern.match(line)
+            if match:
+                totals[0 if match.group(1) == 'sum' else 1] += float(match.group(2))
+        return totals
+
+    def run(self, scenario, requests, warmup):
+        pending = PendingOrders() if scenario.name == 'orders-assign' else None
+        conn = self._connection()
+        for _ in range(warmup):
+            if self._request(conn, scenario, pending) is None:
+                break
+        conn.close()
+
+        before = self.query_totals(scenario.route)
+        remaining = [requests]
+        lock = threading.Lock()
+        samples = []
+
+        def worker():
+            conn = self._connection()
+            mine = []
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                sample = self._request(conn, scenario, pending)
+                if sample is None:
+                    break
+                mine.append(sample)
+            conn.close()
+            with lock:
+                samples.extend(mine)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        after = self.query_totals(scenario.route)
+        query_counts = None
+        if before is not None and after is not None and after[1] > before[1]:
+            # Only the mean is known from the histogram's sum and count
+            query_counts = [(after[0] - before[0]) / (after[1] - before[1])]
+        return samples, elapsed, query_counts
+
+    def _request(self, conn, scenario, pending):
+        body = None
+        if pending is not None:
+            order_id = pending.next()
+            if order_id is None:
+                return None
+            body = {'order_id': order_id}
+        path = scenario.url()
+        start = time.perf_counter()
+        try:
+            status, payload = self._send(conn, scenario.method, path, body)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            return Sample(time.perf_counter() - start, 0)
+        phase_seconds = {}
+        if scenario.name == 'assignment-run' and status == 202:
+            status, phase_seconds = self._wait_for_run(conn, json.loads(payload)['id'])
+        return Sample(time.perf_counter() - start, status, None, phase_seconds)
+
+    def _wait_for_run(self, conn, job_id):
+        deadline = time.monotonic() + RUN_TIMEOUT
+        while time.monotonic() < deadline:
+            status, payload = self._send(conn, 'GET', f'/api/assignments-run/{job_id}/')
+            job = json.loads(payload) if status == 200 else {}
+            if job.get('status') == 'completed':
+                return 200, job.get('phase_seconds') or {}
+            if job.get('status') == 'failed' or status != 200:
+                return 500, {}
+            time.sleep(0.05)
+        return 504, {}
+
+
+def run_benchmark(runner, scenario_names, requests, warmup, run_requests):
+    """Run each named scenario and return the JSON-ready report."""
+    # Expected 4xx answers (no partner left, ...) would otherwise log a line each
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        return _run_benchmark(runner, scenario_names, requests, warmup, run_requests)
+    finally:
+        request_logger.setLevel(level)
+
+
+def _run_benchmark(runner, scenario_names, requests, warmup, run_requests):
+    report = {
+        'meta': {
+            'mode': runner.mode,
+            'target': getattr(runner, 'base_url', None),
+            'concurrency': getattr(runner, 'concurrency', 1),
+            'requests': requests,
+            'warmup': warmup,
+            'started_at': timezone.now().isoformat(),
+            'dataset': {
+                'orders': Order.objects.count(),
+                'pending_orders': Order.objects.filter(status='pending').count(),
+                'partners': DeliveryPartner.objects.count(),
+                'queued_jobs': AssignmentJob.objects.filter(status__in=['queued', 'running']).count(),
+            },
+        },
+        'scenarios': {},
+    }
+    for name in scenario_names:
+        scenario = SCENARIOS[name]
+        count = run_requests if name == 'assignment-run' else requests
+        samples, elapsed, query_counts = runner.run(scenario, count, 0 if name == 'assignment-run' else warmup)
+        report['scenarios'][name] = summarize(scenario, samples, elapsed, query_counts)
+    return report
+
+
+# Synthetic city for the matching benchmarks: points scattered around its centre
+CITY_CENTRE = (12.9716, 77.5946)
+CITY_SPREAD_DEG = 0.1
+
+
+def random_point(rng):
+    return rng.gauss(CITY_CENTRE[0], CITY_SPREAD_DEG), rng.gauss(CITY_CENTRE[1], CITY_SPREAD_DEG)
+
+
+def benchmark_grid(partners, queries, k, seed=1):
+    """k-nearest queries per second on a ``GridIndex`` of ``partners`` random positions, in memory."""
+    rng = random.Random(seed)
+    index = GridIndex()
+    started = time.perf_counter()
+    for key in range(partners):
+        index.insert(key, *random_point(rng))
+    build_seconds = time.perf_counter() - started
+
+    points = [random_point(rng) for _ in range(queries)]
+    started = time.perf_counter()
+    for lat, lon in points:
+        index.nearest(lat, lon, k=k)
+    elapsed = time.perf_counter() - started
+    return {
+        'partners': partners,
+        'queries': queries,
+        'k': k,
+        'build_ms': round(build_seconds * 1000, 2),
+        'seconds': round(elapsed, 3),
+        'queries_per_second': round(queries / elapsed, 1),
+    }
+
+
+def benchmark_strategies(strategies, orders, partners, areas, seed=1):
+    """
+    Seconds each matching strategy takes for ``orders`` pending orders and
+    ``partners`` partners over ``areas`` areas, on unsaved model instances.
+    """
+    area_names = [f'Area {index}' for index in range(1, areas + 1)]
+    report = {'orders': orders, 'partners': partners, 'areas': areas, 'strategies': {}}
+    for name in strategies:
+        # The same data for every strategy; matching changes partner loads in place
+        rng = random.Random(seed)
+        partner_rows = [
+            DeliveryPartner(pk=pk, areas=rng.sample(area_names, min(areas, rng.randint(1, 3))),
+                            current_load=rng.randint(0, MAX_PARTNER_LOAD - 1), rating=rng.uniform(3, 5),
+                            position=list(random_point(rng)))
+            for pk in range(1, partners + 1)
+        ]
+        order_rows = [
+            Order(pk=pk, delivery_area=rng.choice(area_names), position=list(random_point(rng)))
+            for pk in range(1, orders + 1)
+        ]
+        started = time.perf_counter()
+        matches = STRATEGIES[name](order_rows, partner_rows)
+        elapsed = time.perf_counter() - started
+        report['strategies'][name] = {
+            'seconds': round(elapsed, 3),
+            'assigned': sum(partner is not None for _, partner in matches),
+        }
+    return report
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .assignment import run_batch_assignment
+
+logger = logging.getLogger(__name__)
+
+
+class AreaDispatcher:
+    """
+    Matches pending orders shortly after something changes in their area.
+
+    ``schedule()`` records the affected areas and wakes a background thread.
+    The thread waits ``AUTO_ASSIGN_DEBOUNCE_MS`` so a burst of events lands
+    in one micro-batch, then runs the batch engine for just those areas.
+    Does nothing unless ``AUTO_ASSIGN`` is enabled. Partners held by another
+    run are skipped rather than waited for; whatever stays pending is
+    picked up by the next event or a full run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._areas = set()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'AUTO_ASSIGN', False)
+
+    def schedule(self, areas):
+        if not self.enabled:
+            return
+        areas = {area for area in areas if isinstance(area, str)}
+        if not areas:
+            return
+        with self._lock:
+            self._areas |= areas
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='area-dispatcher', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(getattr(settings, 'AUTO_ASSIGN_DEBOUNCE_MS', 200) / 1000)
+            with self._lock:
+                self._wakeup.clear()
+                areas, self._areas = self._areas, set()
+            if areas:
+                self.dispatch(areas)
+
+    def dispatch(self, areas):
+        """Match the pending orders of ``areas`` now, in the calling thread."""
+        close_old_connections()
+        try:
+            run_batch_assignment(
+                getattr(settings, 'AUTO_ASSIGN_STRATEGY', 'greedy'),
+                areas=sorted(areas),
+                record_failures=False,
+            )
+        except Exception:
+            logger.exception('Automatic assignment failed for areas %s', sorted(areas))
+        finally:
+            close_old_connections()
+
+
+dispatcher = AreaDispatcher()
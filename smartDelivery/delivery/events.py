@@ -0,0 +1,252 @@
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import queue
+import selectors
+import threading
+import time
+import uuid
+
+from django.db import connection, connections
+
+from .telemetry import Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel every process publishes to and listens on
+CHANNEL = 'delivery_events'
+
+# NOTIFY payloads must stay under 8000 bytes
+NOTIFY_MAX_BYTES = 7500
+
+# A change touching more rows than this is sent as a count only; clients
+# catch up with an ?updated_since= poll instead
+EVENT_MAX_ROWS = 1000
+
+# Recent events kept per process so a reconnecting client can resume
+BACKLOG_SIZE = 1000
+
+# Events a subscriber may fall behind by before its stream is closed
+SUBSCRIBER_QUEUE_SIZE = 500
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15
+
+
+def publish(event, rows):
+    """
+    Send ``rows`` (a list of JSON-ready dicts) to every ``/api/stream/``
+    subscriber as ``event``.
+
+    The notification joins the current transaction: it goes out when the
+    transaction commits and is dropped if it rolls back, so subscribers
+    only hear about committed changes. Rows are split across notifications
+    to fit Postgres' payload limit.
+    """
+    if not rows:
+        return
+    if len(rows) > EVENT_MAX_ROWS:
+        payloads = [{'event': event, 'rows': None, 'count': len(rows)}]
+    else:
+        payloads = []
+        chunk, size = [], 0
+        for row in rows:
+            row_size = len(json.dumps(row, separators=(',', ':'))) + 1
+            if chunk and size + row_size > NOTIFY_MAX_BYTES:
+                payloads.append({'event': event, 'rows': chunk})
+                chunk, size = [], 0
+            chunk.append(row)
+            size += row_size
+        payloads.append({'event': event, 'rows': chunk})
+
+    with connection.cursor() as cursor:
+        for payload in payloads:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(payload, separators=(',', ':'))])
+
+
+def publish_order_statuses(rows):
+    """Publish ``order.status`` for ``(order_id, status, partner_id)`` rows."""
+    publish('order.status', [
+        {'id': order_id, 'status': order_status, 'assigned_to': partner_id}
+        for order_id, order_status, partner_id in rows
+    ])
+
+
+def publish_assignments(assignments):
+    """Publish ``assignment.created`` for newly saved ``Assignment`` instances."""
+    publish('assignment.created', [
+        {
+            'id': assignment.pk,
+            'order': assignment.order_id,
+            'partner': assignment.partner_id,
+            'status': assignment.status,
+            'reason': assignment.reason,
+        }
+        for assignment in assignments
+    ])
+
+
+def publish_metrics(run):
+    """Publish ``metrics.updated`` for a freshly recorded ``AssignmentRun``."""
+    publish('metrics.updated', [{
+        'id': run.pk,
+        'strategy': run.strategy,
+        'total_assigned': run.total_assigned,
+        'success_rate': run.success_rate,
+        'average_time': run.average_time,
+    }])
+
+
+def format_event(event_id, event, data):
+    """One server-sent event frame."""
+    return f'id: {event_id}\nevent: {event}\ndata: {data}\n\n'.encode()
+
+
+# Sent instead of a replay when the requested events are no longer held
+RESYNC_FRAME = b'event: resync\ndata: {}\n\n'
+
+HEARTBEAT_FRAME = b': keep-alive\n\n'
+
+
+class Subscription:
+    """
+    One stream's queue of encoded frames. Frames are pushed from the
+    listener thread; async subscribers are woken on their event loop.
+    ``overflowed`` is set, and no more frames are queued, once the client
+    falls ``SUBSCRIBER_QUEUE_SIZE`` frames behind.
+    """
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.overflowed = False
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE) if loop else queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def push(self, frame):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._offer, frame)
+        else:
+            self._offer(frame)
+
+    def _offer(self, frame):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except (asyncio.QueueFull, queue.Full):
+            self.overflowed = True
+            # Swap the oldest frame for a None so the reader closes the stream
+            try:
+                self.queue.get_nowait()
+            except (asyncio.QueueEmpty, queue.Empty):
+                pass
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """
+    Per-process fan-out of the events published with ``publish()``.
+
+    One daemon thread LISTENs on ``CHANNEL`` with its own connection,
+    starting with the first subscriber, and hands each notification to
+    every open stream as a pre-encoded frame. Every process hears every
+    commit, whichever process made it, so web workers, the assignment
+    worker and the auto-assign thread all reach all subscribers.
+
+    Event ids are ``<process token>-<sequence>``. The last
+    ``BACKLOG_SIZE`` frames are kept so a client reconnecting with
+    ``Last-Event-ID`` gets what it missed, or a ``resync`` event when
+    that is no longer possible.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._backlog = collections.deque(maxlen=BACKLOG_SIZE)
+        self._token = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+        self._thread = None
+
+    def subscribe(self, loop=None, last_event_id=None):
+        """Register a stream; returns the ``Subscription`` and the frames to replay first."""
+        subscription = Subscription(loop)
+        with self._lock:
+            self._subscribers.add(subscription)
+            replay = self._replay(last_event_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+                self._thread.start()
+        return subscription, replay
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _replay(self, last_event_id):
+        if not last_event_id:
+            return []
+        token, _, sequence = last_event_id.partition('-')
+        if token != self._token or not sequence.isdigit():
+            return [RESYNC_FRAME]
+        sequence = int(sequence)
+        if self._backlog and self._backlog[0][0] > sequence + 1:
+            return [RESYNC_FRAME]
+        return [frame for seq, frame in self._backlog if seq > sequence]
+
+    def deliver(self, payload):
+        """Fan one notification payload out to every subscriber."""
+        try:
+            message = json.loads(payload)
+            event = message.pop('event')
+        except (ValueError, KeyError, AttributeError):
+            logger.warning('Dropping malformed event payload %r', payload[:200])
+            return
+        data = json.dumps(message, separators=(',', ':'))
+        with self._lock:
+            sequence = next(self._sequence)
+            frame = format_event(f'{self._token}-{sequence}', event, data)
+            self._backlog.append((sequence, frame))
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(frame)
+
+    def _listen(self):
+        while True:
+            wrapper = None
+            try:
+                # A connection of its own, outside any request's lifecycle
+                wrapper = connections.create_connection('default')
+                wrapper.ensure_connection()
+                raw = wrapper.connection
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                # Not select.select(): with thousands of open streams the
+                # connection's descriptor is past what select() accepts
+                with selectors.DefaultSelector() as selector:
+                    selector.register(raw, selectors.EVENT_READ)
+                    while True:
+                        if selector.select(HEARTBEAT_SECONDS):
+                            raw.poll()
+                            while raw.notifies:
+                                self.deliver(raw.notifies.pop(0).payload)
+            except Exception:
+                logger.exception('Event listener lost its connection; reconnecting')
+                time.sleep(1)
+            finally:
+                if wrapper is not None:
+                    try:
+                        wrapper.close()
+                    except Exception:
+                        pass
+
+
+broker = EventBroker()
+
+registry.register(Gauge('event_stream_subscribers', 'Open /api/stream/ connections in this process.',
+                        lambda: broker.subscriber_count))
@@ -0,0 +1,200 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .renderers import dumps
+
+# Serializer fields whose output is the database value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.JSONField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def iso_datetime(tz):
+    """
+    ``DateTimeField().to_representation`` for aware datetimes, with the
+    current timezone looked up once instead of on every value.
+    """
+    def convert(value):
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def is_iso_datetime(field):
+    return (
+        isinstance(field, serializers.DateTimeField)
+        and not hasattr(field, 'timezone')
+        and (getattr(field, 'format', api_settings.DATETIME_FORMAT) or '').lower() == ISO_8601
+    )
+
+
+class RowMapper:
+    """
+    Builds a ModelSerializer's output straight from ``.values()`` rows.
+
+    The serializer's fields are inspected once: fields that echo the
+    database value are copied as-is, and only the rest (datetimes,
+    decimals, ...) are converted. Rows come out key for key identical to
+    ``serializer_class(instance).data``.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._mapping = None
+
+    @property
+    def mapping(self):
+        # Built lazily so the serializer is introspected after the app registry is ready
+        if self._mapping is None:
+            self._mapping = self._build_mapping()
+        return self._mapping
+
+    def _build_mapping(self):
+        model = self.serializer_class.Meta.model
+        mapping = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            try:
+                model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f'{self.serializer_class.__name__}.{name} is not a model field and cannot be read from values().'
+                )
+            mapping.append((name, field.source, field))
+        return mapping
+
+    @property
+    def columns(self):
+        return [source for _, source, _ in self.mapping]
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def converters(self):
+        """``(name, column, convert)`` for each field, ``convert`` being None for pass-through values."""
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = []
+        for name, source, field in self.mapping:
+            if isinstance(field, serializers.ListField) and isinstance(field.child, PASSTHROUGH_FIELDS):
+                convert = None
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                convert = None
+            elif tz is not None and is_iso_datetime(field):
+                convert = iso_datetime(tz)
+            else:
+                convert = field.to_representation
+            converters.append((name, source, convert))
+        return converters
+
+    def row_builder(self):
+        """Return a function turning one ``.values()`` row into the serializer's output."""
+        converters = self.converters()
+
+        def build(values):
+            row = {}
+            for name, source, convert in converters:
+                value = values[source]
+                row[name] = convert(value) if convert is not None and value is not None else value
+            return row
+        return build
+
+    def rows(self, values_list):
+        return map(self.row_builder(), values_list)
+
+
+class AssignmentRowMapper(RowMapper):
+    """``AssignmentSerializer`` output, computed fields included, from one joined ``.values()`` query."""
+
+    columns = [
+        'id', 'timestamp', 'status', 'reason', 'partner_id',
+        'order__order_number', 'order__item_names', 'order__total_amount', 'order__delivery_area',
+        'partner__name', 'partner__phone', 'partner__rating',
+    ]
+
+    def __init__(self):
+        super().__init__(None)
+
+    def row_builder(self):
+        timestamp = iso_datetime(timezone.get_current_timezone())
+
+        def build(values):
+            partner_id = values['partner_id']
+            return {
+                'id': values['id'],
+                'timestamp': timestamp(values['timestamp']) if values['timestamp'] else None,
+                'status': values['status'],
+                'reason': values['reason'],
+                'orderId': values['order__order_number'],
+                'partnerId': str(partner_id) if partner_id else None,
+                'orderDetails': {
+                    'items': values['order__item_names'],
+                    'total': float(values['order__total_amount']),
+                    'destination': values['order__delivery_area'],
+                },
+                'partnerDetails': {
+                    'name': values['partner__name'],
+                    'phone': values['partner__phone'],
+                    'rating': values['partner__rating'],
+                } if partner_id else None,
+            }
+        return build
+
+
+class ValuesListMixin:
+    """
+    Serves ``list`` and ``?stream=ndjson`` from ``row_mapper`` instead of
+    building a model instance and running the serializer per row. Detail
+    and write views keep using the serializer.
+
+    ``?stream=ndjson`` skips pagination: rows are read with a server-side
+    cursor and written one JSON object per line, so memory stays flat no
+    matter how many rows are exported.
+    """
+    row_mapper = None
+    stream_chunk_size = 2000
+
+    def wants_stream(self, request):
+        return request.query_params.get('stream') == 'ndjson'
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        if self.wants_stream(self.request):
+            return self.stream_ndjson(queryset)
+        page = self.paginate_queryset(self.row_mapper.values(queryset))
+        return self.get_paginated_response(list(self.row_mapper.rows(page)))
+
+    def stream_ndjson(self, queryset):
+        ordering = getattr(self, 'cursor_ordering', None)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        values = self.row_mapper.values(queryset)
+        build = self.row_mapper.row_builder()
+
+        if isinstance(self.request._request, ASGIRequest):
+            # ASGI buffers sync iterators whole before sending them, so
+            # stream from the async iterator there to keep memory flat
+            async def lines():
+                async for row in values.aiterator(chunk_size=self.stream_chunk_size):
+                    yield dumps(build(row)) + b'\n'
+        else:
+            def lines():
+                for row in values.iterator(chunk_size=self.stream_chunk_size):
+                    yield dumps(build(row)) + b'\n'
+
+        return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
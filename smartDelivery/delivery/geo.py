@@ -0,0 +1,227 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Grid cell edge in degrees (about 2.2 km of latitude).
+DEFAULT_CELL_DEG = 0.02
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def pairwise_haversine_km(lats_a, lons_a, lats_b, lons_b):
+    """Distance matrix in km between two sets of points."""
+    lat1 = np.radians(np.asarray(lats_a, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lons_a, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats_b, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lons_b, dtype=np.float64))[None, :]
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _haversine_term(km):
+    """Inverse of the final haversine step: the ``a`` term for a distance."""
+    return math.sin(min(km / (2 * EARTH_RADIUS_KM), math.pi / 2)) ** 2
+
+
+def valid_position(position):
+    """Return ``(lat, lon)`` for a well-formed ``[lat, lon]`` value, else None."""
+    if not isinstance(position, (list, tuple)) or len(position) != 2:
+        return None
+    lat, lon = position
+    if lat is None or lon is None:
+        return None
+    lat, lon = float(lat), float(lon)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid for k-nearest lookups.
+
+    Points live in square cells of ``cell_deg`` degrees. A query scans rings
+    of cells outwards from the query cell and stops once no unscanned cell
+    can hold anything closer than the k-th best match found so far.
+    Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._points = {}
+        # cell -> (keys, lats, lons) arrays, rebuilt lazily after changes
+        self._arrays = {}
+        # Bounding box of occupied cells; only ever grows until clear()
+        self._bounds = None
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def insert(self, key, lat, lon):
+        self.remove(key)
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        self._points[key] = cell
+        self._arrays.pop(cell, None)
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], cell[0]), max(b[1], cell[0])
+            b[2], b[3] = min(b[2], cell[1]), max(b[3], cell[1])
+
+    def remove(self, key):
+        cell = self._points.pop(key, None)
+        if cell is None:
+            return
+        members = self._cells[cell]
+        members.pop(key, None)
+        self._arrays.pop(cell, None)
+        if not members:
+            del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._points.clear()
+        self._arrays.clear()
+        self._bounds = None
+
+    def _cell_arrays(self, cell):
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            members = self._cells.get(cell)
+            if not members:
+                return None
+            coords = np.radians(np.array(list(members.values()), dtype=np.float64))
+            keys = np.empty(len(members), dtype=object)
+            keys[:] = list(members)
+            arrays = self._arrays[cell] = (keys, coords[:, 0], coords[:, 1], np.cos(coords[:, 0]))
+        return arrays
+
+    def _ring(self, ci, cj, r):
+        if r == 0:
+            yield ci, cj
+            return
+        for dj in range(-r, r + 1):
+            yield ci - r, cj + dj
+            yield ci + r, cj + dj
+        for di in range(-r + 1, r):
+            yield ci + di, cj - r
+            yield ci + di, cj + r
+
+    def nearest(self, lat, lon, k=1, accept=None, max_km=None):
+        """
+        Return up to ``k`` ``(key, distance_km)`` pairs closest to the point,
+        nearest first. ``accept(key)`` filters candidates.
+        """
+        if not self._points:
+            return []
+        ci, cj = self._cell(lat, lon)
+        # Smallest on-ground width of a cell near the query point; every
+        # cell in ring r+1 is at least r of these away.
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + self.cell_deg, 90.0))), 1e-6)
+        cell_km = self.cell_deg * math.pi / 180 * EARTH_RADIUS_KM * cos_lat
+        max_ring = self._max_ring(ci, cj)
+        lat_r, lon_r = math.radians(lat), math.radians(lon)
+        cos_q = math.cos(lat_r)
+
+        # Candidates are ranked by the haversine term
+        # a = sin^2(dlat/2) + cos(lat1) cos(lat2) sin^2(dlon/2), which grows
+        # with distance, so arcsin/sqrt only run on the final k.
+        found_keys, found_a = [], []
+        count = 0
+        kth_a = math.inf
+        cells = [self._ring(ci, cj, 0), self._ring(ci, cj, 1)]
+        scanned = 9
+        r = 1
+        while True:
+            ring = [arr for gen in cells for arr in map(self._cell_arrays, gen) if arr is not None]
+            if ring:
+                keys = np.concatenate([arr[0] for arr in ring])
+                lats = np.concatenate([arr[1] for arr in ring])
+                lons = np.concatenate([arr[2] for arr in ring])
+                coss = np.concatenate([arr[3] for arr in ring])
+                a = np.sin((lats - lat_r) / 2) ** 2 + cos_q * coss * np.sin((lons - lon_r) / 2) ** 2
+                if accept is not None:
+                    mask = np.fromiter((accept(key) for key in keys), dtype=bool, count=len(keys))
+                    keys, a = keys[mask], a[mask]
+                if len(keys):
+                    found_keys.append(keys)
+                    found_a.append(a)
+                    count += len(keys)
+                    if count >= k:
+                        all_a = np.concatenate(found_a)
+                        found_a = [all_a]
+                        kth_a = np.partition(all_a, k - 1)[k - 1]
+
+            bound = r * cell_km
+            if kth_a <= _haversine_term(bound) or r >= max_ring:
+                break
+            if max_km is not None and bound > max_km:
+                break
+            r += 1
+            scanned += 8 * r
+            if scanned > 4 * len(self._points):
+                # Far from the data: one vectorised pass beats more rings
+                return self._brute_force(lat, lon, k, accept, max_km)
+            cells = [self._ring(ci, cj, r)]
+
+        if not count:
+            return []
+        keys = np.concatenate(found_keys)
+        a = np.concatenate(found_a)
+        if len(a) > k:
+            top = np.argpartition(a, k - 1)[:k]
+        else:
+            top = np.arange(len(a))
+        top = top[np.argsort(a[top], kind='stable')]
+        dists = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a[top], 0, 1)))
+        result = [(keys[i], float(d)) for i, d in zip(top, dists)]
+        if max_km is not None:
+            result = [(key, dist) for key, dist in result if dist <= max_km]
+        return result
+
+    def _brute_force(self, lat, lon, k, accept, max_km):
+        keys, lats, lons = [], [], []
+        for members in self._cells.values():
+            for key, (plat, plon) in members.items():
+                if accept is None or accept(key):
+                    keys.append(key)
+                    lats.append(plat)
+                    lons.append(plon)
+        if not keys:
+            return []
+        dists = haversine_km(lat, lon, lats, lons)
+        top = np.argsort(dists, kind='stable')[:k]
+        result = [(keys[i], float(dists[i])) for i in top]
+        if max_km is not None:
+            result = [(key, dist) for key, dist in result if dist <= max_km]
+        return result
+
+    def _max_ring(self, ci, cj):
+        # Ring that reaches the farthest occupied cell.
+        min_i, max_i, min_j, max_j = self._bounds
+        return max(ci - min_i, max_i - ci, cj - min_j, max_j - cj, 0)
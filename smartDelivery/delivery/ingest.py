@@ -0,0 +1,239 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .assignment import BULK_BATCH_SIZE
+from .dispatcher import dispatcher
+from .geo import valid_position
+from .items import item_summary, items_total, normalize_items
+from .models import Order
+from .parsers import MalformedLine
+from .rollups import apply_deltas, order_deltas
+from .signals import ROLLUP_FIELDS
+
+# Fields an upsert overwrites on an existing order. Status and partner are
+# left alone so re-sending an order never un-assigns it.
+UPSERT_FIELDS = [
+    'customer_name', 'customer_phone', 'delivery_area', 'items', 'item_count', 'item_names',
+    'total_amount', 'scheduled_time', 'position', 'last_updated',
+]
+
+# Columns loaded into the staging table by the COPY path.
+COPY_FIELDS = [
+    'order_number', 'customer_name', 'customer_phone', 'delivery_area', 'items',
+    'status', 'total_amount', 'scheduled_time', 'position', 'item_count', 'item_names',
+]
+_ARRAY_FIELDS = ('position', 'item_names')
+
+# Rows per COPY; the bulk_create fallback uses BULK_BATCH_SIZE per INSERT.
+INGEST_CHUNK_SIZE = 5000
+
+_STRING_FIELDS = [
+    (name, Order._meta.get_field(name).max_length)
+    for name in ('order_number', 'customer_name', 'customer_phone', 'delivery_area')
+]
+_STATUSES = dict(Order.STATUS_CHOICES)
+_AMOUNT = Order._meta.get_field('total_amount')
+
+
+def clean_order_row(row):
+    """
+    Check one incoming order and collect its column values.
+
+    A cheap, serializer-free pass over the fields ``Order`` needs. Returns
+    ``(values, None)`` or ``(None, errors)`` with errors keyed by field.
+    """
+    if isinstance(row, MalformedLine):
+        return None, {'non_field_errors': [row.error]}
+    if not isinstance(row, dict):
+        return None, {'non_field_errors': ['Expected an object.']}
+
+    errors = {}
+    values = {'scheduled_time': None, 'position': None}
+    for name, max_length in _STRING_FIELDS:
+        value = row.get(name)
+        if not isinstance(value, str) or not value.strip():
+            errors[name] = ['This field is required.']
+        elif len(value) > max_length:
+            errors[name] = [f'Ensure this field has no more than {max_length} characters.']
+        else:
+            values[name] = value
+
+    items, items_error = normalize_items(row.get('items'))
+    if items_error:
+        errors['items'] = [items_error]
+    else:
+        values['items'] = items
+        values['item_count'], values['item_names'] = item_summary(items)
+
+    amount = row.get('total_amount')
+    if amount is None and items is not None:
+        amount = items_total(items)
+    # Without a total or valid items the items error already covers the row
+    if amount is not None:
+        try:
+            amount = Decimal(str(amount))
+            if not amount.is_finite():
+                raise InvalidOperation
+            values['total_amount'] = round(amount, _AMOUNT.decimal_places)
+            if len(values['total_amount'].as_tuple().digits) > _AMOUNT.max_digits:
+                errors['total_amount'] = [f'Ensure there are no more than {_AMOUNT.max_digits} digits in total.']
+        except (InvalidOperation, ValueError, TypeError):
+            errors['total_amount'] = ['A valid number is required.']
+
+    order_status = row.get('status', 'pending')
+    if not isinstance(order_status, str) or order_status not in _STATUSES:
+        errors['status'] = [f'"{order_status}" is not a valid choice.']
+    else:
+        values['status'] = order_status
+
+    scheduled_time = row.get('scheduled_time')
+    if scheduled_time not in (None, ''):
+        try:
+            parsed = parse_datetime(scheduled_time) if isinstance(scheduled_time, str) else None
+        except ValueError:
+            # Well formed but impossible, such as a 13th month
+            parsed = None
+        if parsed is None:
+            errors['scheduled_time'] = ['Datetime has wrong format.']
+        else:
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            values['scheduled_time'] = parsed
+
+    position = row.get('position')
+    if position is not None:
+        try:
+            point = valid_position(position)
+        except (TypeError, ValueError):
+            point = None
+        if point is None:
+            errors['position'] = ['Expected [latitude, longitude].']
+        else:
+            values['position'] = list(point)
+
+    if errors:
+        return None, errors
+    return values, None
+
+
+def ingest_orders(rows):
+    """
+    Insert or update ``rows`` keyed on ``order_number``.
+
+    Valid rows are written ``INGEST_CHUNK_SIZE`` at a time, one transaction
+    per chunk, with ``INSERT ... ON CONFLICT DO UPDATE``. Invalid rows are
+    reported and skipped. Returns ``(created, updated, errors)`` where each
+    error is ``{'index', 'order_number', 'errors'}``.
+    """
+    errors = []
+    by_number = {}
+    for index, row in enumerate(rows):
+        values, row_errors = clean_order_row(row)
+        if row_errors:
+            number = row.get('order_number') if isinstance(row, dict) else None
+            errors.append({'index': index, 'order_number': number, 'errors': row_errors})
+            continue
+        number = values['order_number']
+        earlier = by_number.get(number)
+        if earlier is not None:
+            errors.append({
+                'index': earlier[0],
+                'order_number': number,
+                'errors': {'order_number': ['Superseded by a later row with the same order_number.']},
+            })
+        by_number[number] = (index, values)
+
+    created = updated = 0
+    valid = [values for _, values in sorted(by_number.values(), key=lambda item: item[0])]
+    for start in range(0, len(valid), INGEST_CHUNK_SIZE):
+        chunk_created, chunk_updated = _upsert_chunk(valid[start:start + INGEST_CHUNK_SIZE])
+        created += chunk_created
+        updated += chunk_updated
+
+    errors.sort(key=lambda error: error['index'])
+    return created, updated, errors
+
+
+def _upsert_chunk(rows):
+    with transaction.atomic():
+        # Lock the rows being replaced so the rollup sees their old values
+        existing = list(
+            Order.objects.select_for_update()
+            .filter(order_number__in=[row['order_number'] for row in rows])
+            .values_list(*ROLLUP_FIELDS)
+        )
+        with connection.cursor() as cursor:
+            if hasattr(cursor, 'copy_expert'):
+                _copy_upsert(cursor, rows)
+            else:
+                Order.objects.bulk_create(
+                    [Order(**row) for row in rows],
+                    batch_size=BULK_BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['order_number'],
+                    update_fields=UPSERT_FIELDS,
+                )
+        # Neither path sends the save signals that keep the rollup current
+        apply_deltas(order_deltas(
+            removed=existing,
+            added=[(row['scheduled_time'], row['delivery_area'], row['total_amount']) for row in rows],
+        ))
+        areas = {row['delivery_area'] for row in rows if row['status'] == 'pending'}
+        transaction.on_commit(lambda: dispatcher.schedule(areas))
+    return len(rows) - len(existing), len(existing)
+
+
+def _copy_value(name, value):
+    # Text form of a column value for COPY ... WITH (FORMAT csv)
+    if value is None:
+        return None
+    if name in _ARRAY_FIELDS:
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for v in value)
+        return '{%s}' % ','.join(f'"{v}"' for v in escaped)
+    if name == 'items':
+        return json.dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _copy_upsert(cursor, rows):
+    """
+    Stream ``rows`` into a temporary table with ``COPY`` and upsert them
+    into the orders table with one ``INSERT ... SELECT``. Avoids building a
+    parameterised statement per batch, which dominates ``bulk_create``.
+    """
+    qn = connection.ops.quote_name
+    fields = [Order._meta.get_field(name) for name in COPY_FIELDS]
+    columns = ', '.join(qn(field.column) for field in fields)
+    cursor.execute(
+        'CREATE TEMPORARY TABLE order_ingest (%s) ON COMMIT DROP'
+        % ', '.join(f'{qn(field.column)} {field.db_type(connection)}' for field in fields)
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(name, row[name]) for name in COPY_FIELDS])
+    buffer.seek(0)
+    cursor.copy_expert(f'COPY order_ingest ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+    updates = ', '.join(
+        f'{qn(column)} = EXCLUDED.{qn(column)}'
+        for column in (Order._meta.get_field(name).column for name in UPSERT_FIELDS)
+    )
+    # Every row of the chunk gets the same stamp; list pages break the tie on id
+    now = timezone.now()
+    cursor.execute(
+        f'INSERT INTO {qn(Order._meta.db_table)} ({columns}, {qn("created_at")}, {qn("last_updated")}) '
+        f'SELECT {columns}, %s, %s FROM order_ingest '
+        f'ON CONFLICT ({qn("order_number")}) DO UPDATE SET {updates}',
+        [now, now],
+    )
+    cursor.execute('DROP TABLE order_ingest')
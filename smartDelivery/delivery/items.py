@@ -0,0 +1,52 @@
+import math
+from decimal import Decimal
+
+ITEM_NAME_MAX_LENGTH = 100
+
+
+def normalize_items(items):
+    """
+    Validate an order's items and reduce each to ``{'name', 'quantity',
+    'price'}``. Returns ``(items, None)`` or ``(None, message)``.
+    """
+    if not isinstance(items, list):
+        return None, 'Expected a list of items.'
+    cleaned = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f'Item {i}: expected an object.'
+        name = item.get('name')
+        if not isinstance(name, str) or not name.strip():
+            return None, f'Item {i}: name is required.'
+        if len(name) > ITEM_NAME_MAX_LENGTH:
+            return None, f'Item {i}: name must be at most {ITEM_NAME_MAX_LENGTH} characters.'
+        quantity = item.get('quantity', 1)
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            return None, f'Item {i}: quantity must be a positive whole number.'
+        price = item.get('price')
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None, f'Item {i}: price must be a number.'
+        if isinstance(item.get('price'), bool) or not math.isfinite(price) or price < 0:
+            return None, f'Item {i}: price must be a number of zero or more.'
+        cleaned.append({'name': name, 'quantity': quantity, 'price': price})
+    return cleaned, None
+
+
+def items_total(items):
+    """Sum of quantity x price over normalized items, to the cent."""
+    total = sum((Decimal(str(item['price'])) * item['quantity'] for item in items), Decimal('0'))
+    return round(total, 2)
+
+
+def item_summary(items):
+    """``(item_count, item_names)`` for an order's items; tolerates legacy rows."""
+    if not isinstance(items, list):
+        return 0, []
+    names = [
+        item['name'][:ITEM_NAME_MAX_LENGTH]
+        for item in items
+        if isinstance(item, dict) and isinstance(item.get('name'), str)
+    ]
+    return len(items), names
@@ -0,0 +1,185 @@
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q
+from django.utils import timezone
+
+from .assignment import BatchResult, run_batch_assignment
+from .metrics import record_run
+from .models import AssignmentJob, AssignmentJobLease, Order
+
+logger = logging.getLogger(__name__)
+
+# Pending orders handed to a worker at a time.
+JOB_CHUNK_SIZE = 1000
+
+
+def enqueue_run(strategy='greedy'):
+    """Queue an assignment run over the orders that are pending right now."""
+    pending = Order.objects.filter(status='pending').aggregate(last=Max('id'), total=Count('id'))
+    return AssignmentJob.objects.create(
+        strategy=strategy,
+        last_order_id=pending['last'] or 0,
+        total_pending=pending['total'],
+    )
+
+
+def lease_expiry():
+    """Leases whose heartbeat is older than this belong to workers that died."""
+    return timezone.now() - datetime.timedelta(seconds=getattr(settings, 'ASSIGNMENT_JOB_LEASE_SECONDS', 120))
+
+
+class LeaseLost(Exception):
+    """The worker's lease was taken over after its heartbeat went stale."""
+
+
+def claim_job(job_id=None):
+    """
+    Join the oldest job that still has orders to hand out, or whose
+    worker stopped heartbeating, starting it if it is queued. Only job
+    ``job_id`` is considered when given. Returns this worker's
+    ``AssignmentJobLease``, or None when there is nothing to do.
+    """
+    expiry = lease_expiry()
+    with transaction.atomic():
+        stale = AssignmentJobLease.objects.filter(job=OuterRef('pk'), heartbeat_at__lt=expiry)
+        jobs = AssignmentJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status='queued') | Q(status='running') & (Q(cursor__lt=F('last_order_id')) | Exists(stale))
+        )
+        if job_id is not None:
+            jobs = jobs.filter(pk=job_id)
+        job = jobs.order_by('id').first()
+        if job is None:
+            return None
+        if job.status == 'queued':
+            job.status = 'running'
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'started_at'])
+
+        # A dead worker's lease is replaced by this one, which resumes its
+        # chunk; a late heartbeat from the old owner then finds it gone
+        lease = AssignmentJobLease(job=job, heartbeat_at=timezone.now())
+        dead = job.leases.filter(heartbeat_at__lt=expiry).order_by('id').first()
+        if dead is not None:
+            logger.warning('Assignment job %s: taking over lease %s, last heartbeat %s', job.pk, dead.pk,
+                           dead.heartbeat_at)
+            lease.chunk_start, lease.chunk_end = dead.chunk_start, dead.chunk_end
+            dead.delete()
+        lease.save()
+    return lease
+
+
+def _lock(lease):
+    """Lock the lease's job and return ``(job, lease)`` as stored, lease None once it was taken over."""
+    job = AssignmentJob.objects.select_for_update().get(pk=lease.job_id)
+    return job, AssignmentJobLease.objects.filter(pk=lease.pk).first()
+
+
+def claim_chunk(lease, chunk_size=JOB_CHUNK_SIZE):
+    """
+    Hand the worker holding ``lease`` its next ``chunk_size`` pending order
+    ids: the rest of a chunk taken over from a dead worker first, then ids
+    past the job's cursor. Workers move the cursor under the job's row
+    lock, so every chunk is disjoint. Renews the lease.
+    """
+    with transaction.atomic():
+        job, current = _lock(lease)
+        if job.status != 'running' or current is None:
+            return []
+        pending = Order.objects.filter(status='pending').order_by('id').values_list('id', flat=True)
+        ids = []
+        if current.chunk_end is not None:
+            ids = list(pending.filter(id__gt=current.chunk_start, id__lte=current.chunk_end))
+        if not ids:
+            current.chunk_start = job.cursor
+            ids = list(pending.filter(id__gt=job.cursor, id__lte=job.last_order_id)[:chunk_size])
+            job.cursor = ids[-1] if ids else job.last_order_id
+            job.save(update_fields=['cursor'])
+        current.chunk_end = ids[-1] if ids else None
+        current.heartbeat_at = timezone.now()
+        current.save(update_fields=['chunk_start', 'chunk_end', 'heartbeat_at'])
+    return ids
+
+
+def process_chunk(lease, strategy, order_ids):
+    # The progress counters commit together with the assignments they count,
+    # and the lease's chunk is cleared in the same transaction, so a chunk is
+    # either counted or left for whoever takes the lease over. The job row
+    # is only locked at the very end, so other workers are not held up while
+    # the chunk is matched. Chunks wait for partners held by another worker
+    # rather than failing orders they could have placed.
+    with transaction.atomic():
+        result = run_batch_assignment(strategy, order_ids=order_ids, skip_locked_partners=False)
+        job, current = _lock(lease)
+        if current is None:
+            # Another worker resumed this chunk; roll the work back
+            raise LeaseLost(f'Lease {lease.pk} on assignment job {job.pk} was taken over.')
+        job.processed += result.total_pending
+        job.assigned_count += result.assigned_count
+        job.assignment_time_total += result.assignment_time_total
+        for reason, count in result.failure_reasons.items():
+            job.failure_reasons[reason] = job.failure_reasons.get(reason, 0) + count
+        add_phase_seconds(job, result.phase_seconds)
+        job.save(update_fields=[
+            'processed', 'assigned_count', 'assignment_time_total', 'failure_reasons', 'phase_seconds',
+        ])
+        current.chunk_start = current.chunk_end = None
+        current.heartbeat_at = timezone.now()
+        current.save(update_fields=['chunk_start', 'chunk_end', 'heartbeat_at'])
+    return result
+
+
+def add_phase_seconds(job, phase_seconds):
+    for phase, seconds in phase_seconds.items():
+        job.phase_seconds[phase] = round(job.phase_seconds.get(phase, 0) + seconds, 6)
+
+
+def leave_job(lease, error=None):
+    """
+    Give up ``lease``. The last worker out of a job with no orders left to
+    hand out records the run and marks the job completed.
+    """
+    with transaction.atomic():
+        job, current = _lock(lease)
+        if current is not None:
+            current.delete()
+        fields = []
+        if job.status == 'running' and error and current is not None:
+            job.status = 'failed'
+            job.error = error
+            job.finished_at = timezone.now()
+            fields += ['status', 'error', 'finished_at']
+        elif job.status == 'running' and job.cursor >= job.last_order_id and not job.leases.exists():
+            result = BatchResult(
+                total_pending=job.processed,
+                assigned_count=job.assigned_count,
+                failure_reasons=job.failure_reasons,
+                assignment_time_total=job.assignment_time_total,
+            )
+            job.run = record_run(result, job.strategy)
+            add_phase_seconds(job, result.phase_seconds)
+            job.status = 'completed'
+            job.finished_at = timezone.now()
+            fields += ['run', 'phase_seconds', 'status', 'finished_at']
+        if fields:
+            job.save(update_fields=fields)
+    return job
+
+
+def work_on(lease, chunk_size=JOB_CHUNK_SIZE):
+    """Process chunks of the job ``lease`` holds until none are left, then leave it."""
+    job = lease.job
+    try:
+        while True:
+            order_ids = claim_chunk(lease, chunk_size)
+            if not order_ids:
+                break
+            process_chunk(lease, job.strategy, order_ids)
+    except LeaseLost:
+        logger.warning('Assignment job %s: lease %s was taken over', job.pk, lease.pk)
+    except Exception as e:
+        logger.exception('Assignment job %s failed', job.pk)
+        return leave_job(lease, error=str(e))
+    return leave_job(lease)
@@ -0,0 +1,244 @@
+import atexit
+import collections
+import datetime
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DataError, DatabaseError, IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .availability import partner_index
+from .geo import valid_position
+from .models import DeliveryPartner
+from .parsers import MalformedLine
+from .telemetry import Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+# Pings accepted in one POST /api/partners/locations/ request
+LOCATION_BATCH_MAX = 10000
+
+# A ping stamped further ahead than this is treated as sent now, so a
+# device with a fast clock cannot pin its partner's position
+LOCATION_MAX_CLOCK_SKEW = 60
+
+# Partner ids are bigint columns
+MAX_PARTNER_ID = 2 ** 63 - 1
+
+
+def clean_ping(row, now):
+    """
+    Validate one ping ``{"partner", "position", "timestamp"?}``. Returns
+    ``((partner_id, lat, lon, ts), None)`` with ``ts`` in epoch seconds, or
+    ``(None, errors)`` with errors keyed by field.
+    """
+    if isinstance(row, MalformedLine):
+        return None, {'non_field_errors': [row.error]}
+    if not isinstance(row, dict):
+        return None, {'non_field_errors': ['Expected an object.']}
+    errors = {}
+
+    partner_id = row.get('partner')
+    if isinstance(partner_id, bool) or not isinstance(partner_id, int) or not 0 < partner_id <= MAX_PARTNER_ID:
+        errors['partner'] = ['A valid partner id is required.']
+
+    try:
+        point = valid_position(row.get('position'))
+    except (TypeError, ValueError):
+        point = None
+    if point is None:
+        errors['position'] = ['Expected [latitude, longitude].']
+
+    ts = now
+    stamp = row.get('timestamp')
+    if stamp is not None:
+        try:
+            parsed = parse_datetime(stamp) if isinstance(stamp, str) else None
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            errors['timestamp'] = ['Datetime has wrong format.']
+        else:
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            ts = min(parsed.timestamp(), now + LOCATION_MAX_CLOCK_SKEW)
+
+    if errors:
+        return None, errors
+    return (partner_id, point[0], point[1], ts), None
+
+
+class LocationStore:
+    """
+    In-process store of partner GPS pings.
+
+    ``record()`` only touches memory: it keeps each partner's latest fix and
+    a track of its last ``PARTNER_TRACK_LENGTH`` fixes. A background thread
+    writes the positions that changed to ``DeliveryPartner`` every
+    ``PARTNER_LOCATION_FLUSH_SECONDS`` with one bulk ``UPDATE``, so a
+    partner pinging every second costs one row write per flush instead of
+    one per ping. The same thread moves flushed partners in the
+    availability index, so nearest-partner matching sees the new fix.
+
+    Pings older than the partner's latest fix are dropped. Each process
+    keeps its own tracks; the flush never lets an older fix overwrite a
+    newer one written by another process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # partner id -> deque of (lat, lon, ts), newest last
+        self._tracks = {}
+        # partner id -> (lat, lon, ts) not yet written to the database
+        self._dirty = {}
+        self._thread = None
+        # Name of the database the recorded fixes belong to
+        self.database = None
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'PARTNER_LOCATION_FLUSH_SECONDS', 5)
+
+    def record(self, pings):
+        """Store ``(partner_id, lat, lon, ts)`` pings. Returns how many were newer than the last fix."""
+        track_length = getattr(settings, 'PARTNER_TRACK_LENGTH', 50)
+        stored = 0
+        with self._lock:
+            self.database = connection.settings_dict['NAME']
+            tracks, dirty = self._tracks, self._dirty
+            for partner_id, lat, lon, ts in pings:
+                track = tracks.get(partner_id)
+                if track is None:
+                    track = tracks[partner_id] = collections.deque(maxlen=track_length)
+                elif ts < track[-1][2]:
+                    continue
+                point = (lat, lon, ts)
+                track.append(point)
+                dirty[partner_id] = point
+                stored += 1
+            if stored and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name='location-flusher', daemon=True)
+                self._thread.start()
+        return stored
+
+    def track(self, partner_id):
+        """This process's recent fixes for ``partner_id`` as ``(lat, lon, ts)``, oldest first."""
+        with self._lock:
+            return list(self._tracks.get(partner_id, ()))
+
+    def latest(self, partner_id):
+        with self._lock:
+            track = self._tracks.get(partner_id)
+            return track[-1] if track else None
+
+    @property
+    def pending_count(self):
+        return len(self._dirty)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing partner locations failed; retrying next interval')
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write the fixes recorded since the last flush. Returns the number of partners updated."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+
+        try:
+            updated = self._write(dirty)
+        except DatabaseError:
+            # Lost connection and the like: keep the fixes for the next
+            # attempt unless newer ones came in
+            with self._lock:
+                for partner_id, point in dirty.items():
+                    self._dirty.setdefault(partner_id, point)
+            raise
+
+        skipped = [partner_id for partner_id in dirty if partner_id not in updated]
+        if skipped:
+            # Forget ids that are not partners so bad pings cannot grow the store
+            known = set(DeliveryPartner.objects.filter(pk__in=skipped).values_list('id', flat=True))
+            with self._lock:
+                for partner_id in skipped:
+                    if partner_id not in known and partner_id not in self._dirty:
+                        self._tracks.pop(partner_id, None)
+
+        for partner_id in updated:
+            point = dirty[partner_id]
+            partner_index.move_partner(partner_id, (point[0], point[1]))
+        return len(updated)
+
+    def _write(self, dirty):
+        """
+        Write ``dirty`` and return the ids updated. A batch the database
+        rejects for its data is split until the offending fixes are found;
+        those are dropped so they cannot block every later flush.
+        """
+        try:
+            return self._update(dirty)
+        except (DataError, IntegrityError):
+            if len(dirty) == 1:
+                [(partner_id, point)] = dirty.items()
+                logger.exception('Dropping location fix %r for partner %r', point, partner_id)
+                with self._lock:
+                    if partner_id not in self._dirty:
+                        self._tracks.pop(partner_id, None)
+                return set()
+        ids = list(dirty)
+        half = len(ids) // 2
+        return (self._write({partner_id: dirty[partner_id] for partner_id in ids[:half]})
+                | self._write({partner_id: dirty[partner_id] for partner_id in ids[half:]}))
+
+    def _update(self, dirty):
+        ids = list(dirty)
+        points = [dirty[partner_id] for partner_id in ids]
+        utc = datetime.timezone.utc
+        qn = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Arrays instead of one parameter set per row: the statement
+            # stays the same size however many partners moved
+            cursor.execute(
+                f'UPDATE {qn(DeliveryPartner._meta.db_table)} AS p '
+                f'SET position = ARRAY[v.lat, v.lon], position_updated_at = v.ts, last_updated = %s '
+                f'FROM unnest(%s::bigint[], %s::float8[], %s::float8[], %s::timestamptz[]) AS v(id, lat, lon, ts) '
+                f'WHERE p.id = v.id AND (p.position_updated_at IS NULL OR p.position_updated_at < v.ts) '
+                f'RETURNING p.id',
+                [
+                    timezone.now(),
+                    ids,
+                    [point[0] for point in points],
+                    [point[1] for point in points],
+                    [datetime.datetime.fromtimestamp(point[2], utc) for point in points],
+                ],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+
+location_store = LocationStore()
+
+registry.register(Gauge('partner_locations_pending', 'Partners with a GPS fix waiting for the next flush.',
+                        lambda: location_store.pending_count))
+
+
+@atexit.register
+def _flush_on_exit():
+    # The test runner has dropped the test database and pointed the
+    # connection back at the real one by now; fixes recorded during tests
+    # must not be written there
+    if location_store.pending_count and location_store.database == connection.settings_dict['NAME']:
+        try:
+            location_store.flush()
+        except Exception:
+            logger.exception('Could not flush partner locations on exit')
@@ -0,0 +1,64 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from delivery.models import DailyOrderStats, Order
+from delivery.views import day_bounds
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyOrderStats rollup from the orders table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First scheduled day to rebuild (YYYY-MM-DD). Default: all.')
+        parser.add_argument('--end-date', help='Last scheduled day to rebuild (YYYY-MM-DD). Default: all.')
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options['start_date'])
+        end = self._parse_date(options['end_date'])
+
+        orders = Order.objects.filter(scheduled_time__isnull=False)
+        stats = DailyOrderStats.objects.all()
+        if start:
+            orders = orders.filter(scheduled_time__gte=day_bounds(start, start)[0])
+            stats = stats.filter(date__gte=start)
+        if end:
+            orders = orders.filter(scheduled_time__lt=day_bounds(end, end)[1])
+            stats = stats.filter(date__lte=end)
+
+        rows = (
+            orders
+            .annotate(date=TruncDate('scheduled_time'))
+            .values('date', 'delivery_area')
+            .annotate(orders=Count('id'), revenue=Sum('total_amount'))
+        )
+
+        with transaction.atomic():
+            deleted, _ = stats.delete()
+            created = DailyOrderStats.objects.bulk_create(
+                [
+                    DailyOrderStats(
+                        date=row['date'],
+                        area=row['delivery_area'],
+                        orders=row['orders'],
+                        revenue=row['revenue'] or 0,
+                    )
+                    for row in rows.iterator(chunk_size=5000)
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Replaced {deleted} rollup rows with {len(created)} rows.'
+        ))
+
+    def _parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Invalid date {value!r}. Use YYYY-MM-DD.')
@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from delivery.benchmark import SCENARIOS, ClientRunner, HttpRunner, compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API endpoints and print throughput, p50/p99 latency and query counts "
+        "as JSON. Seed a dataset first with `seed_data`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f'Comma-separated scenarios to run. Default: all of {", ".join(SCENARIOS)}.')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario. Default: 200.')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Unmeasured requests before each scenario. Default: 10.')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Assignment runs to measure in the assignment-run scenario. Default: 3.')
+        parser.add_argument('--url', help='Benchmark a running server at this base URL instead of in-process. '
+                                          'Scenarios that change data then really change it.')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Parallel connections, with --url only. Default: 1.')
+        parser.add_argument('--output', help='Also write the report to this file.')
+        parser.add_argument('--baseline', help='Earlier report to compare against; adds percentage changes.')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}. Use any of: {", ".join(SCENARIOS)}.')
+        if options['requests'] < 1 or options['runs'] < 1 or options['warmup'] < 0 or options['concurrency'] < 1:
+            raise CommandError('--requests, --runs and --concurrency must be at least 1; --warmup at least 0.')
+        if options['concurrency'] > 1 and not options['url']:
+            raise CommandError('--concurrency needs --url; in-process runs send one request at a time.')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read baseline {options["baseline"]}: {e}')
+
+        if options['url']:
+            runner = HttpRunner(options['url'].rstrip('/'), options['concurrency'])
+        else:
+            runner = ClientRunner()
+        report = run_benchmark(runner, names, options['requests'], options['warmup'], options['runs'])
+        if baseline is not None:
+            report['change_pct'] = compare(report, baseline)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from delivery.benchmark import benchmark_grid, benchmark_strategies
+from delivery.matching import STRATEGIES
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark nearest-partner lookups and the assignment strategies on synthetic in-memory data "
+        "and print the results as JSON. "
+        "Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partners', type=int, default=20000, help='Partners in the grid. Default: 20000.')
+        parser.add_argument('--queries', type=int, default=20000, help='Nearest-partner queries. Default: 20000.')
+        parser.add_argument('--k', type=int, default=3, help='Partners returned per query. Default: 3.')
+        parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                            help=f'Comma-separated strategies to time. Default: all of {", ".join(STRATEGIES)}.')
+        parser.add_argument('--orders', type=int, default=12000, help='Pending orders to match. Default: 12000.')
+        parser.add_argument('--match-partners', type=int, default=3000,
+                            help='Partners the strategies match against. Default: 3000.')
+        parser.add_argument('--areas', type=int, default=12, help='Delivery areas. Default: 12.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic data. Default: 1.')
+        parser.add_argument('--output', help='Also write the report to this file.')
+
+    def handle(self, *args, **options):
+        strategies = [name.strip() for name in options['strategies'].split(',') if name.strip()]
+        unknown = [name for name in strategies if name not in STRATEGIES]
+        if unknown:
+            raise CommandError(f'Unknown strategies: {", ".join(unknown)}. Use any of: {", ".join(STRATEGIES)}.')
+        counts = ('partners', 'queries', 'k', 'orders', 'match_partners', 'areas')
+        if any(options[name] < 1 for name in counts):
+            raise CommandError('--partners, --queries, --k, --orders, --match-partners and --areas must be at least 1.')
+
+        report = {
+            'grid': benchmark_grid(options['partners'], options['queries'], options['k'], options['seed']),
+            'matching': benchmark_strategies(strategies, options['orders'], options['match_partners'],
+                                             options['areas'], options['seed']),
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
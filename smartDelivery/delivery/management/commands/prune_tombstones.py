@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from delivery.models import Tombstone
+from delivery.sync import tombstone_horizon
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstones older than TOMBSTONE_RETENTION_DAYS.'
+
+    def handle(self, *args, **options):
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones.'))
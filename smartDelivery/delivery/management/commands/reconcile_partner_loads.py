@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from delivery.assignment import LOAD_HOLDING_STATUSES
+from delivery.availability import partner_index
+from delivery.models import DeliveryPartner, Order
+
+
+class Command(BaseCommand):
+    help = "Recompute every partner's current_load from their assigned and picked orders."
+
+    def handle(self, *args, **options):
+        live_orders = (
+            Order.objects.filter(assigned_to=OuterRef('pk'), status__in=LOAD_HOLDING_STATUSES)
+            .order_by()
+            .values('assigned_to')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        live_load = Coalesce(Subquery(live_orders), 0)
+
+        # One UPDATE touching only the partners whose load has drifted
+        with transaction.atomic():
+            fixed = DeliveryPartner.objects.exclude(current_load=live_load).update(
+                current_load=live_load, last_updated=timezone.now()
+            )
+            transaction.on_commit(partner_index.invalidate)
+
+        self.stdout.write(self.style.SUCCESS(f'Corrected current_load on {fixed} partners.'))
@@ -0,0 +1,51 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from delivery.jobs import JOB_CHUNK_SIZE, claim_job, work_on
+from delivery.telemetry import CONTENT_TYPE, registry
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    # Serves the worker's run metrics to Prometheus on any path
+    def do_GET(self):
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Process queued assignment runs. Start several to split large runs between them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between polls of an empty queue. Default: 2.')
+        parser.add_argument('--chunk-size', type=int, default=JOB_CHUNK_SIZE,
+                            help=f'Pending orders claimed at a time. Default: {JOB_CHUNK_SIZE}.')
+        parser.add_argument('--metrics-port', type=int,
+                            help='Serve this worker\'s run metrics in Prometheus format on this port.')
+
+    def handle(self, *args, **options):
+        if options['metrics_port']:
+            server = ThreadingHTTPServer(('', options['metrics_port']), MetricsHandler)
+            threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+
+        while True:
+            lease = claim_job()
+            if lease is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            job = work_on(lease, options['chunk_size'])
+            self.stdout.write(f'Job {job.pk}: {job.status}, {job.assigned_count}/{job.processed} orders assigned.')
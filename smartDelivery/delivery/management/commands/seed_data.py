@@ -0,0 +1,220 @@
+import datetime
+import math
+import random
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from delivery.assignment import BULK_BATCH_SIZE, NO_PARTNER_REASON, BatchResult
+from delivery.availability import partner_index
+from delivery.items import item_summary, items_total
+from delivery.metrics import record_run
+from delivery.models import Assignment, DeliveryPartner, Order
+
+# Relative order volume per hour of the day: lunch and dinner peaks
+HOURLY_PROFILE = (
+    1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 10, 14,
+    20, 18, 10, 8, 8, 10, 16, 22, 20, 12, 6, 3,
+)
+
+MENU = (
+    ('Burger', Decimal('8.50')),
+    ('Pizza', Decimal('12.00')),
+    ('Salad', Decimal('6.75')),
+    ('Noodles', Decimal('9.25')),
+    ('Coffee', Decimal('3.10')),
+    ('Cake', Decimal('4.40')),
+    ('Groceries', Decimal('23.80')),
+    ('Medicine', Decimal('15.00')),
+)
+
+# Area centres are laid out on a grid this many degrees apart (about 5.5 km)
+AREA_SPACING_DEG = 0.05
+# Spread of partner and order positions around their area's centre (about 1.5 km)
+POSITION_SPREAD_DEG = 0.015
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic partners, orders and assignments for benchmarks: N partners "
+        "across M areas, orders skewed towards popular areas and meal times, with positions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partners', type=int, default=200, help='Partners to create. Default: 200.')
+        parser.add_argument('--areas', type=int, default=10, help='Number of delivery areas. Default: 10.')
+        parser.add_argument('--orders', type=int, default=10000, help='Orders to create. Default: 10000.')
+        parser.add_argument('--days', type=int, default=14,
+                            help='Spread orders over this many days up to now. Default: 14.')
+        parser.add_argument('--pending', type=float, default=0.2,
+                            help='Share of orders left pending; the rest are delivered. Default: 0.2.')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Zipf exponent of area popularity; 0 spreads orders evenly. Default: 1.0.')
+        parser.add_argument('--no-positions', action='store_true', help='Leave partner and order positions empty.')
+        parser.add_argument('--center', default='12.9716,77.5946',
+                            help='Latitude,longitude the areas are laid out around. Default: 12.9716,77.5946.')
+        parser.add_argument('--prefix', default='SEED',
+                            help='Marks seeded order numbers and partner emails. Default: SEED.')
+        parser.add_argument('--clear', action='store_true', help='Delete data seeded earlier with --prefix first.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, for repeatable datasets. Default: 1.')
+
+    def handle(self, *args, **options):
+        if options['areas'] < 1 or options['partners'] < 0 or options['orders'] < 0 or options['days'] < 1:
+            raise CommandError('--areas and --days must be at least 1; --partners and --orders cannot be negative.')
+        if not 0 <= options['pending'] <= 1:
+            raise CommandError('--pending must be between 0 and 1.')
+        try:
+            lat, lon = (float(value) for value in options['center'].split(','))
+        except ValueError:
+            raise CommandError('--center must be "<latitude>,<longitude>".')
+
+        prefix = options['prefix']
+        rnd = random.Random(options['seed'])
+        areas = self._areas(options['areas'], lat, lon)
+        weights = [1 / (rank + 1) ** options['skew'] for rank in range(len(areas))]
+        with_positions = not options['no_positions']
+
+        with transaction.atomic():
+            if options['clear']:
+                Order.objects.filter(order_number__startswith=f'{prefix}-').delete()
+                DeliveryPartner.objects.filter(email__startswith=f'{prefix.lower()}-').delete()
+            elif Order.objects.filter(order_number__startswith=f'{prefix}-').exists():
+                raise CommandError(f'Data seeded with prefix {prefix!r} exists. Pass --clear or another --prefix.')
+
+            partners = self._partners(options['partners'], areas, weights, rnd, prefix, with_positions)
+            orders = self._orders(options, areas, weights, partners, rnd, prefix, with_positions)
+            assignments = Assignment.objects.bulk_create(
+                [Assignment(order=order, partner=order.assigned_to, status='success')
+                 for order in orders if order.assigned_to_id],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            runs = self._runs(orders, rnd)
+            transaction.on_commit(partner_index.invalidate)
+
+        # Bulk inserts skip the signals that maintain the daily rollup
+        call_command('backfill_order_stats', stdout=self.stdout)
+        pending = sum(1 for order in orders if order.status == 'pending')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(partners)} partners in {len(areas)} areas, {len(orders)} orders '
+            f'({pending} pending), {len(assignments)} assignments and {runs} runs over {options["days"]} days.'
+        ))
+
+    def _runs(self, orders, rnd):
+        # One run per day of delivered orders, so the metrics have a history
+        days = {}
+        for order in orders:
+            if order.status == 'delivered':
+                day = days.setdefault(order.scheduled_time.date(), BatchResult())
+                day.total_pending += 1
+                if order.assigned_to_id:
+                    day.assigned_count += 1
+                    day.assignment_time_total += rnd.uniform(30, 600)
+                else:
+                    day.add_failure(NO_PARTNER_REASON)
+        for day in sorted(days):
+            record_run(days[day])
+        return len(days)
+
+    def _areas(self, count, lat, lon):
+        side = math.ceil(math.sqrt(count))
+        return [
+            (f'Area {index + 1:02d}',
+             lat + (index // side - side / 2) * AREA_SPACING_DEG,
+             lon + (index % side - side / 2) * AREA_SPACING_DEG)
+            for index in range(count)
+        ]
+
+    def _position(self, rnd, area, with_positions):
+        if not with_positions:
+            return None
+        _, lat, lon = area
+        return [round(rnd.gauss(lat, POSITION_SPREAD_DEG), 6), round(rnd.gauss(lon, POSITION_SPREAD_DEG), 6)]
+
+    def _partners(self, count, areas, weights, rnd, prefix, with_positions):
+        partners = []
+        for index in range(count):
+            # Busy areas get more partners, as they would in practice
+            covered = []
+            for _ in range(rnd.randint(1, min(3, len(areas)))):
+                area = rnd.choices(areas, weights)[0]
+                if area not in covered:
+                    covered.append(area)
+            start = rnd.choice((6, 8, 10, 12, 14))
+            partners.append(DeliveryPartner(
+                name=f'Partner {index + 1}',
+                email=f'{prefix.lower()}-partner-{index + 1}@example.com',
+                phone=f'9{rnd.randrange(10 ** 9):09d}',
+                status='active' if rnd.random() < 0.9 else 'inactive',
+                areas=[name for name, _, _ in covered],
+                shift_start=f'{start:02d}:00',
+                shift_end=f'{start + 8:02d}:00',
+                rating=round(rnd.uniform(3, 5), 1),
+                position=self._position(rnd, covered[0], with_positions),
+                position_updated_at=timezone.now() if with_positions else None,
+            ))
+        return DeliveryPartner.objects.bulk_create(partners, batch_size=BULK_BATCH_SIZE)
+
+    def _arrival(self, rnd, midnight, now, days):
+        while True:
+            arrival = midnight - datetime.timedelta(
+                days=rnd.randrange(days),
+                hours=-rnd.choices(range(24), HOURLY_PROFILE)[0],
+                minutes=-rnd.randrange(60),
+            )
+            # Redraw rather than clamp, which would pile today's orders up at now
+            if arrival <= now:
+                return arrival
+
+    def _orders(self, options, areas, weights, partners, rnd, prefix, with_positions):
+        now = timezone.now()
+        days = options['days']
+        by_area = {}
+        for partner in partners:
+            for area in partner.areas:
+                by_area.setdefault(area, []).append(partner)
+
+        # Arrival times first, so the newest orders are the pending ones
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        arrivals = sorted(self._arrival(rnd, midnight, now, days) for _ in range(options['orders']))
+        first_pending = len(arrivals) - round(len(arrivals) * options['pending'])
+
+        orders = []
+        for index, arrival in enumerate(arrivals):
+            area = rnd.choices(areas, weights)[0]
+            items = [
+                {'name': name, 'quantity': rnd.randint(1, 3), 'price': float(price)}
+                for name, price in rnd.sample(MENU, rnd.randint(1, 4))
+            ]
+            item_count, item_names = item_summary(items)
+            delivered = index < first_pending
+            candidates = by_area.get(area[0])
+            orders.append(Order(
+                order_number=f'{prefix}-{index + 1:07d}',
+                customer_name=f'Customer {rnd.randrange(1, 50000)}',
+                customer_phone=f'8{rnd.randrange(10 ** 9):09d}',
+                delivery_area=area[0],
+                items=items,
+                item_count=item_count,
+                item_names=item_names,
+                total_amount=items_total(items),
+                status='delivered' if delivered else 'pending',
+                scheduled_time=arrival + datetime.timedelta(minutes=rnd.randint(30, 120)),
+                assigned_to=rnd.choice(candidates) if delivered and candidates else None,
+                position=self._position(rnd, area, with_positions),
+            ))
+        orders = Order.objects.bulk_create(orders, batch_size=BULK_BATCH_SIZE)
+
+        # created_at is auto_now_add, so bulk_create stamps it now; backdate it
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for start in range(0, len(orders), BULK_BATCH_SIZE * 10):
+                chunk = orders[start:start + BULK_BATCH_SIZE * 10]
+                cursor.execute(
+                    f'UPDATE {qn(Order._meta.db_table)} AS o SET created_at = v.created_at '
+                    f'FROM unnest(%s::bigint[], %s::timestamptz[]) AS v(id, created_at) WHERE o.id = v.id',
+                    [[order.pk for order in chunk], arrivals[start:start + len(chunk)]],
+                )
+        return orders
@@ -0,0 +1,289 @@
+import heapq
+from collections import defaultdict
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment, linprog
+from scipy.sparse import csr_matrix
+
+from .geo import haversine_km, pairwise_haversine_km, valid_position
+from .models import MAX_PARTNER_LOAD
+
+# Ratings are on a 0-5 scale.
+MAX_RATING = 5.0
+
+# Reward per placed order in the min-cost flow; larger than any slot cost,
+# so placing one more order always beats a cheaper arrangement.
+PLACEMENT_REWARD = 10.0
+
+# Distance that costs as much as one extra order of load, in km.
+DISTANCE_KM_PER_LOAD = 5.0
+
+# Largest cost matrix (rows x columns) solved in one go by the optimal
+# strategy; bigger areas are solved in chunks of older orders first.
+OPTIMAL_MAX_CELLS = 4_000_000
+
+
+def partners_by_area(partners):
+    """Group partners by each area they cover, keeping the given order."""
+    by_area = defaultdict(list)
+    for partner in partners:
+        if not isinstance(partner.areas, list):
+            continue
+        for area in partner.areas:
+            if isinstance(area, str):
+                by_area[area].append(partner)
+    return by_area
+
+
+def match_greedy(orders, partners):
+    """
+    Pair each order with the lowest-id partner covering its area that still
+    has spare capacity, the same choice the per-order ``.first()`` lookup made.
+
+    ``partners`` must be ordered by id; their ``current_load`` is incremented
+    in place. Returns a list of ``(order, partner_or_None)`` tuples.
+    """
+    by_area = partners_by_area(partners)
+    # Loads only ever go up during a run, so each area keeps a cursor past
+    # the partners that are already full.
+    cursors = defaultdict(int)
+    matches = []
+    for order in orders:
+        candidates = by_area.get(order.delivery_area, ())
+        i = cursors[order.delivery_area]
+        while i < len(candidates) and candidates[i].current_load >= MAX_PARTNER_LOAD:
+            i += 1
+        cursors[order.delivery_area] = i
+
+        if i < len(candidates):
+            partner = candidates[i]
+            partner.current_load += 1
+            matches.append((order, partner))
+        else:
+            matches.append((order, None))
+    return matches
+
+
+def match_balanced(orders, partners):
+    """
+    Pair each order with the least loaded partner covering its area,
+    preferring higher ratings on ties.
+    """
+    heaps = {}
+    for area, candidates in partners_by_area(partners).items():
+        heap = [(p.current_load, -p.rating, p.pk, p) for p in candidates if p.current_load < MAX_PARTNER_LOAD]
+        heapq.heapify(heap)
+        heaps[area] = heap
+
+    matches = []
+    for order in orders:
+        heap = heaps.get(order.delivery_area, [])
+        partner = None
+        while heap:
+            load, neg_rating, pk, candidate = heap[0]
+            if candidate.current_load >= MAX_PARTNER_LOAD:
+                heapq.heappop(heap)
+            elif candidate.current_load != load:
+                # Another area used this partner since it was pushed
+                heapq.heapreplace(heap, (candidate.current_load, neg_rating, pk, candidate))
+            else:
+                partner = candidate
+                partner.current_load += 1
+                heapq.heapreplace(heap, (partner.current_load, neg_rating, pk, partner))
+                break
+        matches.append((order, partner))
+    return matches
+
+
+def positions_array(items):
+    """``(n, 2)`` array of ``item.position``, NaN where it is missing or invalid."""
+    coords = np.full((len(items), 2), np.nan)
+    for i, item in enumerate(items):
+        point = valid_position(item.position)
+        if point:
+            coords[i] = point
+    return coords
+
+
+def match_nearest(orders, partners):
+    """
+    Pair each order with the closest partner covering its area that still
+    has spare capacity. Orders or partners without a position fall back to
+    the least loaded candidate.
+    """
+    areas = {}
+    for area, candidates in partners_by_area(partners).items():
+        areas[area] = (candidates, positions_array(candidates))
+
+    matches = []
+    for order in orders:
+        candidates, coords = areas.get(order.delivery_area, ((), None))
+        if not candidates:
+            matches.append((order, None))
+            continue
+        loads = np.fromiter((p.current_load for p in candidates), dtype=np.int64, count=len(candidates))
+        open_slots = loads < MAX_PARTNER_LOAD
+        if not open_slots.any():
+            matches.append((order, None))
+            continue
+
+        point = valid_position(order.position)
+        located = open_slots & ~np.isnan(coords[:, 0])
+        if point and located.any():
+            dists = np.full(len(candidates), np.inf)
+            dists[located] = haversine_km(point[0], point[1], coords[located, 0], coords[located, 1])
+            best = int(np.argmin(dists))
+        else:
+            best = int(np.argmin(np.where(open_slots, loads, MAX_PARTNER_LOAD)))
+
+        partner = candidates[best]
+        partner.current_load += 1
+        matches.append((order, partner))
+    return matches
+
+
+def slot_costs(slots):
+    """
+    Cost of each (partner, load level) slot. Each load level costs one unit
+    and the rating at most half a unit, so idle partners fill first and the
+    rating breaks ties between equally loaded ones.
+    """
+    loads = np.fromiter((level for _, level in slots), dtype=np.float64, count=len(slots))
+    ratings = np.fromiter((p.rating or 0 for p, _ in slots), dtype=np.float64, count=len(slots))
+    return loads + 0.5 * (MAX_RATING - np.clip(ratings, 0, MAX_RATING)) / MAX_RATING
+
+
+def area_quotas(orders_by_area, partners_by_area_map):
+    """
+    Decide how many orders each partner takes from each area.
+
+    Solved as a min-cost flow source -> area -> partner -> (partner, load
+    level) -> sink. Every placed order earns ``PLACEMENT_REWARD``, which
+    outweighs any slot cost, so the flow first places as many orders as
+    possible and then prefers the cheapest slots. The constraint matrix is
+    a network matrix, so the LP optimum is integral.
+    """
+    areas = [area for area in orders_by_area if partners_by_area_map.get(area)]
+    partners = {}
+    for area in areas:
+        for partner in partners_by_area_map[area]:
+            if partner.current_load < MAX_PARTNER_LOAD:
+                partners.setdefault(partner.pk, partner)
+    if not areas or not partners:
+        return {}
+
+    partner_row = {pk: i for i, pk in enumerate(partners)}
+    edges = [
+        (area_i, partner)
+        for area_i, area in enumerate(areas)
+        for partner in partners_by_area_map[area]
+        if partner.pk in partner_row
+    ]
+    slots = [
+        (partner, level)
+        for partner in partners.values()
+        for level in range(partner.current_load, MAX_PARTNER_LOAD)
+    ]
+    n_edges = len(edges)
+
+    # Area supply: sum of x(area, *) <= orders waiting in the area
+    edge_areas = np.fromiter((area_i for area_i, _ in edges), dtype=np.int64, count=n_edges)
+    a_ub = csr_matrix(
+        (np.ones(n_edges), (edge_areas, np.arange(n_edges))),
+        shape=(len(areas), n_edges + len(slots)),
+    )
+    b_ub = np.array([len(orders_by_area[area]) for area in areas], dtype=np.float64)
+
+    # Partner balance: sum of x(*, partner) == slots used on the partner
+    edge_partners = np.fromiter((partner_row[p.pk] for _, p in edges), dtype=np.int64, count=n_edges)
+    slot_partners = np.fromiter((partner_row[p.pk] for p, _ in slots), dtype=np.int64, count=len(slots))
+    a_eq = csr_matrix(
+        (
+            np.concatenate([np.ones(n_edges), -np.ones(len(slots))]),
+            (np.concatenate([edge_partners, slot_partners]), np.arange(n_edges + len(slots))),
+        ),
+        shape=(len(partners), n_edges + len(slots)),
+    )
+    b_eq = np.zeros(len(partners))
+
+    cost = np.concatenate([np.zeros(n_edges), slot_costs(slots) - PLACEMENT_REWARD])
+    bounds = np.zeros((n_edges + len(slots), 2))
+    bounds[:n_edges, 1] = MAX_PARTNER_LOAD
+    bounds[n_edges:, 1] = 1
+
+    solution = linprog(cost, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=b_eq, bounds=bounds, method='highs-ds')
+    if not solution.success:
+        return {}
+
+    flows = np.rint(solution.x[:n_edges]).astype(np.int64)
+    quotas = defaultdict(list)
+    for (area_i, partner), amount in zip(edges, flows):
+        if amount > 0:
+            quotas[areas[area_i]].append((partner, int(amount)))
+    return quotas
+
+
+def order_costs(area_orders):
+    """Row cost: a small age penalty so older orders win ties."""
+    return np.arange(len(area_orders), dtype=np.float64) / (100.0 * max(len(area_orders), 1))
+
+
+def distance_costs(area_orders, slots):
+    """Travel cost between each order and slot; zero where a position is unknown."""
+    order_coords = positions_array(area_orders)
+    partner_coords = positions_array([partner for partner, _ in slots])
+    dists = pairwise_haversine_km(
+        order_coords[:, 0], order_coords[:, 1], partner_coords[:, 0], partner_coords[:, 1]
+    )
+    return np.nan_to_num(dists, nan=0.0) / DISTANCE_KM_PER_LOAD
+
+
+def match_optimal(orders, partners):
+    """
+    Place as many orders as possible, then spread them over the least
+    loaded, best rated and closest partners.
+
+    A min-cost flow over areas and partners fixes how many orders each
+    partner takes per area; each area is then solved as a min-cost
+    assignment between its orders and those partner slots.
+    """
+    orders_by_area = defaultdict(list)
+    for order in orders:
+        orders_by_area[order.delivery_area].append(order)
+
+    quotas = area_quotas(orders_by_area, partners_by_area(partners))
+
+    assigned = {}
+    for area, area_quota in quotas.items():
+        slots = []
+        for partner, amount in area_quota:
+            for _ in range(amount):
+                slots.append((partner, partner.current_load))
+                partner.current_load += 1
+
+        pending = orders_by_area[area]
+        chunk = max(1, OPTIMAL_MAX_CELLS // max(len(pending), 1))
+        for start in range(0, len(slots), chunk):
+            chunk_slots = slots[start:start + chunk]
+            chunk_orders = [o for o in pending if o.pk not in assigned]
+            rows_limit = max(len(chunk_slots), OPTIMAL_MAX_CELLS // len(chunk_slots))
+            chunk_orders = chunk_orders[:rows_limit]
+
+            cost = (
+                order_costs(chunk_orders)[:, None]
+                + slot_costs(chunk_slots)[None, :]
+                + distance_costs(chunk_orders, chunk_slots)
+            )
+            row_ind, col_ind = linear_sum_assignment(cost)
+            for r, c in zip(row_ind, col_ind):
+                assigned[chunk_orders[r].pk] = chunk_slots[c][0]
+
+    return [(order, assigned.get(order.pk)) for order in orders]
+
+
+STRATEGIES = {
+    'greedy': match_greedy,
+    'balanced': match_balanced,
+    'optimal': match_optimal,
+    'nearest': match_nearest,
+}
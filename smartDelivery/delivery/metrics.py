@@ -0,0 +1,108 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework.utils.encoders import JSONEncoder
+
+from .events import publish_metrics
+from .models import AssignmentRun, FailureReasonCount
+from .serializers import AssignmentRunSerializer, FailureReasonCountSerializer
+from .telemetry import phase_timer
+
+# Runs returned in ``historical_data`` unless the client asks for more.
+HISTORY_DEFAULT_LIMIT = 30
+HISTORY_MAX_LIMIT = 500
+
+REASON_MAX_LENGTH = FailureReasonCount._meta.get_field('reason').max_length
+
+# Cached responses are keyed on the latest run id, read from the database
+# on every request, so a run recorded by any process (the workers included)
+# retires every cached history window at once without a shared cache.
+CACHE_KEY = 'assignment-metrics:{run}:{limit}:{before}'
+
+
+def record_run(result, strategy='greedy'):
+    """
+    Store the outcome of one batch run: a single ``AssignmentRun`` row plus
+    one counter update per distinct failure reason, so the cost of a run
+    does not depend on how many runs came before it.
+    """
+    with phase_timer('metrics', strategy, result), transaction.atomic():
+        run = AssignmentRun.objects.create(
+            strategy=strategy,
+            total_pending=result.total_pending,
+            total_assigned=result.assigned_count,
+            success_rate=result.success_rate,
+            average_time=result.average_time,
+        )
+        for reason, count in result.failure_reasons.items():
+            add_failures(reason, count)
+        publish_metrics(run)
+    return run
+
+
+def add_failures(reason, count):
+    reason = reason[:REASON_MAX_LENGTH]
+    # Make sure the counter row exists, then bump it in the database so
+    # concurrent runs never overwrite each other's counts
+    FailureReasonCount.objects.bulk_create([FailureReasonCount(reason=reason)], ignore_conflicts=True)
+    FailureReasonCount.objects.filter(reason=reason).update(count=F('count') + count)
+
+
+def metrics_payload(run=None, history_limit=HISTORY_DEFAULT_LIMIT, history_before=None):
+    """
+    Build the metrics response for ``run`` (the latest run by default), or
+    return None when nothing has run yet.
+
+    ``historical_data`` holds up to ``history_limit`` earlier runs, oldest
+    first. ``history_next`` is the run id to pass back as ``history_before``
+    for the page before it, or None once the start of the log is reached.
+    """
+    if run is None:
+        run = AssignmentRun.objects.order_by('-id').first()
+        if run is None:
+            return None
+
+    before = run.id if history_before is None else min(history_before, run.id)
+    history = list(AssignmentRun.objects.filter(id__lt=before).order_by('-id')[:history_limit + 1])
+    history_next = None
+    if len(history) > history_limit:
+        history = history[:history_limit]
+        history_next = history[-1].id if history else before
+    history.reverse()
+
+    return {
+        'id': run.id,
+        'strategy': run.strategy,
+        'total_assigned': run.total_assigned,
+        'success_rate': run.success_rate,
+        'average_time': run.average_time,
+        'failure_reasons': FailureReasonCountSerializer(
+            FailureReasonCount.objects.order_by('-count', 'reason'), many=True
+        ).data,
+        'historical_data': AssignmentRunSerializer(history, many=True).data,
+        'history_next': history_next,
+    }
+
+
+def cached_metrics_payload(history_limit=HISTORY_DEFAULT_LIMIT, history_before=None):
+    """
+    Return ``(payload, etag)`` for the latest run, serving it from the cache
+    when possible, or ``(None, None)`` when nothing has run yet.
+    """
+    run = AssignmentRun.objects.order_by('-id').first()
+    if run is None:
+        return None, None
+    key = CACHE_KEY.format(run=run.id, limit=history_limit, before=history_before)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    payload = metrics_payload(run, history_limit=history_limit, history_before=history_before)
+    body = json.dumps(payload, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+    cache.set(key, (payload, etag), getattr(settings, 'METRICS_CACHE_TIMEOUT', 300))
+    return payload, etag
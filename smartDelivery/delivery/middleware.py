@@ -0,0 +1,38 @@
+import time
+
+from django.db import connection
+
+from .telemetry import QueryTimer, observe_request
+
+# Methods recorded under their own name; any other is counted as "other"
+# so made-up methods cannot add series
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records each request's latency, SQL query count and SQL time under its
+    URL name (``order-list``, ``assignment-run``, ...), for ``/metrics``.
+    Listed first so the time covers the rest of the middleware too. For
+    streamed responses only the time to the first byte is counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # Unmatched paths share one label so scanners cannot add series
+            route = 'unmatched'
+        else:
+            route = match.url_name or match.route
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        observe_request(route, method, response.status_code, elapsed, timer.count, timer.seconds)
+        return response
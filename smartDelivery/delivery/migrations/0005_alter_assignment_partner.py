@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0004_alter_assignment_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='partner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='delivery.deliverypartner'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:56
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0005_alter_assignment_partner'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deliverypartner',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['areas'], name='partner_areas_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='deliverypartner',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('current_load__lt', 3), ('status', 'active')), fields=['areas'], name='partner_available_areas_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
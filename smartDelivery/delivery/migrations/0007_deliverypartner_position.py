@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:02
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0006_deliverypartner_areas_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverypartner',
+            name='position',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), blank=True, help_text='Last known GPS coordinates as [latitude, longitude]', null=True, size=2),
+        ),
+        migrations.AddField(
+            model_name='deliverypartner',
+            name='position_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
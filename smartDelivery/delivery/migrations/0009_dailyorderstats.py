@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_order_stats(apps, schema_editor):
+    Order = apps.get_model('delivery', 'Order')
+    DailyOrderStats = apps.get_model('delivery', 'DailyOrderStats')
+    rows = (
+        Order.objects.filter(scheduled_time__isnull=False)
+        .annotate(date=TruncDate('scheduled_time'))
+        .values('date', 'delivery_area')
+        .annotate(orders=Count('id'), revenue=Sum('total_amount'))
+    )
+    DailyOrderStats.objects.bulk_create(
+        [
+            DailyOrderStats(date=row['date'], area=row['delivery_area'],
+                            orders=row['orders'], revenue=row['revenue'] or 0)
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0008_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('area', models.CharField(max_length=100)),
+                ('orders', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyorderstats',
+            constraint=models.UniqueConstraint(fields=('date', 'area'), name='daily_order_stats_date_area'),
+        ),
+        migrations.RunPython(backfill_daily_order_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:07
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def copy_metrics_history(apps, schema_editor):
+    # The latest AssignmentMetrics row carries every earlier run in
+    # historical_data and the merged failure counts, so it is all we need
+    AssignmentMetrics = apps.get_model('delivery', 'AssignmentMetrics')
+    AssignmentRun = apps.get_model('delivery', 'AssignmentRun')
+    FailureReasonCount = apps.get_model('delivery', 'FailureReasonCount')
+
+    latest = AssignmentMetrics.objects.order_by('-id').first()
+    if latest is None:
+        return
+
+    now = timezone.now()
+    entries = [entry for entry in latest.historical_data or [] if isinstance(entry, dict)]
+    runs, timestamps = [], []
+    for entry in entries:
+        runs.append(AssignmentRun(
+            total_assigned=entry.get('total_assigned') or 0,
+            success_rate=entry.get('success_rate') or 0,
+            average_time=entry.get('average_time') or 0,
+        ))
+        timestamps.append(parse_datetime(entry.get('timestamp') or '') or now)
+    runs.append(AssignmentRun(
+        total_assigned=latest.total_assigned,
+        success_rate=latest.success_rate,
+        average_time=latest.average_time,
+    ))
+    timestamps.append(now)
+
+    AssignmentRun.objects.bulk_create(runs, batch_size=1000)
+    # auto_now_add stamps every row on insert, so restore the recorded times
+    for run, timestamp in zip(runs, timestamps):
+        run.timestamp = timestamp
+    AssignmentRun.objects.bulk_update(runs, ['timestamp'], batch_size=1000)
+
+    counts = {}
+    for entry in latest.failure_reasons or []:
+        if isinstance(entry, dict) and entry.get('reason'):
+            reason = str(entry['reason'])[:255]
+            counts[reason] = counts.get(reason, 0) + (entry.get('count') or 0)
+    FailureReasonCount.objects.bulk_create(
+        [FailureReasonCount(reason=reason, count=count) for reason, count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0009_dailyorderstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('strategy', models.CharField(default='greedy', max_length=20)),
+                ('total_pending', models.IntegerField(default=0)),
+                ('total_assigned', models.IntegerField(default=0)),
+                ('success_rate', models.FloatField(default=0)),
+                ('average_time', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FailureReasonCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(max_length=255, unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(copy_metrics_history, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='AssignmentMetrics',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0010_assignment_run_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('strategy', models.CharField(default='greedy', max_length=20)),
+                ('last_order_id', models.BigIntegerField(default=0)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('total_pending', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('assigned_count', models.IntegerField(default=0)),
+                ('assignment_time_total', models.FloatField(default=0)),
+                ('failure_reasons', models.JSONField(default=dict)),
+                ('active_workers', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('run', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='delivery.assignmentrun')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', ['queued', 'running'])), fields=['id'], name='assignment_job_open_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:18
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+# Same rules as delivery.items.item_summary, in one statement
+BACKFILL_ITEM_SUMMARY = """
+UPDATE delivery_order SET
+    item_count = CASE WHEN jsonb_typeof(items) = 'array' THEN jsonb_array_length(items) ELSE 0 END,
+    item_names = ARRAY(
+        SELECT left(item ->> 'name', 100)
+        FROM jsonb_array_elements(CASE WHEN jsonb_typeof(items) = 'array' THEN items ELSE '[]'::jsonb END)
+            WITH ORDINALITY AS elements(item, position)
+        WHERE jsonb_typeof(item -> 'name') = 'string'
+        ORDER BY position
+    )
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0011_assignmentjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), blank=True, default=list, size=None),
+        ),
+        migrations.RunSQL(BACKFILL_ITEM_SUMMARY, migrations.RunSQL.noop),
+    ]
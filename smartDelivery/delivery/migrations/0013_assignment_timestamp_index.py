@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0012_order_item_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['timestamp', 'id'], name='assignment_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+# Deletes record their ids in delivery_tombstone from the statement's
+# transition table: one INSERT per DELETE, whether it comes from the API,
+# a cascade or the admin
+TOMBSTONE_FUNCTION = """
+CREATE FUNCTION delivery_record_tombstones() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO delivery_tombstone (model, object_id, deleted_at)
+    SELECT TG_ARGV[0], id, now() FROM deleted_rows;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+TOMBSTONE_TABLES = [
+    ('partner', 'delivery_deliverypartner'),
+    ('order', 'delivery_order'),
+    ('assignment', 'delivery_assignment'),
+]
+
+TOMBSTONE_TRIGGERS = [
+    f"CREATE TRIGGER {model}_tombstones AFTER DELETE ON {table} "
+    f"REFERENCING OLD TABLE AS deleted_rows FOR EACH STATEMENT "
+    f"EXECUTE PROCEDURE delivery_record_tombstones('{model}');"
+    for model, table in TOMBSTONE_TABLES
+]
+
+DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS {model}_tombstones ON {table};"
+    for model, table in TOMBSTONE_TABLES
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0013_assignment_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('partner', 'Partner'), ('order', 'Order'), ('assignment', 'Assignment')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='deliverypartner',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='deliverypartner',
+            index=models.Index(fields=['last_updated', 'id'], name='partner_last_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['last_updated', 'id'], name='order_last_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ),
+        migrations.RunSQL(
+            [TOMBSTONE_FUNCTION, *TOMBSTONE_TRIGGERS],
+            [*DROP_TRIGGERS, "DROP FUNCTION IF EXISTS delivery_record_tombstones();"],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0014_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentjob',
+            name='phase_seconds',
+            field=models.JSONField(default=dict),
+        ),
+    ]
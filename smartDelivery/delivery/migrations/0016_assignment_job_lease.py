@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0015_assignment_job_phase_seconds'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='assignmentjob',
+            name='active_workers',
+        ),
+        migrations.CreateModel(
+            name='AssignmentJobLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('heartbeat_at', models.DateTimeField()),
+                ('chunk_start', models.BigIntegerField(blank=True, null=True)),
+                ('chunk_end', models.BigIntegerField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leases', to='delivery.assignmentjob')),
+            ],
+        ),
+    ]
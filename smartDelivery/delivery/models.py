@@ -1,5 +1,14 @@
+from typing import Optional
+
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+
+from .items import ITEM_NAME_MAX_LENGTH, item_summary
+
+# A partner never carries more than this many active orders.
+MAX_PARTNER_LOAD = 3
+
 
 class DeliveryPartner(models.Model):
     STATUS_CHOICES = [('active', 'Active'), ('inactive', 'Inactive')]
@@ -8,7 +17,7 @@ class DeliveryPartner(models.Model):
     email = models.EmailField(unique=True, max_length=100)
     phone = models.CharField(max_length=15)
     status = models.CharField(max_length=8, choices=STATUS_CHOICES)
-    current_load = models.IntegerField(default=0)  # max: 3
+    current_load = models.IntegerField(default=0)  # max: MAX_PARTNER_LOAD
     areas = models.JSONField(blank=True, null=True)  # List of strings
 
     # Store shift times as separate char fields; expose them via a property.
@@ -20,6 +29,33 @@ class DeliveryPartner(models.Model):
     completed_orders = models.IntegerField(default=0)
     cancelled_orders = models.IntegerField(default=0)
 
+    # Last known GPS fix as [latitude, longitude], same layout as Order.position
+    position = ArrayField(
+        base_field=models.FloatField(),
+        size=2,
+        blank=True,
+        null=True,
+        help_text="Last known GPS coordinates as [latitude, longitude]"
+    )
+    position_updated_at = models.DateTimeField(null=True, blank=True)
+    # Bulk F() updates bypass auto_now and set this themselves
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # ?updated_since= delta queries, paged on (last_updated, id)
+            models.Index(fields=['last_updated', 'id'], name='partner_last_updated_idx'),
+            # Serves `areas @> '["<area>"]'` containment lookups
+            GinIndex(fields=['areas'], name='partner_areas_gin', opclasses=['jsonb_path_ops']),
+            # Only partners that can still take an order, which is all the matcher scans
+            GinIndex(
+                fields=['areas'],
+                name='partner_available_areas_gin',
+                opclasses=['jsonb_path_ops'],
+                condition=models.Q(status='active', current_load__lt=MAX_PARTNER_LOAD),
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -44,6 +80,9 @@ class Order(models.Model):
     customer_phone = models.CharField(max_length=15)
     delivery_area = models.CharField(max_length=100)
     items = models.JSONField()  # List of objects with name, quantity, price
+    # Kept in step with `items` on save so list views never decode the blob
+    item_count = models.IntegerField(default=0)
+    item_names = ArrayField(models.CharField(max_length=ITEM_NAME_MAX_LENGTH), default=list, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     scheduled_time = models.DateTimeField(null=True, blank=True)  
     assigned_to = models.ForeignKey(DeliveryPartner, null=True, blank=True, on_delete=models.SET_NULL)
@@ -59,8 +98,28 @@ class Order(models.Model):
         help_text="GPS coordinates as [latitude, longitude]"
     )
 
+    class Meta:
+        indexes = [
+            # List filtering by status plus the newest-first cursor ordering
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+            # Trends range scans on the scheduled day
+            models.Index(fields=['scheduled_time'], name='order_scheduled_time_idx'),
+            # ?updated_since= delta queries, paged on (last_updated, id)
+            models.Index(fields=['last_updated', 'id'], name='order_last_updated_idx'),
+            # The assignment run's `status='pending' ORDER BY id` scan
+            models.Index(fields=['id'], name='order_pending_idx', condition=models.Q(status='pending')),
+        ]
+
     def __str__(self):
         return self.order_number
+
+    def save(self, *args, **kwargs):
+        self.item_count, self.item_names = item_summary(self.items)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'items' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'item_count', 'item_names'}
+        super().save(*args, **kwargs)
     
 
 class Assignment(models.Model):
@@ -70,46 +129,158 @@ class Assignment(models.Model):
     ]
 
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
-    partner = models.ForeignKey(DeliveryPartner, on_delete=models.CASCADE)
+    partner = models.ForeignKey(DeliveryPartner, null=True, blank=True, on_delete=models.CASCADE)
     timestamp = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=7, choices=STATUS_CHOICES)
     reason = models.CharField(max_length=255, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages and exports of the assignment list, newest first
+            models.Index(fields=['timestamp', 'id'], name='assignment_timestamp_idx'),
+        ]
+
     def __str__(self):
-        return f"Assignment: {self.order.order_number} -> {self.partner.name}"
+        partner_name = self.partner.name if self.partner_id else 'unassigned'
+        return f"Assignment: {self.order.order_number} -> {partner_name}"
 
     @property
     def orderId(self) -> str:
         return self.order.order_number
 
     @property
-    def partnerId(self) -> str:
-        return str(self.partner.id)
+    def partnerId(self) -> Optional[str]:
+        # Failed assignments have no partner
+        return str(self.partner_id) if self.partner_id else None
 
     @property
     def orderDetails(self) -> dict:
-        item_names = [item['name'] for item in self.order.items if 'name' in item]
-
         return {
-            'items': item_names,
+            'items': self.order.item_names,
             'total': float(self.order.total_amount),
             'destination': self.order.delivery_area,
         }
 
     @property
-    def partnerDetails(self) -> dict:
+    def partnerDetails(self) -> Optional[dict]:
+        if not self.partner_id:
+            return None
         return {
             'name': self.partner.name,
             'phone': self.partner.phone,
             'rating': self.partner.rating,
         } 
 
-class AssignmentMetrics(models.Model):
+class Tombstone(models.Model):
+    # A deleted partner, order or assignment, kept so ?updated_since= polls
+    # can report it. Written by database triggers (migration 0014) on every
+    # delete; pruned after TOMBSTONE_RETENTION_DAYS
+    MODEL_CHOICES = [
+        ('partner', 'Partner'),
+        ('order', 'Order'),
+        ('assignment', 'Assignment'),
+    ]
+
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
+
+
+class DailyOrderStats(models.Model):
+    # Per-day, per-area rollup of orders by scheduled day; kept in step with
+    # Order writes by delivery.rollups and rebuilt by `backfill_order_stats`
+    date = models.DateField()
+    area = models.CharField(max_length=100)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'area'], name='daily_order_stats_date_area'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.area}: {self.orders} orders"
+
+
+class AssignmentRun(models.Model):
+    # One row per assignment run; the metrics history is read from here
+    timestamp = models.DateTimeField(auto_now_add=True)
+    strategy = models.CharField(max_length=20, default='greedy')
+    total_pending = models.IntegerField(default=0)
     total_assigned = models.IntegerField(default=0)
     success_rate = models.FloatField(default=0)
     average_time = models.FloatField(default=0)
-    failure_reasons = models.JSONField(default=list)  # List of objects: [{'reason': str, 'count': int}]
-    historical_data = models.JSONField(default=list)  # List of snapshots: [{'timestamp': <datetime>, 'successRate': <float>, 'averageTime': <float>, 'totalAssigned': <int>}]
 
     def __str__(self):
-        return "Assignment Metrics"
+        return f"Assignment run {self.id} ({self.timestamp:%Y-%m-%d %H:%M})"
+
+
+class FailureReasonCount(models.Model):
+    # Running total of failed assignments per reason, bumped with F() after each run
+    reason = models.CharField(max_length=255, unique=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.reason}: {self.count}"
+
+
+class AssignmentJob(models.Model):
+    # A queued assignment run, worked through in order-id chunks by one or more workers
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    strategy = models.CharField(max_length=20, default='greedy')
+    # Pending orders up to this id when the job was queued belong to it
+    last_order_id = models.BigIntegerField(default=0)
+    # Highest order id already handed to a worker
+    cursor = models.BigIntegerField(default=0)
+    total_pending = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    assigned_count = models.IntegerField(default=0)
+    assignment_time_total = models.FloatField(default=0)
+    failure_reasons = models.JSONField(default=dict)
+    # Seconds of work per run phase, summed over every chunk and worker
+    phase_seconds = models.JSONField(default=dict)
+    error = models.TextField(blank=True, default='')
+    run = models.OneToOneField(AssignmentRun, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers look for the oldest unfinished job
+            models.Index(fields=['id'], name='assignment_job_open_idx',
+                         condition=models.Q(status__in=['queued', 'running'])),
+        ]
+
+    def __str__(self):
+        return f"Assignment job {self.id} ({self.status})"
+
+
+class AssignmentJobLease(models.Model):
+    # One worker's hold on an assignment job, renewed with every chunk. A
+    # lease older than ASSIGNMENT_JOB_LEASE_SECONDS belongs to a worker that
+    # died; the next worker to claim the job takes it over, chunk included
+    job = models.ForeignKey(AssignmentJob, on_delete=models.CASCADE, related_name='leases')
+    heartbeat_at = models.DateTimeField()
+    # Pending order ids in (chunk_start, chunk_end] handed to the worker and not yet committed
+    chunk_start = models.BigIntegerField(null=True, blank=True)
+    chunk_end = models.BigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Lease {self.id} on assignment job {self.job_id}"
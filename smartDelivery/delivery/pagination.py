@@ -0,0 +1,118 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    # isoformat keeps microseconds, so equal timestamps stay equal after a round trip
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination, newest first on ``(created_at, id)``.
+
+    The cursor holds the whole sort key of the row it points at, and the
+    next page is the rows strictly after that key, so pages stay correct
+    however many rows share a timestamp. The last ordering field must be
+    unique; ``id`` is appended when it is not already there.
+
+    Views whose model has no ``created_at`` set ``cursor_ordering`` to their
+    own stable key.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(getattr(view, 'cursor_ordering', self.ordering))
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        position, self.reverse = self.decode_cursor(request)
+
+        # Going backwards reads the rows before the cursor in reverse order
+        ordering = self._reversed(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                # A value that does not fit its field
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        self.page = rows[:self.page_size]
+        more = len(rows) > self.page_size
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, more
+        else:
+            self.has_next, self.has_previous = more, position is not None
+        if (self.has_next or self.has_previous) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _reversed(self, ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    def _after(self, ordering, position):
+        """Rows that sort after ``position`` in ``ordering``: (a > x) OR (a = x AND b > y) ..."""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            ties = {other.lstrip('-'): position[i] for i, other in enumerate(ordering[:index])}
+            condition |= Q(**ties, **{f'{name}__{lookup}': position[index]})
+        return condition
+
+    def _position(self, row):
+        return [
+            _encode_value(row[name] if isinstance(row, dict) else getattr(row, name))
+            for name in (field.lstrip('-') for field in self.ordering)
+        ]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        """``(position, reverse)`` from the request's cursor, ``(None, False)`` without one."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            position, reverse = cursor['p'], bool(cursor.get('r'))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        encoded = b64encode(json.dumps(cursor, separators=(',', ':')).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
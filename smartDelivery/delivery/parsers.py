@@ -0,0 +1,39 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MalformedLine:
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses ``application/x-ndjson`` bodies into a list, one item per
+    non-blank line. A line that fails to decode becomes a ``MalformedLine``
+    so the view can report it without dropping the rest of the batch.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            lines = codecs.getreader(encoding)(stream)
+            rows = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as e:
+                    rows.append(MalformedLine(f'Invalid JSON: {e}'))
+            return rows
+        except UnicodeDecodeError as e:
+            raise ParseError(f'NDJSON parse error - {e}')
@@ -0,0 +1,72 @@
+import json
+import math
+import re
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+# Python writes exponent floats as 1e-07 / 1e+16 and orjson as 1e-7 / 1e16.
+# Output that might hold one is re-encoded with the stdlib to stay identical.
+_EXPONENT = re.compile(rb'[0-9]e[-+]?[0-9]')
+
+_encoder = JSONEncoder()
+
+
+def _escape_separators(data):
+    # DRF escapes the JS line separators; orjson leaves them raw
+    return data.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _has_non_finite(data):
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def dumps(data):
+    """
+    Encode ``data`` exactly as DRF's compact ``JSONRenderer`` would, using
+    orjson when it is installed. Returns bytes.
+    """
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            ret = None
+        # orjson writes NaN and infinities as null where DRF refuses them;
+        # a null in the output is the only sign one might have been there
+        if ret is not None and not _EXPONENT.search(ret) and not (b'null' in ret and _has_non_finite(data)):
+            return _escape_separators(ret)
+    ret = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with the same bytes out, encoded by orjson when available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent or not api_settings.COMPACT_JSON or not api_settings.UNICODE_JSON:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,56 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyOrderStats
+
+
+def order_bucket(scheduled_time, area):
+    """The ``(date, area)`` rollup row an order counts towards, or None if unscheduled."""
+    if scheduled_time is None:
+        return None
+    return timezone.localdate(scheduled_time), area
+
+
+def apply_delta(date, area, orders, revenue):
+    """Add ``orders``/``revenue`` to one rollup row, creating it on first use."""
+    if not orders and not revenue:
+        return
+    updated = DailyOrderStats.objects.filter(date=date, area=area).update(
+        orders=F('orders') + orders, revenue=F('revenue') + revenue
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DailyOrderStats.objects.create(date=date, area=area, orders=orders, revenue=revenue)
+    except IntegrityError:
+        # Created concurrently; add to it instead
+        DailyOrderStats.objects.filter(date=date, area=area).update(
+            orders=F('orders') + orders, revenue=F('revenue') + revenue
+        )
+
+
+def apply_deltas(deltas):
+    """Apply ``{(date, area): [orders, revenue]}``, one statement per rollup row."""
+    for (date, area), (orders, revenue) in deltas.items():
+        apply_delta(date, area, orders, revenue)
+
+
+def order_deltas(removed=(), added=()):
+    """
+    Rollup changes for orders leaving (``removed``) and entering (``added``)
+    the table, each given as ``(scheduled_time, area, total_amount)``.
+    """
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for sign, rows in ((-1, removed), (1, added)):
+        for scheduled_time, area, total in rows:
+            bucket = order_bucket(scheduled_time, area)
+            if bucket is None:
+                continue
+            deltas[bucket][0] += sign
+            deltas[bucket][1] += sign * Decimal(total or 0)
+    return deltas
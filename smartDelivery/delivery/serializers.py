@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import DeliveryPartner, Order, Assignment, AssignmentMetrics
+from .items import items_total, normalize_items
+from .models import DeliveryPartner, Order, Assignment, AssignmentJob, AssignmentRun, FailureReasonCount
 
 class DeliveryPartnerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,9 +9,24 @@ class DeliveryPartnerSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
+    # Worked out from the items when the client leaves it out
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
     class Meta:
         model = Order
         fields = '__all__'
+        read_only_fields = ['item_count', 'item_names']
+
+    def validate_items(self, value):
+        items, error = normalize_items(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return items
+
+    def validate(self, attrs):
+        if 'total_amount' not in attrs and (self.instance is None or 'items' in attrs):
+            attrs['total_amount'] = items_total(attrs.get('items', []))
+        return attrs
 
 
 class AssignmentSerializer(serializers.ModelSerializer):
@@ -34,12 +50,44 @@ class AssignmentSerializer(serializers.ModelSerializer):
             'partnerDetails',
         ]
 
-class AssignmentMetricsSerializer(serializers.ModelSerializer):
+class AssignmentRunSerializer(serializers.ModelSerializer):
+    # One entry of the metrics history
     class Meta:
-        model = AssignmentMetrics
-        fields = '__all__'
+        model = AssignmentRun
+        fields = ['timestamp', 'average_time', 'success_rate', 'total_assigned']
 
-class AssignmentMetricsSerializer(serializers.ModelSerializer):
+
+class FailureReasonCountSerializer(serializers.ModelSerializer):
     class Meta:
-        model = AssignmentMetrics
-        fields = '__all__'
+        model = FailureReasonCount
+        fields = ['reason', 'count']
+
+
+class AssignmentJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AssignmentJob
+        fields = [
+            'id',
+            'status',
+            'strategy',
+            'total_pending',
+            'processed',
+            'assigned_count',
+            'progress',
+            'phase_seconds',
+            'error',
+            'run',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+
+    def get_progress(self, obj):
+        # Percentage of the queued orders handled so far
+        if obj.status == 'completed':
+            return 100.0
+        if not obj.total_pending:
+            return 0.0
+        return round(min(obj.processed / obj.total_pending, 1) * 100, 1)
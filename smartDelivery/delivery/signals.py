@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .availability import partner_index
+from .models import DeliveryPartner, Order
+from .rollups import apply_deltas, order_deltas
+
+# Order fields the daily rollup is keyed and summed on
+ROLLUP_FIELDS = ('scheduled_time', 'delivery_area', 'total_amount')
+
+
+@receiver(post_save, sender=DeliveryPartner)
+def index_partner(sender, instance, **kwargs):
+    partner_index.update_partner(instance)
+
+
+@receiver(post_delete, sender=DeliveryPartner)
+def unindex_partner(sender, instance, **kwargs):
+    partner_index.remove_partner(instance.pk)
+
+
+@receiver(pre_delete, sender=DeliveryPartner)
+def touch_partner_orders(sender, instance, **kwargs):
+    # The delete nulls assigned_to with a plain UPDATE; stamp the orders so
+    # ?updated_since= polls pick the change up
+    Order.objects.filter(assigned_to=instance).update(last_updated=timezone.now())
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_rollup(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(ROLLUP_FIELDS):
+        return
+    before = Order.objects.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        # Hold the row until the save lands so concurrent edits cannot both
+        # subtract the same old values
+        before = before.select_for_update()
+    instance._rollup_before = before.values_list(*ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Order)
+def rollup_saved_order(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and not set(update_fields) & set(ROLLUP_FIELDS):
+        return
+    before = getattr(instance, '_rollup_before', None)
+    after = (instance.scheduled_time, instance.delivery_area, instance.total_amount)
+    apply_deltas(order_deltas(removed=[before] if before else [], added=[after]))
+
+
+@receiver(post_delete, sender=Order)
+def rollup_deleted_order(sender, instance, **kwargs):
+    before = (instance.scheduled_time, instance.delivery_area, instance.total_amount)
+    apply_deltas(order_deltas(removed=[before]))
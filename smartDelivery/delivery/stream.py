@@ -0,0 +1,144 @@
+import asyncio
+import queue
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .events import HEARTBEAT_FRAME, HEARTBEAT_SECONDS, broker
+
+STREAM_PATH = '/api/stream/'
+
+# Tells EventSource to reconnect after this many milliseconds
+RETRY_FRAME = b'retry: 3000\n\n'
+
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Keep nginx and similar proxies from buffering the stream
+    'X-Accel-Buffering': 'no',
+}
+
+
+def last_event_id(header, params):
+    # EventSource resends the last id as a header; polyfills use a query parameter
+    return header or params.get('last_event_id')
+
+
+# GET /api/stream/ under WSGI (and runserver): one thread per open stream,
+# which would leave a sync worker unable to serve anything else. Only
+# served with EVENT_STREAM_WSGI (on under DEBUG, for runserver). Under ASGI
+# the route is served by `sse_app` instead.
+def event_stream(request):
+    if not getattr(settings, 'EVENT_STREAM_WSGI', settings.DEBUG):
+        # EventSource gives up on a non-200 response instead of reconnecting
+        return JsonResponse({'detail': 'The event stream is only served over ASGI.'}, status=503)
+    subscription, replay = broker.subscribe(
+        last_event_id=last_event_id(request.headers.get('Last-Event-ID'), request.GET)
+    )
+
+    def frames():
+        try:
+            yield RETRY_FRAME
+            yield from replay
+            while True:
+                try:
+                    frame = subscription.queue.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    frame = HEARTBEAT_FRAME
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(frames(), content_type='text/event-stream')
+    for name, value in STREAM_HEADERS.items():
+        response[name] = value
+    return response
+
+
+def cors_headers(request_headers):
+    # The stream bypasses Django's middleware, so apply the CORS settings here
+    origin = request_headers.get('origin')
+    allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', ())
+    if not origin or not allowed:
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode())]
+    if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+async def sse_app(scope, receive, send):
+    """
+    ``GET /api/stream/`` as a bare ASGI app. An idle stream costs one small
+    task and a queue, with no thread and no database connection, so a
+    worker can hold thousands of them. Client disconnects are noticed
+    straight away, which Django 4.2's ASGI handler does not do for
+    streaming responses.
+    """
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    if scope['method'] != 'GET':
+        await send({
+            'type': 'http.response.start',
+            'status': 405,
+            'headers': [(b'content-type', b'application/json'), (b'allow', b'GET')],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail":"Method not allowed."}'})
+        return
+
+    params = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+    subscription, replay = broker.subscribe(
+        loop=asyncio.get_running_loop(),
+        last_event_id=last_event_id(request_headers.get('last-event-id'), params),
+    )
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscription.push(None)
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                *((name.lower().encode(), value.encode()) for name, value in STREAM_HEADERS.items()),
+                *cors_headers(request_headers),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': RETRY_FRAME + b''.join(replay), 'more_body': True})
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                frame = HEARTBEAT_FRAME
+            if frame is None or watcher.done():
+                break
+            await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+        if not watcher.done():
+            # Fell too far behind: end the stream so the client reconnects and resumes
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        broker.unsubscribe(subscription)
+
+
+async def not_found(scope, receive, send):
+    # Everything but the stream, in a process that serves only the stream
+    if scope['type'] != 'http':
+        raise ValueError(f"Unsupported scope type {scope['type']!r}.")
+    await send({'type': 'http.response.start', 'status': 404, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': b'{"detail":"Not found."}'})
+
+
+def with_event_stream(django_app):
+    """Wrap the Django ASGI app so ``STREAM_PATH`` is served by ``sse_app``."""
+    async def application(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+            await sse_app(scope, receive, send)
+        else:
+            await django_app(scope, receive, send)
+    return application
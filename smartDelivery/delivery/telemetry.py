@@ -0,0 +1,190 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Upper bounds of the per-request SQL query count buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class Counter:
+    """Monotonic count per label set."""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield f'{self.name}{_labels(self.labels, label_values)} {_format_value(value)}'
+
+
+class Histogram:
+    """
+    Bucketed observations per label set, rendered with cumulative ``le``
+    buckets plus ``_sum`` and ``_count`` as Prometheus expects.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for label_values, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _labels(self.labels, label_values, [('le', _format_value(float(bound)))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labels, label_values)} {_format_value(float(total))}'
+            yield f'{self.name}_count{_labels(self.labels, label_values)} {count}'
+
+
+class Gauge:
+    """A value read from ``callback`` at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def samples(self):
+        yield f'{self.name} {_format_value(self.callback())}'
+
+
+class Registry:
+    """
+    This process's metrics. Each process keeps its own, so every web or
+    worker process is a separate scrape target, as with any Prometheus
+    client library.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_count = registry.register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status code.', ('route', 'method', 'status'),
+))
+request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route.', ('route', 'method'),
+))
+request_queries = registry.register(Histogram(
+    'http_request_db_queries', 'SQL queries run per request, by route.', ('route', 'method'),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+request_db_time = registry.register(Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request, by route.', ('route', 'method'),
+))
+assignment_phase_duration = registry.register(Histogram(
+    'assignment_phase_seconds', 'Time spent in each phase of an assignment run.', ('phase', 'strategy'),
+))
+assignment_orders = registry.register(Counter(
+    'assignment_orders_total', 'Pending orders handled by assignment runs, by outcome.', ('strategy', 'outcome'),
+))
+
+
+def observe_request(route, method, status_code, seconds, queries, db_seconds):
+    request_count.inc(route, method, str(status_code))
+    request_duration.observe(seconds, route, method)
+    request_queries.observe(queries, route, method)
+    request_db_time.observe(db_seconds, route, method)
+
+
+@contextmanager
+def phase_timer(phase, strategy, result=None):
+    """
+    Time the enclosed block as ``phase`` of an assignment run. The seconds
+    are also added to ``result.phase_seconds`` when a result is given.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        assignment_phase_duration.observe(elapsed, phase, strategy)
+        if result is not None:
+            result.add_phase(phase, elapsed)
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` that counts and times the queries run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
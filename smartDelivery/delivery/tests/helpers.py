@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from delivery.models import DeliveryPartner, Order
+
+
+def make_partner(index=1, **fields):
+    values = {
+        'name': f'Partner {index}',
+        'email': f'partner-{index}@example.com',
+        'phone': '9000000000',
+        'status': 'active',
+        'areas': ['North'],
+        'shift_start': '00:00',
+        'shift_end': '23:59',
+    }
+    values.update(fields)
+    return DeliveryPartner.objects.create(**values)
+
+
+def make_orders(count, **fields):
+    """Create ``count`` orders with one bulk insert, skipping the model signals."""
+    orders = []
+    for index in range(count):
+        values = {
+            'order_number': f'ORD-{index + 1:06d}',
+            'customer_name': 'Customer',
+            'customer_phone': '8000000000',
+            'delivery_area': 'North',
+            'items': [{'name': 'Pizza', 'quantity': 1, 'price': 12.0}],
+            'item_count': 1,
+            'item_names': ['Pizza'],
+            'total_amount': Decimal('12.00'),
+        }
+        values.update(fields)
+        orders.append(Order(**values))
+    return Order.objects.bulk_create(orders)
+
+
+def make_order(index=1, **fields):
+    """Create one order through ``save()``, so the model signals run."""
+    values = {
+        'order_number': f'ORD-{index:06d}',
+        'customer_name': 'Customer',
+        'customer_phone': '8000000000',
+        'delivery_area': 'North',
+        'items': [{'name': 'Pizza', 'quantity': 1, 'price': 12.0}],
+        'total_amount': Decimal('12.00'),
+    }
+    values.update(fields)
+    return Order.objects.create(**values)
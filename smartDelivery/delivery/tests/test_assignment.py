@@ -0,0 +1,68 @@
+import threading
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from delivery.assignment import claim_partner, eligible_partners
+from delivery.availability import partner_index
+from delivery.models import MAX_PARTNER_LOAD, DeliveryPartner
+
+from .helpers import make_partner
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    workers = 12
+
+    def setUp(self):
+        self.partner = make_partner()
+        partner_index.invalidate()
+
+    def tearDown(self):
+        partner_index.invalidate()
+
+    def test_partner_never_goes_past_capacity(self):
+        barrier = threading.Barrier(self.workers)
+        claimed, errors = [], []
+
+        def assign():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    partner = claim_partner('North')
+                    if partner is not None:
+                        claimed.append(partner.current_load)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=assign) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.partner.refresh_from_db()
+        self.assertLessEqual(self.partner.current_load, MAX_PARTNER_LOAD)
+        self.assertEqual(self.partner.current_load, MAX_PARTNER_LOAD)
+        self.assertEqual(sorted(claimed), list(range(1, MAX_PARTNER_LOAD + 1)))
+
+
+class AreaIndexTests(TestCase):
+    """The ``areas @> [...]`` lookups must be able to use the GIN indexes."""
+
+    def setUp(self):
+        for index in range(1, 6):
+            make_partner(index, areas=['North', f'Area {index}'])
+        with connection.cursor() as cursor:
+            # Tiny tables are cheaper to scan; take that option away
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_area_lookup_uses_gin_index(self):
+        plan = DeliveryPartner.objects.filter(areas__contains=['North']).explain()
+        self.assertIn('partner_areas_gin', plan)
+
+    def test_eligible_partners_uses_partial_gin_index(self):
+        plan = eligible_partners('North').explain()
+        self.assertIn('partner_available_areas_gin', plan)
@@ -0,0 +1,123 @@
+import threading
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from delivery.assignment import claim_partner
+from delivery.availability import partner_index
+from delivery.models import MAX_PARTNER_LOAD, DeliveryPartner
+
+from .helpers import make_partner
+
+
+class AvailabilityIndexTests(TestCase):
+    def setUp(self):
+        partner_index.invalidate()
+        self.addCleanup(partner_index.invalidate)
+
+    def test_least_loaded_first_without_a_position(self):
+        busy = make_partner(1, current_load=2)
+        idle = make_partner(2, current_load=0)
+        make_partner(3, current_load=MAX_PARTNER_LOAD)
+        make_partner(4, status='inactive')
+        make_partner(5, areas=['South'])
+
+        self.assertEqual(partner_index.candidates('North'), [idle.pk, busy.pk])
+
+    def test_nearest_first_with_a_position(self):
+        far = make_partner(1, position=[13.20, 77.60])
+        near = make_partner(2, current_load=2, position=[12.91, 77.60])
+        unplaced = make_partner(3)
+
+        self.assertEqual(partner_index.candidates('North', [12.90, 77.60]), [near.pk, far.pk, unplaced.pk])
+
+    def test_follows_saves_and_deletes(self):
+        partner = make_partner(1, position=[12.90, 77.60])
+        other = make_partner(2)
+        self.assertEqual(partner_index.candidates('North'), [partner.pk, other.pk])
+
+        partner.current_load = MAX_PARTNER_LOAD
+        partner.save()
+        self.assertEqual(partner_index.candidates('North', [12.90, 77.60]), [other.pk])
+
+        partner.current_load = 0
+        partner.areas = ['South']
+        partner.save()
+        self.assertEqual(partner_index.candidates('North'), [other.pk])
+        self.assertEqual(partner_index.candidates('South'), [partner.pk])
+
+        other.delete()
+        self.assertEqual(partner_index.candidates('North'), [])
+
+    def test_rebuild_picks_up_writes_from_elsewhere(self):
+        partner = make_partner(1)
+        self.assertEqual(partner_index.candidates('North'), [partner.pk])
+        # A bulk update sends no signals, as a write from another process would not
+        DeliveryPartner.objects.filter(pk=partner.pk).update(areas=['South'])
+        self.assertEqual(partner_index.candidates('North'), [partner.pk])
+
+        with self.settings(PARTNER_INDEX_TTL=0):
+            self.assertEqual(partner_index.candidates('North'), [])
+            self.assertEqual(partner_index.candidates('South'), [partner.pk])
+
+
+class ClaimPartnerTests(TestCase):
+    def setUp(self):
+        partner_index.invalidate()
+        self.addCleanup(partner_index.invalidate)
+
+    def test_drops_index_entries_that_are_no_longer_eligible(self):
+        stale = make_partner(1, position=[12.90, 77.60])
+        other = make_partner(2, position=[12.99, 77.60])
+        partner_index.candidates('North')
+        DeliveryPartner.objects.filter(pk=stale.pk).update(status='inactive')
+
+        with transaction.atomic():
+            self.assertEqual(claim_partner('North', [12.90, 77.60]).pk, other.pk)
+        self.assertNotIn(stale.pk, partner_index.candidates('North'))
+
+    def test_fallback_keeps_nearest_then_least_loaded_order(self):
+        far = make_partner(1, current_load=1, position=[13.30, 77.60])
+        near = make_partner(2, current_load=2, position=[12.95, 77.60])
+        unplaced = make_partner(3, current_load=1)
+        idle = make_partner(4, position=[13.20, 77.60])
+
+        with mock.patch.object(partner_index, 'candidates', return_value=[]), transaction.atomic():
+            self.assertEqual(claim_partner('North', [12.90, 77.60]).pk, near.pk)
+            self.assertEqual(claim_partner('North').pk, idle.pk)
+            claimed = [claim_partner('North', [12.90, 77.60]).pk for _ in range(3)]
+        # near is full now; then by distance, partners without a position last
+        self.assertEqual(claimed, [idle.pk, idle.pk, far.pk])
+        self.assertEqual(DeliveryPartner.objects.get(pk=unplaced.pk).current_load, 1)
+
+
+class LockedPartnerTests(TransactionTestCase):
+    def setUp(self):
+        self.locked = make_partner(1, position=[12.90, 77.60])
+        self.other = make_partner(2, position=[12.99, 77.60])
+        partner_index.invalidate()
+        self.addCleanup(partner_index.invalidate)
+
+    def test_locked_partner_stays_indexed(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    DeliveryPartner.objects.select_for_update().get(pk=self.locked.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            with transaction.atomic():
+                self.assertEqual(claim_partner('North', [12.90, 77.60]).pk, self.other.pk)
+            self.assertEqual(partner_index.candidates('North', [12.90, 77.60])[0], self.locked.pk)
+        finally:
+            release.set()
+            thread.join()
@@ -0,0 +1,100 @@
+import threading
+from unittest import mock
+
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from rest_framework.test import APITestCase
+
+from delivery.dispatcher import AreaDispatcher, dispatcher
+from delivery.models import Assignment, Order
+
+from .helpers import make_order, make_orders, make_partner
+
+
+class DebounceTests(TransactionTestCase):
+    def test_nothing_is_scheduled_when_disabled(self):
+        areas = AreaDispatcher()
+        with override_settings(AUTO_ASSIGN=False):
+            areas.schedule(['North'])
+        self.assertIsNone(areas._thread)
+        self.assertEqual(areas._areas, set())
+
+    @override_settings(AUTO_ASSIGN=True, AUTO_ASSIGN_DEBOUNCE_MS=100)
+    def test_a_burst_of_events_is_one_dispatch(self):
+        areas = AreaDispatcher()
+        calls = []
+        done = threading.Event()
+
+        def dispatch(batch):
+            calls.append(batch)
+            done.set()
+
+        with mock.patch.object(areas, 'dispatch', dispatch):
+            areas.schedule(['North'])
+            areas.schedule(['South', None, 3])
+            areas.schedule(['North'])
+            self.assertTrue(done.wait(5))
+            self.assertEqual(calls, [{'North', 'South'}])
+
+            # The thread is reused for the next burst
+            done.clear()
+            thread = areas._thread
+            areas.schedule(['East'])
+            self.assertTrue(done.wait(5))
+            self.assertEqual(calls[1:], [{'East'}])
+            self.assertIs(areas._thread, thread)
+
+    def test_only_the_dispatched_areas_are_matched(self):
+        make_partner(1, areas=['North'])
+        make_partner(2, areas=['South'])
+        north = make_orders(2)
+        south = [make_order(index, delivery_area='South') for index in (3, 4)]
+
+        AreaDispatcher().dispatch({'North'})
+
+        self.assertEqual(
+            set(Order.objects.filter(status='assigned').values_list('id', flat=True)),
+            {order.pk for order in north})
+        self.assertEqual(Order.objects.filter(pk__in=[order.pk for order in south], status='pending').count(), 2)
+        self.assertFalse(Assignment.objects.filter(status='failed').exists())
+
+    def test_failures_are_logged(self):
+        with mock.patch('delivery.dispatcher.run_batch_assignment', side_effect=RuntimeError('boom')):
+            with self.assertLogs('delivery.dispatcher', 'ERROR') as logs:
+                AreaDispatcher().dispatch({'South', 'North'})
+        self.assertIn("['North', 'South']", logs.output[0])
+
+
+class ScheduleTriggerTests(APITestCase):
+    def setUp(self):
+        patcher = mock.patch.object(dispatcher, 'schedule')
+        self.schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_new_order_schedules_its_area_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/orders/', {
+                'order_number': 'ORD-NEW',
+                'customer_name': 'Customer',
+                'customer_phone': '8000000000',
+                'delivery_area': 'West',
+                'items': [{'name': 'Pizza', 'quantity': 1, 'price': 12.0}],
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.schedule.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        self.schedule.assert_called_once_with(['West'])
+
+    def test_delivered_orders_schedule_the_partners_areas(self):
+        partner = make_partner(areas=['North', 'East'])
+        order = make_orders(1, status='assigned', assigned_to=partner)[0]
+        partner.current_load = 1
+        partner.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/orders/bulk_status/', {
+                'order_ids': [order.pk], 'status': 'delivered'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(self.schedule.call_args[0][0]), {'North', 'East'})
@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from delivery.geo import GridIndex, haversine_km
+
+
+class GridIndexTests(SimpleTestCase):
+    """``GridIndex.nearest`` against a brute-force scan of every point."""
+
+    def build(self, points):
+        index = GridIndex()
+        for key, (lat, lon) in enumerate(points):
+            index.insert(key, lat, lon)
+        return index
+
+    def assertNearest(self, points, queries, k, accept=None, max_km=None):
+        index = self.build(points)
+        keys = np.array([key for key in range(len(points)) if accept is None or accept(key)])
+        lats = np.array([points[key][0] for key in keys])
+        lons = np.array([points[key][1] for key in keys])
+        for lat, lon in queries:
+            dists = haversine_km(lat, lon, lats, lons)
+            expected = np.sort(dists)[:k]
+            if max_km is not None:
+                expected = expected[expected <= max_km]
+            found = index.nearest(lat, lon, k=k, accept=accept, max_km=max_km)
+            np.testing.assert_allclose([dist for _, dist in found], expected, atol=1e-9)
+            for key, dist in found:
+                self.assertAlmostEqual(dist, float(haversine_km(lat, lon, [points[key][0]], [points[key][1]])[0]))
+
+    def test_city_cluster(self):
+        rng = random.Random(1)
+        points = [(12.97 + rng.gauss(0, 0.1), 77.59 + rng.gauss(0, 0.1)) for _ in range(3000)]
+        queries = [(12.97 + rng.gauss(0, 0.2), 77.59 + rng.gauss(0, 0.2)) for _ in range(300)]
+        for k in (1, 3, 25):
+            with self.subTest(k=k):
+                self.assertNearest(points, queries, k)
+
+    def test_high_latitude(self):
+        # Cells narrow towards the poles; the search must widen to match
+        rng = random.Random(2)
+        points = [(70 + rng.gauss(0, 0.5), 20 + rng.gauss(0, 2)) for _ in range(2000)]
+        queries = [(70 + rng.gauss(0, 0.6), 20 + rng.gauss(0, 3)) for _ in range(200)]
+        self.assertNearest(points, queries, 3)
+
+    def test_query_far_from_the_points(self):
+        rng = random.Random(3)
+        points = [(12.97 + rng.gauss(0, 0.05), 77.59 + rng.gauss(0, 0.05)) for _ in range(500)]
+        self.assertNearest(points, [(28.61, 77.21), (-33.87, 151.21)], 5)
+
+    def test_accept_and_max_km(self):
+        rng = random.Random(4)
+        points = [(12.97 + rng.gauss(0, 0.1), 77.59 + rng.gauss(0, 0.1)) for _ in range(2000)]
+        queries = [(12.97 + rng.gauss(0, 0.1), 77.59 + rng.gauss(0, 0.1)) for _ in range(100)]
+        self.assertNearest(points, queries, 5, accept=lambda key: key % 7 == 0)
+        self.assertNearest(points, queries, 50, max_km=1.5)
+
+    def test_fewer_points_than_k(self):
+        self.assertNearest([(12.9, 77.6), (13.0, 77.7)], [(12.95, 77.65)], 5)
+        self.assertEqual(GridIndex().nearest(12.9, 77.6, k=3), [])
+
+    def test_moved_and_removed_points(self):
+        index = self.build([(12.9, 77.6), (12.91, 77.61), (13.5, 78.0)])
+        index.insert(0, 13.5, 78.01)
+        index.remove(1)
+
+        self.assertEqual(len(index), 2)
+        self.assertNotIn(1, index)
+        self.assertEqual([key for key, _ in index.nearest(12.9, 77.6, k=3)], [2, 0])
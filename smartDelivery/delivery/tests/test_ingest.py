@@ -0,0 +1,50 @@
+from rest_framework.test import APITestCase
+
+from delivery.models import Order
+
+
+def order_row(number, **fields):
+    row = {
+        'order_number': number,
+        'customer_name': 'Customer',
+        'customer_phone': '8000000000',
+        'delivery_area': 'North',
+        'items': [{'name': 'Pizza', 'quantity': 1, 'price': 12.0}],
+    }
+    row.update(fields)
+    return row
+
+
+class BulkIngestTests(APITestCase):
+    def test_reports_bad_rows_without_aborting_the_batch(self):
+        rows = [
+            order_row('A-1'),
+            order_row('A-2', scheduled_time='2024-13-45T00:00:00'),
+            order_row('A-3', scheduled_time='2024-02-30 10:00'),
+            order_row('A-4', status=['x']),
+            order_row('A-5', status='delivered'),
+        ]
+        response = self.client.post('/api/orders/bulk/', rows, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated']), (2, 0))
+        self.assertEqual(
+            [(error['index'], list(error['errors'])) for error in response.data['errors']],
+            [(1, ['scheduled_time']), (2, ['scheduled_time']), (3, ['status'])],
+        )
+        self.assertEqual(set(Order.objects.values_list('order_number', flat=True)), {'A-1', 'A-5'})
+
+    def test_imported_chunk_pages_through_the_list(self):
+        # One chunk shares a single created_at
+        rows = [order_row(f'B-{index}') for index in range(250)]
+        response = self.client.post('/api/orders/bulk/', rows, format='json')
+        self.assertEqual(response.data['created'], 250)
+        self.assertEqual(Order.objects.values('created_at').distinct().count(), 1)
+
+        url, numbers = '/api/orders/?page_size=100', []
+        while url:
+            page = self.client.get(url).data
+            numbers += [row['order_number'] for row in page['results']]
+            url = page['next']
+            self.assertLessEqual(len(numbers), 250)
+        self.assertEqual(sorted(numbers), sorted(row['order_number'] for row in rows))
@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from delivery.items import ITEM_NAME_MAX_LENGTH, item_summary, items_total, normalize_items
+from delivery.models import Assignment, Order
+
+from .helpers import make_order, make_partner
+
+
+class NormalizeItemsTests(SimpleTestCase):
+    def test_items_are_reduced_to_name_quantity_and_price(self):
+        items, error = normalize_items([
+            {'name': 'Pizza', 'quantity': 2, 'price': 12, 'note': 'extra cheese'},
+            {'name': 'Tea', 'price': '2.5'},
+        ])
+        self.assertIsNone(error)
+        self.assertEqual(items, [
+            {'name': 'Pizza', 'quantity': 2, 'price': 12.0},
+            {'name': 'Tea', 'quantity': 1, 'price': 2.5},
+        ])
+        self.assertEqual(normalize_items([]), ([], None))
+
+    def test_invalid_items_are_rejected(self):
+        cases = [
+            ({'name': 'Pizza'}, 'Expected a list of items.'),
+            (['Pizza'], 'Item 0: expected an object.'),
+            ([{'quantity': 1, 'price': 1}], 'Item 0: name is required.'),
+            ([{'name': '  ', 'price': 1}], 'Item 0: name is required.'),
+            ([{'name': 'x' * (ITEM_NAME_MAX_LENGTH + 1), 'price': 1}],
+             f'Item 0: name must be at most {ITEM_NAME_MAX_LENGTH} characters.'),
+            ([{'name': 'Pizza', 'quantity': 0, 'price': 1}], 'Item 0: quantity must be a positive whole number.'),
+            ([{'name': 'Pizza', 'quantity': 1.5, 'price': 1}], 'Item 0: quantity must be a positive whole number.'),
+            ([{'name': 'Pizza', 'quantity': True, 'price': 1}], 'Item 0: quantity must be a positive whole number.'),
+            ([{'name': 'Pizza'}], 'Item 0: price must be a number.'),
+            ([{'name': 'Pizza', 'price': 'free'}], 'Item 0: price must be a number.'),
+            ([{'name': 'Pizza', 'price': -1}], 'Item 0: price must be a number of zero or more.'),
+            ([{'name': 'Pizza', 'price': 'nan'}], 'Item 0: price must be a number of zero or more.'),
+            ([{'name': 'Pizza', 'price': float('inf')}], 'Item 0: price must be a number of zero or more.'),
+            ([{'name': 'Pizza', 'price': False}], 'Item 0: price must be a number of zero or more.'),
+            ([{'name': 'Tea', 'price': 1}, {'name': 'Pizza'}], 'Item 1: price must be a number.'),
+        ]
+        for items, message in cases:
+            with self.subTest(items=items):
+                self.assertEqual(normalize_items(items), (None, message))
+
+    def test_total_is_rounded_to_the_cent(self):
+        items, _ = normalize_items([{'name': 'Tea', 'quantity': 3, 'price': 0.1}, {'name': 'Cake', 'price': 2.005}])
+        self.assertEqual(items_total(items), Decimal('2.30'))
+        self.assertEqual(items_total([]), Decimal('0'))
+
+    def test_summary_tolerates_legacy_rows(self):
+        self.assertEqual(item_summary(None), (0, []))
+        self.assertEqual(item_summary({'name': 'Pizza'}), (0, []))
+        self.assertEqual(
+            item_summary([{'name': 'Pizza'}, 'Tea', {'name': 3}, {'name': 'x' * 150}]),
+            (4, ['Pizza', 'x' * ITEM_NAME_MAX_LENGTH]),
+        )
+
+
+class OrderItemsTests(APITestCase):
+    payload = {
+        'order_number': 'ORD-ITEMS',
+        'customer_name': 'Customer',
+        'customer_phone': '8000000000',
+        'delivery_area': 'North',
+    }
+
+    def test_create_validates_items_and_fills_the_summary(self):
+        response = self.client.post('/api/orders/', {
+            **self.payload, 'items': [{'name': 'Pizza', 'quantity': -1, 'price': 12}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['items'], ['Item 0: quantity must be a positive whole number.'])
+
+        response = self.client.post('/api/orders/', {
+            **self.payload,
+            'items': [{'name': 'Pizza', 'quantity': 2, 'price': 12.5, 'sku': 'P-1'}, {'name': 'Tea', 'price': 2}],
+            'item_names': ['ignored'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(order_number='ORD-ITEMS')
+        self.assertEqual(order.total_amount, Decimal('27.00'))
+        self.assertEqual((order.item_count, order.item_names), (2, ['Pizza', 'Tea']))
+        self.assertEqual(order.items[0], {'name': 'Pizza', 'quantity': 2, 'price': 12.5})
+
+    def test_summary_follows_item_updates(self):
+        order = make_order()
+        response = self.client.patch(f'/api/orders/{order.pk}/', {
+            'items': [{'name': 'Soup', 'price': 4}, {'name': 'Bread', 'price': 1}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual((order.item_count, order.item_names), (2, ['Soup', 'Bread']))
+        self.assertEqual(order.total_amount, Decimal('5.00'))
+
+        order.items = [{'name': 'Salad', 'quantity': 1, 'price': 3.0}]
+        order.save(update_fields=['items'])
+        order.refresh_from_db()
+        self.assertEqual((order.item_count, order.item_names), (1, ['Salad']))
+
+    def test_bulk_ingest_validates_items_and_fills_the_summary(self):
+        rows = [
+            {**self.payload, 'order_number': 'B-1', 'items': [{'name': 'Pizza', 'quantity': 2, 'price': 12}]},
+            {**self.payload, 'order_number': 'B-2', 'items': [{'name': '', 'price': 1}]},
+        ]
+        response = self.client.post('/api/orders/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['errors'], [
+            {'index': 1, 'order_number': 'B-2', 'errors': {'items': ['Item 0: name is required.']}}])
+        order = Order.objects.get(order_number='B-1')
+        self.assertEqual((order.item_count, order.item_names, order.total_amount), (1, ['Pizza'], Decimal('24.00')))
+
+    def test_assignments_list_item_names(self):
+        order = make_order(items=[{'name': 'Pizza', 'quantity': 2, 'price': 6.0}, {'name': 'Tea', 'price': 1.0}])
+        Assignment.objects.create(order=order, partner=make_partner(), status='success')
+        row = self.client.get('/api/assignments/').data['results'][0]
+        self.assertEqual(row['orderDetails']['items'], ['Pizza', 'Tea'])
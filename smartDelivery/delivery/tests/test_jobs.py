@@ -0,0 +1,54 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from delivery.jobs import LeaseLost, claim_chunk, claim_job, enqueue_run, process_chunk, work_on
+from delivery.models import AssignmentJobLease, Order
+
+from .helpers import make_orders, make_partner
+
+
+class JobLeaseTests(TestCase):
+    def setUp(self):
+        for index in range(1, 5):
+            make_partner(index)
+        make_orders(12)
+        self.job = enqueue_run()
+
+    def expire(self, lease):
+        AssignmentJobLease.objects.filter(pk=lease.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(hours=1))
+
+    def test_dead_worker_is_replaced_and_its_chunk_redone(self):
+        # The first worker takes the only chunk and dies before committing it
+        dead = claim_job()
+        self.assertEqual(len(claim_chunk(dead, chunk_size=100)), 12)
+        self.assertIsNone(claim_job(), 'a live lease holds the last chunk')
+
+        self.expire(dead)
+        with self.assertLogs('delivery.jobs', 'WARNING'):
+            lease = claim_job()
+        self.assertEqual(lease.job_id, self.job.pk)
+        job = work_on(lease)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.processed, job.assigned_count), (12, 12))
+        self.assertFalse(Order.objects.filter(status='pending').exists())
+        self.assertFalse(AssignmentJobLease.objects.exists())
+
+    def test_late_worker_cannot_commit_a_chunk_taken_over(self):
+        slow = claim_job()
+        order_ids = claim_chunk(slow, chunk_size=5)
+        self.expire(slow)
+        with self.assertLogs('delivery.jobs', 'WARNING'):
+            replacement = claim_job()
+
+        with self.assertRaises(LeaseLost):
+            process_chunk(slow, self.job.strategy, order_ids)
+        self.assertEqual(Order.objects.filter(status='pending').count(), 12)
+
+        job = work_on(replacement, chunk_size=5)
+        self.assertEqual((job.status, job.processed), ('completed', 12))
+        # The late worker leaves without failing or completing the job twice
+        self.assertEqual(work_on(slow).status, 'completed')
@@ -0,0 +1,65 @@
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APITestCase
+
+from delivery.locations import LocationStore, _flush_on_exit
+
+from .helpers import make_partner
+
+
+@override_settings(PARTNER_LOCATION_FLUSH_SECONDS=3600)
+class LocationTests(APITestCase):
+    def setUp(self):
+        # Pings posted here must not stay pending in the process-wide store
+        self.store = LocationStore()
+        patcher = mock.patch('delivery.views.location_store', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rejects_partner_ids_beyond_bigint(self):
+        partner = make_partner()
+        pings = [
+            {'partner': 100000000000000000000, 'position': [12.9, 77.6]},
+            {'partner': partner.pk, 'position': [12.9, 77.6]},
+        ]
+        response = self.client.post('/api/partners/locations/', pings, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0])
+        self.assertEqual(self.store.pending_count, 1)
+
+    def test_flush_drops_fixes_the_database_rejects(self):
+        partners = [make_partner(index) for index in range(1, 4)]
+        store = LocationStore()
+        now = time.time()
+        store.record([(2 ** 70, 1.0, 1.0, now)] + [(partner.pk, 12.9, 77.6, now) for partner in partners])
+
+        with self.assertLogs('delivery.locations', 'ERROR'):
+            self.assertEqual(store.flush(), 3)
+        self.assertEqual(store.pending_count, 0)
+        self.assertEqual(store.track(2 ** 70), [])
+        for partner in partners:
+            partner.refresh_from_db()
+            self.assertEqual(partner.position, [12.9, 77.6])
+
+        # Later fixes are written as usual
+        store.record([(partners[0].pk, 13.0, 77.7, now + 1)])
+        self.assertEqual(store.flush(), 1)
+
+    def test_exit_flush_skips_fixes_for_another_database(self):
+        partner = make_partner()
+        self.store.record([(partner.pk, 12.9, 77.6, time.time())])
+
+        with mock.patch('delivery.locations.location_store', self.store):
+            with mock.patch.dict(connection.settings_dict, NAME='another'):
+                _flush_on_exit()
+            self.assertEqual(self.store.pending_count, 1)
+
+            _flush_on_exit()
+        self.assertEqual(self.store.pending_count, 0)
+        partner.refresh_from_db()
+        self.assertEqual(partner.position, [12.9, 77.6])
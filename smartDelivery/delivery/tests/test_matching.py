@@ -0,0 +1,89 @@
+import random
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from delivery.matching import STRATEGIES, match_greedy, match_optimal
+from delivery.models import MAX_PARTNER_LOAD, DeliveryPartner, Order
+
+AREAS = ['North', 'South', 'East', 'West', 'Centre']
+
+
+def partner(pk, areas, current_load=0, rating=4.0, position=None):
+    return DeliveryPartner(pk=pk, areas=areas, current_load=current_load, rating=rating, position=position)
+
+
+def order(pk, area, position=None):
+    return Order(pk=pk, delivery_area=area, position=position)
+
+
+def random_city(seed, orders=300, partners=60):
+    """Unsaved orders and partners with overlapping areas, some loads, ratings and positions missing."""
+    rng = random.Random(seed)
+
+    def point():
+        return [12.97 + rng.gauss(0, 0.05), 77.59 + rng.gauss(0, 0.05)] if rng.random() < 0.8 else None
+
+    partner_rows = [
+        partner(pk, rng.sample(AREAS, rng.randint(1, 3)), rng.randint(0, MAX_PARTNER_LOAD),
+                rng.choice([0, 2.5, 4.0, 4.5, 5.0]), point())
+        for pk in range(1, partners + 1)
+    ]
+    # A partner whose areas were never set can take nothing
+    partner_rows.append(partner(partners + 1, None))
+    order_rows = [order(pk, rng.choice(AREAS + ['Nowhere']), point()) for pk in range(1, orders + 1)]
+    return order_rows, partner_rows
+
+
+class StrategyTests(SimpleTestCase):
+    def run_strategy(self, name, orders, partners):
+        initial = {p.pk: p.current_load for p in partners}
+        matches = STRATEGIES[name](orders, sorted(partners, key=lambda p: p.pk))
+        return matches, initial
+
+    def test_every_strategy_respects_capacity_and_areas(self):
+        for seed in range(5):
+            for name in STRATEGIES:
+                with self.subTest(seed=seed, strategy=name):
+                    orders, partners = random_city(seed)
+                    matches, initial = self.run_strategy(name, orders, partners)
+
+                    self.assertEqual([o.pk for o, _ in matches], [o.pk for o in orders])
+                    taken = Counter(p.pk for _, p in matches if p is not None)
+                    for p in partners:
+                        self.assertEqual(p.current_load, initial[p.pk] + taken[p.pk])
+                        self.assertLessEqual(p.current_load, MAX_PARTNER_LOAD)
+                    for o, p in matches:
+                        if p is not None:
+                            self.assertIn(o.delivery_area, p.areas)
+                        if o.delivery_area == 'Nowhere':
+                            self.assertIsNone(p)
+
+    def test_optimal_places_at_least_as_many_as_greedy(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                placed = {}
+                for name in STRATEGIES:
+                    orders, partners = random_city(seed)
+                    matches, _ = self.run_strategy(name, orders, partners)
+                    placed[name] = sum(p is not None for _, p in matches)
+                self.assertGreaterEqual(placed['optimal'], max(placed.values()))
+
+    def test_optimal_leaves_shared_partners_for_orders_only_they_can_take(self):
+        # Greedy gives the North orders to partner 1, the lowest id, and
+        # then has nobody left for South
+        orders = [order(pk, 'North') for pk in range(1, 4)] + [order(pk, 'South') for pk in range(4, 7)]
+        greedy = match_greedy(orders, [partner(1, ['North', 'South']), partner(2, ['North'])])
+        self.assertEqual(sum(p is not None for _, p in greedy), 3)
+
+        optimal = match_optimal(orders, [partner(1, ['North', 'South']), partner(2, ['North'])])
+        self.assertEqual([p.pk for _, p in optimal], [2, 2, 2, 1, 1, 1])
+
+    def test_nearest_picks_the_closest_partner_with_room(self):
+        partners = [
+            partner(1, ['North'], position=[12.90, 77.60]),
+            partner(2, ['North'], position=[12.99, 77.60]),
+            partner(3, ['North'], current_load=MAX_PARTNER_LOAD, position=[13.00, 77.60]),
+        ]
+        matches = STRATEGIES['nearest']([order(1, 'North', [13.0, 77.6])], partners)
+        self.assertEqual(matches[0][1].pk, 2)
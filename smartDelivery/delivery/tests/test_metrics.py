@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from delivery.models import AssignmentRun
+
+
+def add_run(total_assigned):
+    return AssignmentRun.objects.create(
+        strategy='greedy', total_pending=10, total_assigned=total_assigned, success_rate=total_assigned * 10,
+        average_time=1.0,
+    )
+
+
+class MetricsCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_run_written_elsewhere_replaces_the_cached_payload(self):
+        add_run(3)
+        first = self.client.get('/api/assignments-metrics/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get('/api/assignments-metrics/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        # As a worker process would: a new row, nothing touched in this process's cache
+        run = add_run(7)
+        response = self.client.get('/api/assignments-metrics/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['id'], response.data['total_assigned']), (run.id, 7))
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_not_found_before_any_run(self):
+        self.assertEqual(self.client.get('/api/assignments-metrics/').status_code, 404)
@@ -0,0 +1,48 @@
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from delivery.models import Order
+
+from .helpers import make_orders
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_orders(1500)
+        # Bulk writes stamp every row they touch with one time
+        cls.stamp = timezone.now()
+        Order.objects.update(created_at=cls.stamp)
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+            pages += 1
+            self.assertLessEqual(pages, 20, 'next keeps returning pages')
+        return ids, pages
+
+    def test_pages_through_rows_sharing_a_timestamp(self):
+        ids, pages = self.walk('/api/orders/?page_size=100')
+
+        expected = list(Order.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 15)
+
+    def test_previous_returns_the_page_before(self):
+        first = self.client.get('/api/orders/?page_size=100').data
+        second = self.client.get(first['next']).data
+        self.assertIsNone(first['previous'])
+
+        back = self.client.get(second['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+        self.assertIsNone(back['previous'])
+        self.assertEqual(back['next'], first['next'])
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('garbage', 'eyJwIjpbIm5vdC1hLWRhdGUiLDFdfQ=='):
+            response = self.client.get(f'/api/orders/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,76 @@
+import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from delivery.models import Assignment, Order
+from delivery.renderers import ORJSONRenderer, dumps
+from delivery.views import AssignmentViewSet, DeliveryPartnerViewSet, OrderViewSet
+
+from .helpers import make_orders, make_partner
+
+
+class RendererParityTests(APITestCase):
+    """Rows from RowMapper through ORJSONRenderer match the serializer through DRF's JSONRenderer byte for byte."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = make_partner(
+            name='Zoë 配送 line', rating=1e-07, position=[12.9716, 1e16],
+            areas=['Nörth', 'Süd '])
+        make_partner(2, name='Ana María ', rating=4.5, position=None, areas=None)
+        orders = make_orders(
+            3,
+            customer_name='Ünïcode 客户 ',
+            items=[{'name': 'Crème brûlée', 'quantity': 1, 'price': 1e-07}],
+            item_names=['Crème brûlée '],
+            total_amount=Decimal('1234.50'),
+            position=[-0.000001, 77.5946],
+            scheduled_time=timezone.now() + datetime.timedelta(days=1),
+        )
+        Order.objects.filter(pk=orders[0].pk).update(assigned_to=cls.partner, status='assigned')
+        Assignment.objects.create(order=orders[0], partner=cls.partner, status='success')
+        Assignment.objects.create(order=orders[1], partner=None, status='failed', reason='No partner nearby')
+        # Without exponent floats, so orjson's output is served as is
+        Order.objects.create(
+            order_number='ORD-PLAIN', customer_name='Jürgen ', customer_phone='8000000000',
+            delivery_area='Nörth', items=[{'name': 'Tea', 'quantity': 2, 'price': 2.5}],
+            total_amount=Decimal('5.00'),
+        )
+
+    def assertSameBytes(self, view_class, **filters):
+        queryset = view_class.queryset.filter(**filters).order_by('id')
+        mapper = view_class.row_mapper
+        fast = ORJSONRenderer().render(list(mapper.rows(mapper.values(queryset))))
+        slow = JSONRenderer().render(view_class.serializer_class(queryset, many=True).data)
+        self.assertEqual(fast, slow)
+        return fast
+
+    def test_orders(self):
+        self.assertIn(b'1e-07', self.assertSameBytes(OrderViewSet))
+        self.assertIn(b'\\u2028', self.assertSameBytes(OrderViewSet, order_number='ORD-PLAIN'))
+
+    def test_partners(self):
+        body = self.assertSameBytes(DeliveryPartnerViewSet)
+        self.assertIn(b'1e+16', body)
+        self.assertIn('Zoë 配送'.encode(), body)
+        self.assertIn(b'\\u2029', self.assertSameBytes(DeliveryPartnerViewSet, rating=4.5))
+
+    def test_assignments(self):
+        self.assertSameBytes(AssignmentViewSet)
+        body = self.assertSameBytes(AssignmentViewSet, partner=None)
+        self.assertIn(b'"partnerDetails":null', body)
+        self.assertIn(b'\\u2028', body)
+
+    def test_non_finite_floats_are_rejected(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                data = {'rating': value, 'reason': None}
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    dumps(data)
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render([data])
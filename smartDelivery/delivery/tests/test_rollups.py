@@ -0,0 +1,120 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from delivery.models import DailyOrderStats, Order
+
+from .helpers import make_order, make_orders
+
+MONDAY = datetime.datetime(2024, 3, 4, 12, 30, tzinfo=datetime.timezone.utc)
+TUESDAY = MONDAY + datetime.timedelta(days=1)
+
+
+def rollup():
+    return {
+        (row.date.isoformat(), row.area): (row.orders, row.revenue)
+        for row in DailyOrderStats.objects.exclude(orders=0, revenue=0)
+    }
+
+
+class OrderRollupTests(TestCase):
+    def test_created_orders_are_counted_by_scheduled_day_and_area(self):
+        make_order(1, scheduled_time=MONDAY, total_amount=Decimal('10.50'))
+        make_order(2, scheduled_time=MONDAY, total_amount=Decimal('4.00'))
+        make_order(3, scheduled_time=TUESDAY, delivery_area='South')
+        make_order(4, scheduled_time=None)
+
+        self.assertEqual(rollup(), {
+            ('2024-03-04', 'North'): (2, Decimal('14.50')),
+            ('2024-03-05', 'South'): (1, Decimal('12.00')),
+        })
+
+    def test_status_changes_leave_the_rollup_alone(self):
+        order = make_order(1, scheduled_time=MONDAY)
+        order.status = 'assigned'
+        order.save()
+        order.status = 'delivered'
+        order.save(update_fields=['status'])
+
+        self.assertEqual(rollup(), {('2024-03-04', 'North'): (1, Decimal('12.00'))})
+
+    def test_edits_move_the_order_between_rows(self):
+        order = make_order(1, scheduled_time=MONDAY)
+        make_order(2, scheduled_time=MONDAY)
+
+        order.delivery_area = 'South'
+        order.save()
+        self.assertEqual(rollup(), {
+            ('2024-03-04', 'North'): (1, Decimal('12.00')),
+            ('2024-03-04', 'South'): (1, Decimal('12.00')),
+        })
+
+        order.total_amount = Decimal('30.00')
+        order.save(update_fields=['total_amount'])
+        self.assertEqual(rollup()[('2024-03-04', 'South')], (1, Decimal('30.00')))
+
+        order.scheduled_time = TUESDAY
+        order.save()
+        self.assertEqual(rollup(), {
+            ('2024-03-04', 'North'): (1, Decimal('12.00')),
+            ('2024-03-05', 'South'): (1, Decimal('30.00')),
+        })
+
+        order.scheduled_time = None
+        order.save()
+        self.assertEqual(rollup(), {('2024-03-04', 'North'): (1, Decimal('12.00'))})
+
+    def test_deleted_orders_are_taken_out(self):
+        order = make_order(1, scheduled_time=MONDAY)
+        make_order(2, scheduled_time=MONDAY, total_amount=Decimal('5.00'))
+        order.delete()
+        self.assertEqual(rollup(), {('2024-03-04', 'North'): (1, Decimal('5.00'))})
+
+        Order.objects.all().delete()
+        self.assertEqual(rollup(), {})
+
+
+class BackfillOrderStatsTests(TestCase):
+    def backfill(self, *args):
+        out = StringIO()
+        call_command('backfill_order_stats', *args, stdout=out)
+        return out.getvalue()
+
+    def test_rebuilds_the_rollup_from_orders(self):
+        # Bulk inserts skip the signals, so the rollup knows nothing of them
+        make_orders(3, scheduled_time=MONDAY, total_amount=Decimal('7.25'))
+        DailyOrderStats.objects.create(date=datetime.date(2024, 3, 6), area='Gone', orders=4, revenue=40)
+        self.assertNotIn(('2024-03-04', 'North'), rollup())
+
+        self.assertIn('with 1 rows', self.backfill())
+        self.assertEqual(rollup(), {('2024-03-04', 'North'): (3, Decimal('21.75'))})
+
+    def test_matches_the_rollup_kept_by_the_signals(self):
+        orders = [make_order(index, scheduled_time=MONDAY if index % 2 else TUESDAY,
+                             delivery_area=['North', 'South', 'East'][index % 3],
+                             total_amount=Decimal(index)) for index in range(1, 13)]
+        orders[0].delivery_area = 'West'
+        orders[0].save()
+        orders[1].delete()
+        kept = rollup()
+
+        self.backfill()
+        self.assertEqual(rollup(), kept)
+
+    def test_date_range_only_replaces_those_days(self):
+        make_orders(2, scheduled_time=MONDAY)
+        DailyOrderStats.objects.create(date=TUESDAY.date(), area='North', orders=9, revenue=9)
+
+        self.backfill('--start-date', '2024-03-04', '--end-date', '2024-03-04')
+        self.assertEqual(rollup(), {
+            ('2024-03-04', 'North'): (2, Decimal('24.00')),
+            ('2024-03-05', 'North'): (9, Decimal('9.00')),
+        })
+
+    def test_rejects_bad_dates(self):
+        with self.assertRaises(CommandError):
+            self.backfill('--start-date', '04/03/2024')
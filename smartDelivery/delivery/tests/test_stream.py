@@ -0,0 +1,187 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from delivery import events
+from delivery.events import RESYNC_FRAME, EventBroker, Subscription
+from delivery.stream import RETRY_FRAME, STREAM_PATH, not_found, sse_app, with_event_stream
+
+
+def payload(event='order.status', **data):
+    return json.dumps({'event': event, 'rows': [{'id': 1, **data}]})
+
+
+class BrokerTestCase(SimpleTestCase):
+    """Each test gets its own broker, whose listener thread never touches the database."""
+
+    def setUp(self):
+        patcher = mock.patch.object(EventBroker, '_listen', lambda broker: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.broker = EventBroker()
+        patcher = mock.patch('delivery.stream.broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def event_id(self, sequence):
+        return f'{self.broker._token}-{sequence}'
+
+
+class EventBrokerTests(BrokerTestCase):
+    def test_fans_out_to_every_subscriber(self):
+        first, _ = self.broker.subscribe()
+        second, _ = self.broker.subscribe()
+        gone, _ = self.broker.subscribe()
+        self.broker.unsubscribe(gone)
+
+        self.broker.deliver(payload(status='assigned'))
+
+        frame = f'id: {self.event_id(1)}\nevent: order.status\ndata: {{"rows":[{{"id":1,"status":"assigned"}}]}}\n\n'
+        self.assertEqual(first.queue.get_nowait(), frame.encode())
+        self.assertEqual(second.queue.get_nowait(), frame.encode())
+        self.assertTrue(gone.queue.empty())
+        self.assertEqual(self.broker.subscriber_count, 2)
+
+    def test_drops_malformed_payloads(self):
+        subscription, _ = self.broker.subscribe()
+        with self.assertLogs('delivery.events', 'WARNING'):
+            self.broker.deliver('not json')
+            self.broker.deliver('{"rows": []}')
+        self.assertTrue(subscription.queue.empty())
+
+    def test_replays_events_after_last_event_id(self):
+        for index in range(3):
+            self.broker.deliver(payload(index=index))
+        _, replay = self.broker.subscribe(last_event_id=self.event_id(1))
+        self.assertEqual([frame.split(b'\n')[0] for frame in replay],
+                         [f'id: {self.event_id(2)}'.encode(), f'id: {self.event_id(3)}'.encode()])
+
+        _, replay = self.broker.subscribe(last_event_id=self.event_id(3))
+        self.assertEqual(replay, [])
+        _, replay = self.broker.subscribe()
+        self.assertEqual(replay, [])
+
+    def test_resyncs_once_the_backlog_has_moved_on(self):
+        with mock.patch.object(events, 'BACKLOG_SIZE', 2):
+            self.broker = EventBroker()
+        for index in range(4):
+            self.broker.deliver(payload(index=index))
+        _, replay = self.broker.subscribe(last_event_id=self.event_id(1))
+        self.assertEqual(replay, [RESYNC_FRAME])
+        _, replay = self.broker.subscribe(last_event_id=self.event_id(2))
+        self.assertEqual(len(replay), 2)
+
+    def test_resyncs_ids_from_another_worker(self):
+        self.broker.deliver(payload())
+        other = EventBroker()
+        for last_event_id in (f'{other._token}-1', 'garbage', f'{self.broker._token}-x'):
+            with self.subTest(last_event_id=last_event_id):
+                _, replay = self.broker.subscribe(last_event_id=last_event_id)
+                self.assertEqual(replay, [RESYNC_FRAME])
+
+    def test_subscription_overflow_ends_the_stream(self):
+        with mock.patch.object(events, 'SUBSCRIBER_QUEUE_SIZE', 3):
+            subscription = Subscription()
+        for index in range(5):
+            subscription.push(index)
+
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual([subscription.queue.get_nowait() for _ in range(3)], [1, 2, None])
+        subscription.push(5)
+        self.assertTrue(subscription.queue.empty())
+
+
+class SSEAppTests(BrokerTestCase):
+    async def open(self, app=sse_app, method='GET', path=STREAM_PATH, headers=(), query_string=b''):
+        """Start ``app`` on a request; returns the task, its sent messages and a disconnect trigger."""
+        sent = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        scope = {'type': 'http', 'method': method, 'path': path, 'headers': list(headers),
+                 'query_string': query_string}
+        task = asyncio.ensure_future(app(scope, receive, sent.put))
+        return task, sent, disconnected
+
+    async def next_message(self, sent):
+        return await asyncio.wait_for(sent.get(), 2)
+
+    async def test_streams_events_until_the_client_disconnects(self):
+        task, sent, disconnected = await self.open()
+        start = await self.next_message(sent)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertIn((b'cache-control', b'no-cache'), start['headers'])
+        self.assertEqual((await self.next_message(sent))['body'], RETRY_FRAME)
+        self.assertEqual(self.broker.subscriber_count, 1)
+
+        self.broker.deliver(payload(status='picked'))
+        body = (await self.next_message(sent))['body']
+        self.assertTrue(body.startswith(f'id: {self.event_id(1)}\nevent: order.status\n'.encode()))
+
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+        self.assertEqual(self.broker.subscriber_count, 0)
+
+    async def test_replays_from_last_event_id(self):
+        self.broker.deliver(payload(index=0))
+        self.broker.deliver(payload(index=1))
+
+        for headers, query_string in (([(b'last-event-id', self.event_id(1).encode())], b''),
+                                      ([], f'last_event_id={self.event_id(1)}'.encode())):
+            task, sent, disconnected = await self.open(headers=headers, query_string=query_string)
+            await self.next_message(sent)
+            body = (await self.next_message(sent))['body']
+            self.assertEqual(body, RETRY_FRAME + self.broker._backlog[1][1])
+            disconnected.set()
+            await asyncio.wait_for(task, 2)
+
+    async def test_resyncs_an_id_from_another_worker(self):
+        task, sent, disconnected = await self.open(headers=[(b'last-event-id', b'0badc0de-7')])
+        await self.next_message(sent)
+        self.assertEqual((await self.next_message(sent))['body'], RETRY_FRAME + RESYNC_FRAME)
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+
+    async def test_closes_a_stream_that_falls_behind(self):
+        task, sent, disconnected = await self.open()
+        await self.next_message(sent)
+        await self.next_message(sent)
+        [subscription] = self.broker._subscribers
+        subscription.overflowed = True
+        subscription.queue.put_nowait(None)
+
+        self.assertEqual(await self.next_message(sent), {'type': 'http.response.body', 'body': b''})
+        await asyncio.wait_for(task, 2)
+        self.assertEqual(self.broker.subscriber_count, 0)
+
+    async def test_rejects_other_methods(self):
+        task, sent, _ = await self.open(method='POST')
+        await asyncio.wait_for(task, 2)
+        self.assertEqual((await self.next_message(sent))['status'], 405)
+        self.assertEqual(self.broker.subscriber_count, 0)
+
+    async def test_stream_application_serves_only_the_stream(self):
+        app = with_event_stream(not_found)
+        task, sent, _ = await self.open(app, path='/api/orders/')
+        await asyncio.wait_for(task, 2)
+        self.assertEqual((await self.next_message(sent))['status'], 404)
+
+        task, sent, disconnected = await self.open(app)
+        self.assertEqual((await self.next_message(sent))['status'], 200)
+        disconnected.set()
+        await asyncio.wait_for(task, 2)
+
+
+class EventStreamTests(SimpleTestCase):
+    @override_settings(EVENT_STREAM_WSGI=False)
+    def test_wsgi_stream_is_refused_unless_enabled(self):
+        response = self.client.get('/api/stream/')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.streaming)
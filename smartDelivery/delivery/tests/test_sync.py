@@ -0,0 +1,53 @@
+import datetime
+from urllib.parse import urlencode
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from delivery.models import Order, Tombstone
+
+from .helpers import make_orders
+
+
+class DeltaSyncTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.since = timezone.now() - datetime.timedelta(minutes=5)
+        make_orders(1200)
+        # One bulk status change stamps every row it touches with the same time
+        Order.objects.update(status='assigned', last_updated=timezone.now())
+        Order.objects.filter(pk__in=Order.objects.order_by('id').values('pk')[:5]).update(
+            last_updated=cls.since - datetime.timedelta(minutes=1))
+
+    def test_pages_through_rows_sharing_last_updated(self):
+        url = '/api/orders/?' + urlencode({'updated_since': self.since.isoformat(), 'page_size': 100})
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.data['full'])
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+            pages += 1
+            self.assertLessEqual(pages, 20, 'next keeps returning pages')
+
+        expected = list(Order.objects.filter(last_updated__gte=self.since).order_by('id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 1195)
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 12)
+
+    def test_last_page_lists_deletions(self):
+        Tombstone.objects.create(model='order', object_id=999999)
+        url = '/api/orders/?' + urlencode({'updated_since': self.since.isoformat(), 'page_size': 1000})
+        first = self.client.get(url).data
+        self.assertEqual(first['deleted'], [])
+        last = self.client.get(first['next']).data
+        self.assertIsNone(last['next'])
+        self.assertEqual(last['deleted'], [999999])
+
+    def test_rejects_invalid_updated_since(self):
+        for since in ('yesterday', '2024-13-01T00:00:00', '2024-02-30T00:00:00Z'):
+            with self.subTest(since=since):
+                response = self.client.get('/api/orders/?' + urlencode({'updated_since': since}))
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'detail': 'updated_since must be an ISO 8601 datetime.'})
@@ -0,0 +1,84 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from delivery.telemetry import CONTENT_TYPE, Counter, Gauge, Histogram, Registry, registry
+
+from .helpers import make_orders
+
+
+def scrape(text):
+    """Sample lines of an exposition as ``{'name{labels}': 'value'}``."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            samples[name] = value
+    return samples
+
+
+class ExpositionTests(SimpleTestCase):
+    def test_text_format(self):
+        metrics = Registry()
+        requests = metrics.register(Counter('requests_total', 'Requests served.', ('route', 'method')))
+        metrics.register(Gauge('queue_depth', 'Jobs waiting.', lambda: 3.0))
+        requests.inc('order-list', 'GET')
+        requests.inc('order-list', 'GET', amount=2)
+        requests.inc('say "hi"\\\n', 'POST')
+
+        self.assertEqual(metrics.render(), (
+            '# HELP requests_total Requests served.\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{route="order-list",method="GET"} 3\n'
+            'requests_total{route="say \\"hi\\"\\\\\\n",method="POST"} 1\n'
+            '# HELP queue_depth Jobs waiting.\n'
+            '# TYPE queue_depth gauge\n'
+            'queue_depth 3\n'
+        ))
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('duration_seconds', 'Latency.', ('route',), buckets=(0.1, 1, 5))
+        # A value on a bound falls in that bound's bucket, as le means "less or equal"
+        for value in (0.05, 0.1, 0.5, 1, 7.25):
+            histogram.observe(value, 'order-list')
+
+        self.assertEqual(list(histogram.samples()), [
+            'duration_seconds_bucket{route="order-list",le="0.1"} 2',
+            'duration_seconds_bucket{route="order-list",le="1"} 4',
+            'duration_seconds_bucket{route="order-list",le="5"} 4',
+            'duration_seconds_bucket{route="order-list",le="+Inf"} 5',
+            'duration_seconds_sum{route="order-list"} 8.9',
+            'duration_seconds_count{route="order-list"} 5',
+        ])
+
+
+class RequestMetricsTests(APITestCase):
+    def count(self, route, method, status):
+        key = f'http_requests_total{{route="{route}",method="{method}",status="{status}"}}'
+        return int(scrape(registry.render()).get(key, 0))
+
+    def assertCounted(self, request, route, method, status):
+        before = self.count(route, method, status)
+        response = request()
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(self.count(route, method, status), before + 1)
+
+    def test_routes_are_labelled_by_url_name(self):
+        order = make_orders(1)[0]
+        self.assertCounted(lambda: self.client.get('/api/orders/?page_size=5'), 'order-list', 'GET', 200)
+        self.assertCounted(lambda: self.client.get(f'/api/orders/{order.pk}/'), 'order-detail', 'GET', 200)
+        self.assertCounted(lambda: self.client.get('/api/orders/999999/'), 'order-detail', 'GET', 404)
+
+    def test_unknown_paths_and_methods_share_a_label(self):
+        self.assertCounted(lambda: self.client.get('/wp-login.php'), 'unmatched', 'GET', 404)
+        self.assertCounted(lambda: self.client.generic('BREW', '/api/orders/'), 'order-list', 'other', 405)
+
+    def test_query_counts_are_recorded(self):
+        self.client.get('/api/orders/?page_size=5')
+        samples = scrape(self.client.get('/metrics').content.decode())
+        self.assertGreaterEqual(int(samples['http_request_db_queries_bucket{route="order-list",method="GET",le="1"}']), 1)
+
+    def test_metrics_endpoint(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
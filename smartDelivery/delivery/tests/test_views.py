@@ -0,0 +1,126 @@
+import json
+
+from rest_framework.test import APITestCase
+
+from delivery.models import MAX_PARTNER_LOAD, Assignment, DeliveryPartner, Order
+
+from .helpers import make_orders, make_partner
+
+
+class ListQueryCountTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        partners = [make_partner(index) for index in range(1, 11)]
+        orders = make_orders(60)
+        Assignment.objects.bulk_create([
+            Assignment(order=order, partner=partners[index % len(partners)] if index % 3 else None,
+                       status='success' if index % 3 else 'failed')
+            for index, order in enumerate(orders)
+        ])
+
+    def assert_constant_queries(self, path, total):
+        # One query per page, however many rows it holds or relations they have
+        for page_size in (5, 50):
+            with self.assertNumQueries(1):
+                response = self.client.get(f'{path}?page_size={page_size}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), min(page_size, total))
+
+    def test_assignment_list(self):
+        self.assert_constant_queries('/api/assignments/', 60)
+        row = self.client.get('/api/assignments/?page_size=1').data['results'][0]
+        self.assertEqual(set(row['orderDetails']), {'items', 'total', 'destination'})
+
+    def test_order_list(self):
+        self.assert_constant_queries('/api/orders/', 60)
+
+    def test_partner_list(self):
+        self.assert_constant_queries('/api/partners/', 10)
+
+    def test_ndjson_stream_matches_the_list_rows(self):
+        response = self.client.get('/api/assignments/?stream=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        page = self.client.get('/api/assignments/?page_size=60').data['results']
+        self.assertEqual([json.loads(line) for line in lines], json.loads(json.dumps(page)))
+
+
+class StatusCapacityTests(APITestCase):
+    def setUp(self):
+        self.partner = make_partner(current_load=MAX_PARTNER_LOAD)
+        self.delivered = make_orders(2, status='delivered', assigned_to=self.partner)
+
+    def test_reopening_a_delivered_order_needs_a_free_slot(self):
+        order = self.delivered[0]
+        response = self.client.put(f'/api/orders/{order.pk}/status/', {'status': 'assigned'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        order.refresh_from_db()
+        self.partner.refresh_from_db()
+        self.assertEqual((order.status, self.partner.current_load), ('delivered', MAX_PARTNER_LOAD))
+
+        DeliveryPartner.objects.filter(pk=self.partner.pk).update(current_load=MAX_PARTNER_LOAD - 1)
+        response = self.client.put(f'/api/orders/{order.pk}/status/', {'status': 'assigned'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.current_load, MAX_PARTNER_LOAD)
+
+    def test_bulk_change_past_capacity_is_rejected_whole(self):
+        DeliveryPartner.objects.filter(pk=self.partner.pk).update(current_load=MAX_PARTNER_LOAD - 1)
+        response = self.client.put('/api/orders/bulk_status/', {
+            'order_ids': [order.pk for order in self.delivered], 'status': 'picked',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['partners'], [self.partner.pk])
+        self.assertEqual(Order.objects.filter(status='delivered').count(), 2)
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.current_load, MAX_PARTNER_LOAD - 1)
+
+    def test_moving_an_order_to_a_full_partner_is_rejected(self):
+        order = make_orders(1, order_number='MOVE-1', status='assigned', assigned_to=make_partner(2))[0]
+        response = self.client.patch(f'/api/orders/{order.pk}/', {'assigned_to': self.partner.pk}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assigned_to', response.data)
+        order.refresh_from_db()
+        self.assertNotEqual(order.assigned_to_id, self.partner.pk)
+
+
+class BulkOrderTests(APITestCase):
+    def setUp(self):
+        self.partner = make_partner(current_load=1)
+        self.orders = make_orders(4)
+
+    def test_order_ids_must_be_json_integers(self):
+        for order_ids in ([1.5], [self.orders[0].pk, True], [str(self.orders[0].pk)], [0], [2 ** 63], [None], 7, []):
+            with self.subTest(order_ids=order_ids):
+                response = self.client.post('/api/orders/bulk_assign/', {'order_ids': order_ids}, format='json')
+                self.assertEqual(response.status_code, 400)
+                response = self.client.put('/api/orders/bulk_status/',
+                                           {'order_ids': order_ids, 'status': 'picked'}, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.filter(status='pending').count(), 4)
+
+    def test_bulk_assign_rejects_unknown_strategies(self):
+        response = self.client.post('/api/orders/bulk_assign/',
+                                    {'order_ids': [self.orders[0].pk], 'strategy': 'fastest'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_assign_only_touches_the_given_pending_orders(self):
+        first, second, third, untouched = self.orders
+        Order.objects.filter(pk=third.pk).update(status='delivered')
+        elsewhere = make_orders(1, order_number='SOUTH-1', delivery_area='South')[0]
+
+        response = self.client.post('/api/orders/bulk_assign/', {
+            'order_ids': [first.pk, second.pk, third.pk, elsewhere.pk], 'strategy': 'balanced',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_pending'], 3)
+        self.assertEqual(response.data['assigned_count'], 2)
+        self.assertEqual([row['count'] for row in response.data['failure_reasons']], [1])
+        statuses = dict(Order.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[order.pk] for order in (first, second, third, untouched, elsewhere)],
+                         ['assigned', 'assigned', 'delivered', 'pending', 'pending'])
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.current_load, 3)
@@ -5,8 +5,10 @@ from .views import (
     OrderViewSet,
     AssignmentViewSet,
     assignment_metrics,
-    run_assignment_algorithm,   
+    run_assignment_algorithm,
+    assignment_job_status,
 )
+from .stream import event_stream
 
 router = DefaultRouter()
 router.register(r'partners', DeliveryPartnerViewSet)
@@ -17,4 +19,7 @@ urlpatterns = [
     path('', include(router.urls)),
     path('assignments-metrics/', assignment_metrics, name='assignment-metrics'),
     path('assignments-run/', run_assignment_algorithm, name='assignment-run'),
+    path('assignments-run/<int:pk>/', assignment_job_status, name='assignment-job-status'),
+    # Served by delivery.stream.sse_app under ASGI; this view covers WSGI and runserver
+    path('stream/', event_stream, name='event-stream'),
 ]
\ No newline at end of file
@@ -1,31 +1,142 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDate
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.db.models import Sum
 from datetime import timedelta
-from .models import DeliveryPartner, Order, Assignment, AssignmentMetrics
+from .models import DeliveryPartner, Order, Assignment, AssignmentJob, DailyOrderStats
 from .serializers import (
     DeliveryPartnerSerializer,
     OrderSerializer,
     AssignmentSerializer,
-    AssignmentMetricsSerializer,
+    AssignmentJobSerializer,
 )
+from .assignment import (
+    NO_PARTNER_REASON,
+    PartnerFull,
+    claim_partner,
+    run_batch_assignment,
+    set_order_statuses,
+    update_partner_counters,
+)
+from .dispatcher import dispatcher
+from .events import publish_assignments, publish_order_statuses
+from .ingest import ingest_orders
+from .jobs import enqueue_run
+from .locations import LOCATION_BATCH_MAX, clean_ping, location_store
+from .matching import STRATEGIES
+from .metrics import (
+    HISTORY_DEFAULT_LIMIT,
+    HISTORY_MAX_LIMIT,
+    cached_metrics_payload,
+    metrics_payload,
+)
+from .parsers import NDJSONParser
+from .sync import DeltaSyncMixin
+from .telemetry import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry
+from .fastread import AssignmentRowMapper, RowMapper, ValuesListMixin
 import datetime
+import time
+
+
+# Primary keys are bigint columns
+MAX_ID = 2 ** 63 - 1
+
 
-class DeliveryPartnerViewSet(viewsets.ModelViewSet):
+def integer_ids(values):
+    """Whether every value is a JSON integer that can be an id; floats, bools and strings are not."""
+    return all(isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_ID for value in values)
+
+
+def day_bounds(first_day, last_day):
+    """Half-open ``[start, end)`` datetimes covering ``first_day`` through ``last_day`` in the current timezone."""
+    start = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min))
+    end = timezone.make_aware(datetime.datetime.combine(last_day + timedelta(days=1), datetime.time.min))
+    return start, end
+
+
+class DeliveryPartnerViewSet(DeltaSyncMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = DeliveryPartner.objects.all()
     serializer_class = DeliveryPartnerSerializer
+    row_mapper = RowMapper(DeliveryPartnerSerializer)
+    tombstone_model = 'partner'
+    cursor_ordering = ('id',)
+
+    # POST /api/partners/locations: GPS pings for many partners in one request
+    @action(detail=False, methods=['post'], url_path='locations', parser_classes=[JSONParser, NDJSONParser])
+    def locations(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'detail': 'Expected a JSON array or NDJSON lines of pings.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > LOCATION_BATCH_MAX:
+            return Response({'detail': f'Send at most {LOCATION_BATCH_MAX} pings per request.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-
-class OrderViewSet(viewsets.ModelViewSet):
+        # Held in memory and written to the partners in periodic bulk updates
+        now = time.time()
+        pings, errors = [], []
+        for index, row in enumerate(rows):
+            ping, ping_errors = clean_ping(row, now)
+            if ping_errors:
+                errors.append({'index': index, 'errors': ping_errors})
+            else:
+                pings.append(ping)
+        stored = location_store.record(pings)
+        return Response({'accepted': len(pings), 'stale': len(pings) - stored, 'errors': errors},
+                        status=status.HTTP_202_ACCEPTED)
+
+    # GET /api/partners/[id]/track: recent GPS fixes held by this server
+    @action(detail=True, methods=['get'], url_path='track')
+    def track(self, request, pk=None):
+        partner = get_object_or_404(DeliveryPartner.objects.only('id', 'position', 'position_updated_at'), pk=pk)
+        points = [
+            {'position': [lat, lon], 'timestamp': datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)}
+            for lat, lon, ts in location_store.track(partner.pk)
+        ]
+        if not points and partner.position:
+            # Nothing received here since startup: fall back to the stored fix
+            points = [{'position': partner.position, 'timestamp': partner.position_updated_at}]
+        return Response({'partner': partner.pk, 'points': points}, status=status.HTTP_200_OK)
+
+
+class OrderViewSet(DeltaSyncMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    row_mapper = RowMapper(OrderSerializer)
+    tombstone_model = 'order'
+    cursor_ordering = ('-created_at', '-id')
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                # Status or partner edits through PUT/PATCH move the partner counters too
+                before = (
+                    Order.objects.select_for_update()
+                    .values_list('assigned_to_id', 'status')
+                    .get(pk=serializer.instance.pk)
+                )
+                order = serializer.save()
+                update_partner_counters(before, (order.assigned_to_id, order.status))
+                if before != (order.assigned_to_id, order.status):
+                    publish_order_statuses([(order.pk, order.status, order.assigned_to_id)])
+        except PartnerFull as e:
+            raise ValidationError({'assigned_to': [str(e)]})
+
+    def perform_create(self, serializer):
+        order = serializer.save()
+        # Match it once the order is visible to the dispatcher's connection
+        transaction.on_commit(lambda: dispatcher.schedule([order.delivery_area]))
 
     # GET /api/orders/ with optional filtering
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+        queryset = self.filter_queryset(self.get_queryset())
         status_filter = request.query_params.get('status')
         area_filter = request.query_params.get('area')
         date_filter = request.query_params.get('date')  # date in YYYY-MM-DD
@@ -33,12 +144,18 @@ class OrderViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if area_filter:
-            queryset = queryset.filter(area=area_filter)
+            queryset = queryset.filter(delivery_area=area_filter)
         if date_filter:
-            queryset = queryset.filter(created_at__date=date_filter)
+            try:
+                day = datetime.datetime.strptime(date_filter, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'detail': 'Invalid date format. Use YYYY-MM-DD.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            # Half-open range instead of created_at::date so the index applies
+            day_start, day_end = day_bounds(day, day)
+            queryset = queryset.filter(created_at__gte=day_start, created_at__lt=day_end)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.list_response(queryset)
 
     # POST /api/orders/assign: trigger assignment process for an order
     @action(detail=False, methods=['post'], url_path='assign')
@@ -48,66 +165,147 @@ class OrderViewSet(viewsets.ModelViewSet):
         if not order_id:
             return Response({'detail': 'Order ID is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        order = get_object_or_404(Order, id=order_id)
+        with transaction.atomic():
+            # Lock the order so two requests cannot assign it twice
+            order = get_object_or_404(Order.objects.select_for_update(), id=order_id)
 
-        if order.status != 'pending':
-            return Response({'detail': 'Order is not pending and cannot be assigned.'}, status=status.HTTP_400_BAD_REQUEST)
+            if order.status != 'pending':
+                return Response({'detail': 'Order is not pending and cannot be assigned.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Look for an active partner with load less than 3 and covering the order area
-            partner = DeliveryPartner.objects.filter(
-                status='active',
-                current_load__lt=3,
-                areas__contains=[order.delivery_area]
-            ).first()
-        except Exception as e:
-            return Response({'detail': f'Error during partner lookup: {str(e)}'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        if partner:
+            partner = None
             try:
-                order.status = 'assigned'
-                order.assigned_to = partner
-                order.save()
-
-                partner.current_load += 1
-                partner.save()
-
-                assignment = Assignment.objects.create(
-                    order=order,
-                    partner=partner,
-                    status='success'
-                )
-                serializer = AssignmentSerializer(assignment)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+                with transaction.atomic():
+                    # Take a slot on the closest active partner with load less than 3 covering the order area
+                    partner = claim_partner(order.delivery_area, order.position)
+                    if partner:
+                        order.status = 'assigned'
+                        order.assigned_to = partner
+                        order.save()
+
+                        assignment = Assignment.objects.create(
+                            order=order,
+                            partner=partner,
+                            status='success'
+                        )
+                        publish_order_statuses([(order.pk, order.status, partner.pk)])
+                        publish_assignments([assignment])
             except Exception as e:
-                # If an error occurs during assignment, capture it and return failure response
-                Assignment.objects.create(
+                if partner is None:
+                    return Response({'detail': f'Error during partner lookup: {str(e)}'},
+                                    status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                # The slot taken on the partner was rolled back with the savepoint
+                assignment = Assignment.objects.create(
                     order=order,
                     partner=partner,
                     status='failed',
                     reason=f'Error during assignment update: {str(e)}'
                 )
+                publish_assignments([assignment])
                 return Response({'detail': f'Assignment failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        else:
+
+            if partner:
+                serializer = AssignmentSerializer(assignment)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+
             assignment = Assignment.objects.create(
                 order=order,
                 partner=None,
                 status='failed',
-                reason='No available partner matching criteria (active, under load, correct area)'
+                reason=NO_PARTNER_REASON
             )
+            publish_assignments([assignment])
             serializer = AssignmentSerializer(assignment)
             return Response(serializer.data, status=status.HTTP_400_BAD_REQUEST)
 
+    # PUT /api/orders/bulk_status: move many orders to one status
+    @action(detail=False, methods=['put'], url_path='bulk_status')
+    def bulk_status(self, request):
+        order_ids = request.data.get('order_ids', [])
+        new_status = request.data.get('status')
+        if not order_ids or not isinstance(order_ids, list):
+            return Response({'detail': 'No order IDs provided.'}, status=status.HTTP_400_BAD_REQUEST)
+        if new_status not in dict(Order.STATUS_CHOICES).keys():
+            return Response({'detail': 'Invalid status value.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not integer_ids(order_ids):
+            return Response({'detail': 'Order IDs must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            updated, partners = set_order_statuses(order_ids, new_status)
+        except PartnerFull as e:
+            return Response({'detail': str(e), 'partners': e.partner_ids}, status=status.HTTP_400_BAD_REQUEST)
+
+        if new_status == 'delivered':
+            # The partners have room again in every area they cover
+            areas = {area for partner in partners if isinstance(partner.areas, list) for area in partner.areas}
+            dispatcher.schedule(areas)
+        elif new_status == 'pending':
+            dispatcher.schedule(Order.objects.filter(pk__in=order_ids).values_list('delivery_area', flat=True).distinct())
+
+        return Response({'detail': f'{updated} orders updated successfully.', 'updated': updated},
+                        status=status.HTTP_200_OK)
+
+    # POST /api/orders/bulk_assign: assign many pending orders in one pass
+    @action(detail=False, methods=['post'], url_path='bulk_assign')
+    def bulk_assign(self, request):
+        order_ids = request.data.get('order_ids', [])
+        strategy = request.data.get('strategy', 'greedy')
+        if not order_ids or not isinstance(order_ids, list):
+            return Response({'detail': 'No order IDs provided.'}, status=status.HTTP_400_BAD_REQUEST)
+        if strategy not in STRATEGIES:
+            return Response({'detail': f'Invalid strategy. Use one of: {", ".join(STRATEGIES)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not integer_ids(order_ids):
+            return Response({'detail': 'Order IDs must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Same engine as the full run, restricted to these orders
+        result = run_batch_assignment(strategy, order_ids=order_ids)
+        return Response({
+            'total_pending': result.total_pending,
+            'assigned_count': result.assigned_count,
+            'failure_reasons': [
+                {'reason': reason, 'count': count} for reason, count in result.failure_reasons.items()
+            ],
+        }, status=status.HTTP_200_OK)
+
+    # POST /api/orders/bulk: create or update many orders, keyed on order_number
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk_create(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'detail': 'Expected a JSON array or NDJSON lines of orders.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated, errors = ingest_orders(rows)
+        return Response({'created': created, 'updated': updated, 'errors': errors}, status=status.HTTP_200_OK)
+
     # PUT /api/orders/[id]/status: update order status
     @action(detail=True, methods=['put'], url_path='status')
     def update_status(self, request, pk=None):
-        order = self.get_object()
         new_status = request.data.get('status')
         if new_status not in dict(Order.STATUS_CHOICES).keys():
             return Response({'detail': 'Invalid status value.'}, status=status.HTTP_400_BAD_REQUEST)
-        order.status = new_status
-        order.save()
+        try:
+            with transaction.atomic():
+                # Lock the order so the partner counters move once per transition
+                order = get_object_or_404(Order.objects.select_for_update(), pk=pk)
+                before = (order.assigned_to_id, order.status)
+                order.status = new_status
+                if new_status == 'pending':
+                    # Back in the queue: release the partner so it can be matched again
+                    order.assigned_to = None
+                order.save()
+                # Taking a slot again (e.g. delivered -> assigned) fails when the partner is full
+                partners = update_partner_counters(before, (order.assigned_to_id, new_status))
+                if before != (order.assigned_to_id, new_status):
+                    publish_order_statuses([(order.pk, new_status, order.assigned_to_id)])
+
+                if new_status == 'delivered':
+                    # The partner has room again in every area they cover
+                    for partner in partners:
+                        if isinstance(partner.areas, list):
+                            transaction.on_commit(lambda areas=partner.areas: dispatcher.schedule(areas))
+        except PartnerFull as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = self.get_serializer(order)
         return Response(serializer.data)
@@ -157,15 +355,22 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 1) Query aggregated data using scheduled_time instead of created_at
+        area_filter = request.query_params.get('area')
+        group_by = request.query_params.get('group_by')
+        if group_by not in (None, '', 'area'):
+            return Response({'detail': "group_by must be 'area'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 1) Read the daily rollup (keyed on the scheduled day) instead of raw orders
+        stats = DailyOrderStats.objects.filter(date__gte=start, date__lte=end)
+        if area_filter:
+            stats = stats.filter(area=area_filter)
+
         aggregated = (
-            self.queryset
-            .filter(scheduled_time__date__gte=start, scheduled_time__date__lte=end)
-            .annotate(date=TruncDate('scheduled_time'))
+            stats
             .values('date')
             .annotate(
-                orders=Count('id'),
-                revenue=Sum('total_amount')
+                orders=Sum('orders'),
+                revenue=Sum('revenue')
             )
             .order_by('date')
         )
@@ -179,160 +384,104 @@ class OrderViewSet(viewsets.ModelViewSet):
             for item in aggregated
         }
 
+        areas_by_date = {}
+        if group_by == 'area':
+            for row in stats.filter(orders__gt=0).order_by('date', 'area'):
+                areas_by_date.setdefault(row.date, []).append({
+                    'area': row.area,
+                    'orders': row.orders,
+                    'revenue': row.revenue,
+                })
+
         # 2) Build a day-by-day list from start to end
         trends_data = []
         current = start
         while current <= end:
             if current in aggregated_dict:
-                trends_data.append({
+                day = {
                     'date': current.strftime('%Y-%m-%d'),
                     'orders': aggregated_dict[current]['orders'],
                     'revenue': aggregated_dict[current]['revenue'],
-                })
+                }
             else:
                 # No orders for this date, so 0
-                trends_data.append({
+                day = {
                     'date': current.strftime('%Y-%m-%d'),
                     'orders': 0,
                     'revenue': 0,
-                })
+                }
+            if group_by == 'area':
+                day['areas'] = areas_by_date.get(current, [])
+            trends_data.append(day)
             current += timedelta(days=1)
 
         return Response(trends_data, status=status.HTTP_200_OK)
 
 
-class AssignmentViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Assignment.objects.all()
+class AssignmentViewSet(DeltaSyncMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
+    # Join the order and partner in the same query and load only the
+    # columns the serializer reads, so listing costs one query at any size
+    queryset = Assignment.objects.select_related('order', 'partner').only(
+        'id', 'timestamp', 'status', 'reason', 'order_id', 'partner_id',
+        'order__order_number', 'order__item_names', 'order__total_amount', 'order__delivery_area',
+        'partner__name', 'partner__phone', 'partner__rating',
+    )
     serializer_class = AssignmentSerializer
+    row_mapper = AssignmentRowMapper()
+    # Assignments are never edited, only created and deleted
+    updated_field = 'timestamp'
+    tombstone_model = 'assignment'
+    cursor_ordering = ('-timestamp', '-id')
 
 
 @api_view(['GET'])
 def assignment_metrics(request):
-    metrics = AssignmentMetrics.objects.order_by('-id').first()
-    if not metrics:
+    # History is served a window at a time: ?history_limit=N runs before ?history_before=<run id>
+    try:
+        history_limit = int(request.query_params.get('history_limit', HISTORY_DEFAULT_LIMIT))
+        history_before = request.query_params.get('history_before')
+        history_before = int(history_before) if history_before else None
+    except ValueError:
+        return Response({'detail': 'history_limit and history_before must be integers.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    history_limit = max(0, min(history_limit, HISTORY_MAX_LIMIT))
+
+    payload, etag = cached_metrics_payload(history_limit=history_limit, history_before=history_before)
+    if payload is None:
         return Response({"detail": "Metrics not available."}, status=status.HTTP_404_NOT_FOUND)
-    serializer = AssignmentMetricsSerializer(metrics)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+
+    # Pollers that already hold this version get an empty 304
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(payload, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
 
 
 
 @api_view(['POST'])
 def run_assignment_algorithm(request):
-    # Track how many orders get assigned successfully
-    assigned_count = 0
-    # Track reasons for failures
-    failure_reasons_run = {}
-    # Collect per-order assignment times (in seconds)
-    assignment_times = []
-
-    # Fetch pending orders
-    pending_orders = Order.objects.filter(status='pending')
-
-    # Process each pending order
-    for order in pending_orders:
-        try:
-            partner = DeliveryPartner.objects.filter(
-                status='active',
-                current_load__lt=3,
-                areas__contains=[order.delivery_area]
-            ).first()
-        except Exception as e:
-            reason = f'Error during partner lookup: {str(e)}'
-            Assignment.objects.create(
-                order=order,
-                partner=None,
-                status='failed',
-                reason=reason,
-            )
-            failure_reasons_run[reason] = failure_reasons_run.get(reason, 0) + 1
-            continue
-
-        if partner:
-            try:
-                order.status = 'assigned'
-                order.assigned_to = partner
-                order.save()  # Presumably updates order.last_updated to now
+    strategy = request.query_params.get('strategy', 'greedy')
+    if strategy not in STRATEGIES:
+        return Response({'detail': f'Invalid strategy. Use one of: {", ".join(STRATEGIES)}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-                partner.current_load += 1
-                partner.save()
+    # The run itself happens in a `run_assignment_worker` process
+    job = enqueue_run(strategy)
+    serializer = AssignmentJobSerializer(job)
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
-                Assignment.objects.create(
-                    order=order,
-                    partner=partner,
-                    status='success'
-                )
-                assigned_count += 1
 
-                # Calculate how long this order took from created_at to last_updated
-                time_diff = (order.last_updated - order.created_at).total_seconds()
-                assignment_times.append(time_diff)
+@api_view(['GET'])
+def assignment_job_status(request, pk):
+    job = get_object_or_404(AssignmentJob, pk=pk)
+    data = AssignmentJobSerializer(job).data
+    # Finished jobs also carry the run's metrics, in the metrics endpoint's shape
+    data['metrics'] = metrics_payload(job.run, history_limit=0) if job.run_id else None
+    return Response(data, status=status.HTTP_200_OK)
 
-            except Exception as e:
-                reason = f'Error during assignment update: {str(e)}'
-                Assignment.objects.create(
-                    order=order,
-                    partner=partner,
-                    status='failed',
-                    reason=reason,
-                )
-                failure_reasons_run[reason] = failure_reasons_run.get(reason, 0) + 1
-        else:
-            reason = 'No available partner matching criteria (active, under load, correct area)'
-            Assignment.objects.create(
-                order=order,
-                partner=None,
-                status='failed',
-                reason=reason,
-            )
-            failure_reasons_run[reason] = failure_reasons_run.get(reason, 0) + 1
-
-    # Calculate the average time from creation to assignment (in seconds)
-    if assigned_count > 0:
-        average_time = sum(assignment_times) / assigned_count
-    else:
-        average_time = 0
-
-    # Compute success rate
-    total_pending = pending_orders.count()
-    success_rate = (assigned_count / total_pending * 100) if total_pending > 0 else 0
-
-    # Retrieve the most recent metrics record to build historical data and merge failure reasons
-    last_metrics = AssignmentMetrics.objects.order_by('-id').first()
-
-    # Build historical_data for the new record
-    historical_data = []
-    if last_metrics:
-        historical_data = last_metrics.historical_data or []
-        historical_data.append({
-            "timestamp": last_metrics.created_at.isoformat()
-                if hasattr(last_metrics, 'created_at')
-                else datetime.datetime.now(datetime.timezone.utc).isoformat(),
-            "average_time": last_metrics.average_time,
-            "success_rate": last_metrics.success_rate,
-            "total_assigned": last_metrics.total_assigned,
-        })
-
-    # Merge current run failure reasons with existing ones
-    existing_failure = {}
-    if last_metrics and last_metrics.failure_reasons:
-        for entry in last_metrics.failure_reasons:
-            existing_failure[entry["reason"]] = entry["count"]
-
-    for reason, count in failure_reasons_run.items():
-        existing_failure[reason] = existing_failure.get(reason, 0) + count
-
-    merged_failure_reasons = [
-        {"reason": k, "count": v} for k, v in existing_failure.items()
-    ]
-
-    # Create a new metrics record
-    new_metrics = AssignmentMetrics.objects.create(
-        total_assigned=assigned_count,
-        success_rate=success_rate,
-        average_time=average_time,  # Now based on per-order assignment times
-        failure_reasons=merged_failure_reasons,
-        historical_data=historical_data
-    )
 
-    serializer = AssignmentMetricsSerializer(new_metrics)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+# GET /metrics: this process's request and assignment metrics in Prometheus text format
+def prometheus_metrics(request):
+    return HttpResponse(registry.render(), content_type=METRICS_CONTENT_TYPE)
@@ -13,4 +13,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartDelivery.settings')
 
-application = get_asgi_application()
+# Each ASGI request runs its sync code on a thread of its own, so connections
+# kept open per thread are never reused and pile up until Postgres refuses
+# new ones. Close them after each request unless told otherwise, and put
+# PgBouncer in front of Postgres to reuse server connections (see the readme).
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from delivery.stream import not_found, with_event_stream  # noqa: E402
+
+# /api/stream/ is served outside Django's request handling so idle streams stay cheap
+application = with_event_stream(django_application)
+
+# Only /api/stream/, for a small process next to the WSGI web workers (see the
+# Procfile). It runs no Django views, so it opens no per-request connections.
+stream_application = with_event_stream(not_found)
@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack; served at /metrics
+    'delivery.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,10 +74,73 @@ DATABASES = {
         default=os.getenv(
             "DATABASE_URL", 
             ""
-        )
+        ),
+        # Seconds a connection is kept open and reused across requests
+        # (0 closes it after every request). On by default outside DEBUG.
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "0" if DEBUG else "600")),
+        # Ping reused connections before a request so a dropped one is replaced
+        conn_health_checks=os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() in ('true', '1', 't'),
     )
 }
 
+# Set when DATABASE_URL points at PgBouncer in transaction mode, which cannot
+# keep the server-side cursors behind QuerySet.iterator() open between queries
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = os.getenv(
+    "DB_DISABLE_SERVER_SIDE_CURSORS", "False").lower() in ('true', '1', 't')
+
+# Django REST framework
+REST_FRAMEWORK = {
+    # Keyset pagination; views choose their key with `cursor_ordering`
+    'DEFAULT_PAGINATION_CLASS': 'delivery.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # Same JSON bytes as DRF's renderer, encoded by orjson when it is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'delivery.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Seconds before the in-process partner availability index is rebuilt from the database
+PARTNER_INDEX_TTL = int(os.getenv("PARTNER_INDEX_TTL", "60"))
+
+# Seconds between bulk writes of the partner GPS fixes held in memory, and
+# how many recent fixes are kept per partner for GET /api/partners/<id>/track/
+PARTNER_LOCATION_FLUSH_SECONDS = float(os.getenv("PARTNER_LOCATION_FLUSH_SECONDS", "5"))
+PARTNER_TRACK_LENGTH = int(os.getenv("PARTNER_TRACK_LENGTH", "50"))
+
+# Seconds an assignment worker may go without finishing a chunk before
+# another worker takes over its job and redoes the chunk
+ASSIGNMENT_JOB_LEASE_SECONDS = int(os.getenv("ASSIGNMENT_JOB_LEASE_SECONDS", "120"))
+
+# Days deletions are remembered for ?updated_since= polls; older tombstones
+# are removed by `prune_tombstones`
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "7"))
+
+# Serve /api/stream/ from the WSGI app as well, one thread per open stream.
+# Meant for runserver; deployments serve the stream over ASGI (asgi.py)
+EVENT_STREAM_WSGI = os.getenv("EVENT_STREAM_WSGI", str(DEBUG)).lower() in ('true', '1', 't')
+
+# Match new orders automatically, a few at a time, in the area they were placed in
+AUTO_ASSIGN = os.getenv("AUTO_ASSIGN", "False").lower() in ('true', '1', 't')
+AUTO_ASSIGN_STRATEGY = os.getenv("AUTO_ASSIGN_STRATEGY", "greedy")
+# Milliseconds to collect order events before a matching pass
+AUTO_ASSIGN_DEBOUNCE_MS = int(os.getenv("AUTO_ASSIGN_DEBOUNCE_MS", "200"))
+
+# Cache
+# Per-process memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) when running
+# several workers so they share entries. Cached metrics are keyed on the
+# latest run id, so they stay correct either way.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", "smart-delivery"),
+    }
+}
+
+# Seconds a cached assignment metrics response is kept
+METRICS_CACHE_TIMEOUT = int(os.getenv("METRICS_CACHE_TIMEOUT", "300"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
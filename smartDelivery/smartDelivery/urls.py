@@ -4,6 +4,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from delivery.views import prometheus_metrics
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Delivery API",
@@ -19,6 +21,8 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('delivery.urls')),
+    # Prometheus scrape target
+    path('metrics', prometheus_metrics, name='metrics'),
 
     # Swagger endpoints:
     re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -11,6 +11,7 @@ import { AlertTriangle, Menu, RefreshCw } from 'lucide-react';
 import { LoadingPulse } from '../components/layout/pulseLoading';
 import { partners as mockPartners } from '../data/partnerData';
 import { assignments as mockAssignments, assignmentMetrics as mockMetrics } from '../data/assignmentData';
+import { subscribeToChanges } from '../services/api';
 
 // For future reference: API calls using react-query and API services
 // import { useQuery, useMutation } from 'react-query';
@@ -33,18 +34,29 @@ export function AssignmentPage() {
   const [dataLoading, setDataLoading] = useState(true);
   const [mutationLoading, setMutationLoading] = useState(false);
 
+  const loadData = () => {
+    setMetrics(mockMetrics);
+    setAssignments(mockAssignments);
+    setPartners(mockPartners);
+  };
+
   // Simulate API loading with a random delay between 1-3 seconds
   useEffect(() => {
     const delay = Math.floor(Math.random() * 2000) + 1000;
     const timer = setTimeout(() => {
-      setMetrics(mockMetrics);
-      setAssignments(mockAssignments);
-      setPartners(mockPartners);
+      loadData();
       setDataLoading(false);
     }, delay);
     return () => clearTimeout(timer);
   }, []);
 
+  // Auto-refresh reloads when the server reports a change instead of polling.
+  // With react-query: subscribeToChanges(() => queryClient.invalidateQueries())
+  useEffect(() => {
+    if (!autoRefresh) return;
+    return subscribeToChanges(loadData);
+  }, [autoRefresh]);
+
   // Simulated run assignment mutation with random delay (0.5-1.5 seconds)
   const handleRunAssignment = () => {
     setMutationLoading(true);
@@ -78,7 +90,6 @@ export function AssignmentPage() {
     data: metrics,
     isLoading: metricsLoading,
   } = useQuery('metrics', assignmentService.getAssignmentMetrics, {
-    refetchInterval: autoRefresh ? 30000 : false,
     onError: () => {
       toast.error('Failed to load assignment metrics');
     },
@@ -91,7 +102,6 @@ export function AssignmentPage() {
     data: assignmentsResponse,
     isLoading: assignmentsLoading,
   } = useQuery('assignments', assignmentService.getAssignments, {
-    refetchInterval: autoRefresh ? 30000 : false,
     onError: () => {
       toast.error('Failed to load assignments');
     },
@@ -107,7 +117,6 @@ export function AssignmentPage() {
     'partners',
     partnerService.getPartners,
     {
-      refetchInterval: autoRefresh ? 30000 : false,
       onError: () => {
         toast.error('Failed to load partners');
       },
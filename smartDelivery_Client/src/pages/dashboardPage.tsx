@@ -13,6 +13,7 @@ import { LoadingPulse } from '../components/layout/pulseLoading';
 import { assignments as mockAssignments } from '../data/assignmentData';
 import { order as mockOrders } from '../data/orderData';
 import { partners as mockPartners } from '../data/partnerData';
+import { subscribeToChanges } from '../services/api';
 
 // For future reference: API calls using services
 // import { orderService } from '../services/orderService';
@@ -42,7 +43,7 @@ export const DashboardPage = () => {
   });
   const [loading, setLoading] = useState(true);
 
-  // Fetch data on mount and poll every 30s with a simulated delay
+  // Fetch data on mount, and again whenever the server reports a change
   useEffect(() => {
     const fetchData = async () => {
       try {
@@ -100,8 +101,7 @@ export const DashboardPage = () => {
     };
 
     fetchData();
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
+    return subscribeToChanges(fetchData);
   }, []);
 
   if (loading) {
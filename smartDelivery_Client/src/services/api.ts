@@ -3,6 +3,9 @@ import axios from 'axios';
 
 
 const API_URL = 'https://smartdelivery-backend.onrender.com';
+// The event stream runs in its own ASGI process; a proxy in front routes
+// /api/stream/ there, so by default it shares the API's host
+const STREAM_URL = API_URL;
 
 const api = axios.create({
   baseURL: API_URL,
@@ -32,4 +35,72 @@ api.interceptors.response.use(
   }
 );
 
+// Rows of each list endpoint held by syncAllPages, with the sync_time to poll from next
+const synced = new Map<string, { since: string; rows: Map<number, any> }>();
+
+// Keep a local copy of a list endpoint up to date with ?updated_since= polls:
+// only changed rows and deleted ids are transferred after the first call
+export async function syncAllPages<T extends { id: number }>(
+  url: string,
+  compare: (a: T, b: T) => number
+): Promise<T[]> {
+  const state = synced.get(url) ?? { since: '1970-01-01T00:00:00Z', rows: new Map<number, T>() };
+  const query = new URLSearchParams({ updated_since: state.since, page_size: '1000' });
+  let next: string | null = `${url}?${query.toString()}`;
+  let since = state.since;
+  // Merged into a copy so a failed poll leaves the last good state in place
+  let rows = new Map<number, T>(state.rows);
+  while (next) {
+    const response: {
+      data: { results: T[]; next: string | null; sync_time: string; full: boolean; deleted: number[] };
+    } = await api.get(next);
+    const page = response.data;
+    if (page.full && since === state.since) {
+      // Too far behind to list deletions: rebuild from scratch
+      rows = new Map<number, T>();
+    }
+    page.results.forEach((row) => rows.set(row.id, row));
+    page.deleted.forEach((id) => rows.delete(id));
+    since = page.sync_time;
+    next = null;
+    if (page.next) {
+      // Keep requests on the configured base URL, whatever host the server saw
+      const { pathname, search } = new URL(page.next);
+      next = pathname + search;
+    }
+  }
+  synced.set(url, { since, rows });
+  return Array.from(rows.values()).sort(compare);
+}
+
+export type StreamEvent = 'order.status' | 'assignment.created' | 'metrics.updated' | 'resync';
+
+// Listen to /api/stream/ instead of polling. EventSource reconnects on its own
+// and resumes from the last event; on 'resync' the caller should refetch.
+// Returns a function that closes the stream.
+export function subscribeToEvents(
+  onEvent: (event: StreamEvent, data: { rows: any[] | null; count?: number }) => void
+): () => void {
+  const source = new EventSource(`${STREAM_URL}/api/stream/`);
+  const events: StreamEvent[] = ['order.status', 'assignment.created', 'metrics.updated', 'resync'];
+  events.forEach((event) =>
+    source.addEventListener(event, (message) => onEvent(event, JSON.parse((message as MessageEvent).data)))
+  );
+  return () => source.close();
+}
+
+// Call onChange once a burst of events has settled, e.g. after an assignment
+// run, for pages that simply reload their data. Returns a function that closes the stream.
+export function subscribeToChanges(onChange: () => void, waitMs = 1000): () => void {
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  const close = subscribeToEvents(() => {
+    clearTimeout(timer);
+    timer = setTimeout(onChange, waitMs);
+  });
+  return () => {
+    clearTimeout(timer);
+    close();
+  };
+}
+
 export default api;
\ No newline at end of file
@@ -1,4 +1,4 @@
-import api from './api';
+import api, { syncAllPages } from './api';
 import { AssignmentMetrics, Assignment } from '../types/assignment';
 
 export interface ApiResponse<T> {
@@ -6,6 +6,8 @@ export interface ApiResponse<T> {
   error?: string;
 }
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
 function convertMetrics(raw: any): AssignmentMetrics {
   return {
     totalAssigned: raw.total_assigned,
@@ -39,11 +41,19 @@ export const assignmentService = {
     }
   },
 
-  // POST /api/assignments-run/
+  // POST /api/assignments-run/ queues the run; poll the job until a worker finishes it
   async runAssignmentAlgorithm(): Promise<ApiResponse<AssignmentMetrics>> {
     try {
-      const response = await api.post('/api/assignments-run/');
-      const converted = convertMetrics(response.data);
+      const { data: queued } = await api.post('/api/assignments-run/');
+      let job = queued;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = (await api.get(`/api/assignments-run/${queued.id}/`)).data;
+      }
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Assignment run failed');
+      }
+      const converted = convertMetrics(job.metrics);
       return { data: converted };
     } catch (error) {
       return {
@@ -56,10 +66,10 @@ export const assignmentService = {
   // GET /api/assignments/
   async getAssignments(): Promise<ApiResponse<Assignment[]>> {
     try {
-      const response = await api.get('/api/assignments/');
+      const rawAssignments = await syncAllPages<any>('/api/assignments/', (a, b) => b.id - a.id);
       // Optionally, if needed, convert each assignment using convertAssignment:
-      // const assignments = response.data.map((raw: any) => convertAssignment(raw));
-      return { data: response.data };
+      // const assignments = rawAssignments.map((raw: any) => convertAssignment(raw));
+      return { data: rawAssignments };
     } catch (error) {
       return {
         data: [],
@@ -1,4 +1,4 @@
-import api from './api';
+import api, { syncAllPages } from './api';
 import { OrderStatus, Order } from '../types/order';
 
 function convertOrder(rawOrder: any): Order {
@@ -38,9 +38,9 @@ export const orderService = {
             params.append('date', filters.date);
         }
 
-        const response = await api.get(`/api/orders/`);
+        const rawOrders = await syncAllPages<any>('/api/orders/', (a, b) => b.id - a.id);
         // Convert each order to the correct format
-        return response.data.map((rawOrder: any) => convertOrder(rawOrder));
+        return rawOrders.map((rawOrder: any) => convertOrder(rawOrder));
     },
 
     // Get trend data for orders and revenue
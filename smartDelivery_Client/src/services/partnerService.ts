@@ -1,4 +1,4 @@
-import api from './api'; // Import the base API configuration
+import api, { syncAllPages } from './api'; // Import the base API configuration
 import { DeliveryPartner } from '../types/partner';
 
 export interface ApiResponse<T> {
@@ -31,8 +31,8 @@ export const partnerService = {
   // GET /api/partners/ to list partners.
   async getPartners(): Promise<ApiResponse<DeliveryPartner[]>> {
     try {
-      const response = await api.get('/api/partners/');
-      const converted = response.data.map((raw: any) => convertPartner(raw));
+      const rawPartners = await syncAllPages<any>('/api/partners/', (a, b) => a.id - b.id);
+      const converted = rawPartners.map((raw: any) => convertPartner(raw));
       return { data: converted };
     } catch (error) {
       return {